@@ -4,7 +4,7 @@ Script to add selected_seats column to watchlist table
 Run this: py add_selected_seats.py
 """
 
-from db import get_db
+from db import get_db, column_exists, table_columns, is_sqlite
 
 def add_selected_seats_column():
     """Add selected_seats column to watchlist table if it doesn't exist"""
@@ -12,32 +12,24 @@ def add_selected_seats_column():
     cursor = conn.cursor()
     
     try:
-        # Check if column exists
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM INFORMATION_SCHEMA.COLUMNS 
-            WHERE TABLE_SCHEMA = DATABASE()
-            AND TABLE_NAME = 'watchlist'
-            AND COLUMN_NAME = 'selected_seats'
-        """)
-        
-        column_exists = cursor.fetchone()[0] > 0
-        
-        if column_exists:
+        # Check if column exists (INFORMATION_SCHEMA on MySQL, PRAGMA on SQLite)
+        if column_exists(cursor, 'watchlist', 'selected_seats'):
             print("Column 'selected_seats' already exists in watchlist table.")
         else:
-            # Add the column
-            cursor.execute("""
-                ALTER TABLE watchlist 
-                ADD COLUMN selected_seats VARCHAR(500) DEFAULT NULL 
-                COMMENT 'Comma-separated list of selected seat IDs'
-            """)
+            # Add the column (SQLite has no column comments)
+            if is_sqlite():
+                cursor.execute("ALTER TABLE watchlist ADD COLUMN selected_seats VARCHAR(500) DEFAULT NULL")
+            else:
+                cursor.execute("""
+                    ALTER TABLE watchlist 
+                    ADD COLUMN selected_seats VARCHAR(500) DEFAULT NULL 
+                    COMMENT 'Comma-separated list of selected seat IDs'
+                """)
             conn.commit()
             print("Successfully added 'selected_seats' column to watchlist table!")
         
         # Verify the table structure
-        cursor.execute("DESCRIBE watchlist")
-        columns = cursor.fetchall()
+        columns = table_columns(cursor, 'watchlist')
         print("\nCurrent watchlist table structure:")
         for col in columns:
             print(f"  - {col[0]} ({col[1]})")
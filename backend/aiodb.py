@@ -0,0 +1,189 @@
+"""
+Async database access for the ASGI serving mode (asgi.py).
+
+This is the coroutine counterpart of db.py. MySQL goes through an
+aiomysql pool sized by POOL_CONFIG. SQLite uses a fixed set of aiosqlite
+connections, tuned with the same pragmas; each runs its statements on a
+thread of its own, so WAL readers proceed in parallel. Statements use the
+blueprints' %s placeholders. Like db.TimedCursor, they feed metrics.py
+and slowlog.py, and the route label comes from request_timing.
+
+Only the read paths that asgi.py serves natively run through here.
+Writes keep using db.py transactions in the Flask views.
+"""
+
+import asyncio
+import contextvars
+import time
+from contextlib import asynccontextmanager
+
+import metrics
+import slowlog
+from config import ASYNC_CONFIG, DB_BACKEND, DB_CONFIG, POOL_CONFIG, SQLITE_CONFIG
+from db import sqlite_pragmas, statement_kind, to_qmark
+from pool import PoolTimeout
+
+
+class RequestTiming:
+    """Route label and accumulated statement time of the request being served."""
+
+    __slots__ = ("endpoint", "db_seconds")
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.db_seconds = 0.0
+
+
+request_timing = contextvars.ContextVar("request_timing", default=None)
+
+
+class SQLitePool:
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+        self._idle = asyncio.Queue()
+        self._conns = []
+
+    async def open(self):
+        import aiosqlite
+
+        for _ in range(self.size):
+            conn = await aiosqlite.connect(self.path, timeout=SQLITE_CONFIG["busy_timeout"] / 1000.0)
+            for pragma in sqlite_pragmas():
+                await conn.execute(pragma)
+            self._conns.append(conn)
+            self._idle.put_nowait(conn)
+
+    async def close(self):
+        for conn in self._conns:
+            await conn.close()
+        self._conns = []
+
+    async def acquire(self):
+        return await self._idle.get()
+
+    def release(self, conn):
+        self._idle.put_nowait(conn)
+
+    async def query(self, conn, sql, params):
+        async with conn.execute(to_qmark(sql), tuple(params)) as cursor:
+            rows = await cursor.fetchall()
+            return [c[0] for c in cursor.description], rows
+
+    def stats(self):
+        return {"backend": "sqlite", "opened": len(self._conns), "idle": self._idle.qsize(),
+                "in_use": len(self._conns) - self._idle.qsize()}
+
+
+class MySQLPool:
+    def __init__(self):
+        self._pool = None
+
+    async def open(self):
+        import aiomysql
+
+        self._pool = await aiomysql.create_pool(
+            host=DB_CONFIG["host"],
+            user=DB_CONFIG["user"],
+            password=DB_CONFIG["password"],
+            db=DB_CONFIG["database"],
+            minsize=1,
+            maxsize=POOL_CONFIG["size"] + POOL_CONFIG["max_overflow"],
+            pool_recycle=POOL_CONFIG["recycle"],
+            autocommit=True,   # read-only statements; each sees the latest committed data
+        )
+
+    async def close(self):
+        self._pool.close()
+        await self._pool.wait_closed()
+
+    async def acquire(self):
+        return await self._pool.acquire()
+
+    def release(self, conn):
+        self._pool.release(conn)
+
+    async def query(self, conn, sql, params):
+        async with conn.cursor() as cursor:
+            await cursor.execute(sql, tuple(params))
+            rows = await cursor.fetchall()
+            return [c[0] for c in cursor.description], rows
+
+    def stats(self):
+        return {"backend": "mysql", "opened": self._pool.size, "idle": self._pool.freesize,
+                "in_use": self._pool.size - self._pool.freesize}
+
+
+_pool = None
+_pool_lock = None
+
+
+async def open_pool():
+    """Create the pool for DB_BACKEND; called on ASGI startup (or lazily on first use)."""
+    global _pool, _pool_lock
+    if _pool_lock is None:
+        _pool_lock = asyncio.Lock()
+    async with _pool_lock:
+        if _pool is None:
+            pool = SQLitePool(SQLITE_CONFIG["path"], ASYNC_CONFIG["sqlite_connections"]) \
+                if DB_BACKEND == "sqlite" else MySQLPool()
+            await pool.open()
+            _pool = pool
+    return _pool
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.close()
+
+
+def pool_stats():
+    return _pool.stats() if _pool is not None else {"backend": DB_BACKEND, "opened": 0}
+
+
+@asynccontextmanager
+async def connection():
+    """Borrow a pooled connection; raises PoolTimeout after POOL_CONFIG["timeout"] seconds."""
+    pool = _pool or await open_pool()
+    start = time.perf_counter()
+    try:
+        conn = await asyncio.wait_for(pool.acquire(), POOL_CONFIG["timeout"])
+    except asyncio.TimeoutError:
+        raise PoolTimeout(f"no async connection available within {POOL_CONFIG['timeout']}s") from None
+    if metrics.enabled():
+        metrics.ACQUIRE_SECONDS.observe(time.perf_counter() - start, DB_BACKEND)
+    try:
+        yield pool, conn
+    finally:
+        pool.release(conn)
+
+
+async def fetch_all(sql, params=()):
+    """(column names, rows) of a read-only statement."""
+    timing = request_timing.get()
+    endpoint = timing.endpoint if timing else "-"
+    operation, table = statement_kind(sql)
+    async with connection() as (pool, conn):
+        start = time.perf_counter()
+        try:
+            cols, rows = await pool.query(conn, sql, params)
+        except Exception:
+            metrics.QUERY_ERRORS.inc(operation, table)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if timing is not None:
+                timing.db_seconds += elapsed
+    if metrics.enabled():
+        metrics.QUERY_SECONDS.observe(elapsed, operation, table, endpoint)
+        metrics.QUERY_ROWS.observe(len(rows), operation, table)
+    if slowlog.enabled():
+        slowlog.QUERY_LOG.record(sql, params, elapsed, len(rows), operation, table, endpoint)
+    return cols, rows
+
+
+async def fetch_one(sql, params=()):
+    _, rows = await fetch_all(sql, params)
+    return rows[0] if rows else None
@@ -1,25 +1,103 @@
-from flask import Flask
+import os
+
+from flask import Flask, jsonify
 from flask_cors import CORS
 
+import archive  # noqa: F401  registers the archiver job
+import compression
+import idempotency
+import metrics
+import reaper  # noqa: F401  registers the watchlist_reaper job
+import scheduler
+from cache import catalog_cache
+from db import get_db, pool_stats
+from jsonio import FastJSONProvider
+from migrations import latest_version, schema_version
+from pool import PoolTimeout
+
 # Import all blueprints
 from models import (
     users_bp, movies_bp, watchlist_bp, bookings_bp,
-    payments_bp, reviews_bp, genres_bp, signup_bp, login_bp
+    payments_bp, reviews_bp, genres_bp, signup_bp, login_bp, admin_bp, reports_bp, batch_bp, home_bp
 )
 
-app = Flask(__name__)
-CORS(app)
 
-# Register blueprints
-app.register_blueprint(signup_bp)
-app.register_blueprint(login_bp, url_prefix="/auth")
-app.register_blueprint(users_bp, url_prefix='/users')
-app.register_blueprint(movies_bp, url_prefix='/movies')
-app.register_blueprint(watchlist_bp, url_prefix='/watchlist')
-app.register_blueprint(bookings_bp, url_prefix='/bookings')
-app.register_blueprint(payments_bp, url_prefix='/payments')
-app.register_blueprint(reviews_bp, url_prefix='/reviews')
-app.register_blueprint(genres_bp, url_prefix='/genres')
+def create_app(config=None):
+    """
+    Build the Flask app; `config` overrides Flask settings (e.g. {"TESTING": True}).
+
+    DB pools and caches are created lazily on first use and reset in forked
+    children, so workers may build the app before or after the fork (see
+    gunicorn.conf.py).
+    """
+    app = Flask(__name__)
+    app.config.update(config or {})
+    app.json = FastJSONProvider(app)
+    CORS(app, expose_headers=["ETag", "X-Next-Cursor", "Server-Timing", "Idempotent-Replayed"])
+    metrics.init_app(app, pool_stats)
+    scheduler.init_app(app)
+    compression.init_app(app)
+
+    # Register blueprints
+    app.register_blueprint(signup_bp)
+    app.register_blueprint(login_bp, url_prefix="/auth")
+    app.register_blueprint(users_bp, url_prefix='/users')
+    app.register_blueprint(movies_bp, url_prefix='/movies')
+    app.register_blueprint(watchlist_bp, url_prefix='/watchlist')
+    app.register_blueprint(bookings_bp, url_prefix='/bookings')
+    app.register_blueprint(payments_bp, url_prefix='/payments')
+    app.register_blueprint(reviews_bp, url_prefix='/reviews')
+    app.register_blueprint(genres_bp, url_prefix='/genres')
+    app.register_blueprint(admin_bp, url_prefix='/admin')
+    app.register_blueprint(reports_bp, url_prefix='/reports')
+    app.register_blueprint(batch_bp, url_prefix='/batch')
+    app.register_blueprint(home_bp, url_prefix='/home')
+
+    @app.errorhandler(PoolTimeout)
+    def handle_pool_timeout(e):
+        return jsonify({"success": False, "message": "Database busy, please retry"}), 503
+
+    @app.route('/healthz', methods=['GET'])
+    def healthz():
+        """Liveness: the worker answers requests; touches nothing else."""
+        return jsonify({"status": "ok", "pid": os.getpid()})
+
+    @app.route('/readyz', methods=['GET'])
+    def readyz():
+        """Readiness: the database answers and its schema is fully migrated."""
+        try:
+            conn = get_db()
+            cursor = conn.cursor()
+            try:
+                version = schema_version(cursor)
+            finally:
+                cursor.close()
+                conn.rollback()
+                conn.close()
+        except Exception as e:
+            return jsonify({"status": "unavailable", "message": str(e)}), 503
+        if version is None or version < latest_version():
+            return jsonify({"status": "unavailable", "message": "Pending database migrations",
+                            "schema_version": version, "expected": latest_version()}), 503
+        return jsonify({"status": "ready", "schema_version": version})
+
+    @app.route('/db/stats', methods=['GET'])
+    def db_stats():
+        """Connection pool counters (in use, waiting, checkout wait time)."""
+        return jsonify(pool_stats())
+
+    @app.route('/cache/stats', methods=['GET'])
+    def cache_stats():
+        """Catalog cache, idempotency store and compressed-body cache counters."""
+        return jsonify({"catalog": catalog_cache.stats(), "idempotency": idempotency.STORE.stats(),
+                        "compression": compression.stats()})
+
+    return app
+
+
+app = create_app()
+
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    # Development server only; production runs gunicorn -c gunicorn.conf.py (which serves app:app)
+    app.run(debug=os.environ.get("FLASK_DEBUG", "0") in ("1", "true", "yes"))
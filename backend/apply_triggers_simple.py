@@ -4,7 +4,22 @@ Simple script to apply triggers to the database
 Run this: py apply_triggers_simple.py
 """
 
-from db import get_db
+from db import get_db, is_sqlite
+
+
+def apply_sqlite_triggers(cursor):
+    """SQLite has no SIGNAL; use the RAISE() based triggers from setup_sqlite_db.py"""
+    from setup_sqlite_db import SQLITE_TRIGGERS
+
+    for name in ("check_watchlist_seats_before_insert", "check_watchlist_seats_before_update"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for trigger_sql in SQLITE_TRIGGERS:
+        cursor.execute(trigger_sql)
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='trigger'")
+    print("\nCurrent triggers:")
+    for trigger in cursor.fetchall():
+        print(f"  - {trigger[0]}")
+
 
 def apply_triggers():
     """Apply triggers to the database"""
@@ -12,6 +27,12 @@ def apply_triggers():
     cursor = conn.cursor()
     
     try:
+        if is_sqlite():
+            apply_sqlite_triggers(cursor)
+            conn.commit()
+            print("\nAll triggers applied successfully!")
+            return
+
         # Drop existing triggers if they exist
         cursor.execute("DROP TRIGGER IF EXISTS check_watchlist_seats_before_insert")
         cursor.execute("DROP TRIGGER IF EXISTS check_watchlist_seats_before_update")
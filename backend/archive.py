@@ -0,0 +1,167 @@
+"""
+Moves past showtimes and finished bookings into the *_archive tables.
+
+Listings, booking history and admin reports read the live tables only,
+so these tables should hold current shows, not years of history. The
+archiver runs in two steps, each in batch_size chunks with one short
+transaction per chunk:
+
+  1. bookings whose every show started more than `after_days` ago, with
+     their booking_items and payments;
+  2. movies whose showtime is that old and no live booking references
+     them any more, with their reviews and rating summary. Their carts
+     and seat inventory are dropped.
+
+Rows keep their ids, so archived and live rows never collide. A booking
+that mixes an old show with a newer one stays live until both are old,
+and its older movie stays live with it, so live rows only ever reference
+live movies. Reads include the archive only when asked to with
+?include_archived=1. With ARCHIVE_ENABLED=1 the scheduler runs the
+archiver every `interval` seconds; `python archive.py` or POST
+/admin/jobs/archiver/run runs it once.
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+import seatmap
+from cache import catalog_cache, movies_key
+from config import ARCHIVE_CONFIG
+from db import begin, for_update, get_db
+from scheduler import job
+
+log = logging.getLogger(__name__)
+
+# (live table, archive table, copied columns), parents first
+BOOKING_TABLES = [
+    ("bookings", "bookings_archive", "booking_id, user_id, booking_date, status"),
+    ("booking_items", "booking_items_archive", "booking_item_id, booking_id, movie_id, seats_booked, price"),
+    ("payments", "payments_archive", "payment_id, booking_id, payment_date, amount, method, status"),
+]
+MOVIE_COLUMNS = ["movie_id", "genre_id", "title", "price", "available_seats", "description", "duration", "showtime"]
+RATING_COLUMNS = ["review_count", "rating_sum", "r1", "r2", "r3", "r4", "r5"]   # from movie_ratings
+REVIEW_COLUMNS = "review_id, user_id, movie_id, rating, comment, review_date"
+
+FINISHED_BOOKINGS_SQL = """
+    SELECT b.booking_id FROM bookings b
+    WHERE b.booking_date < %s
+      AND NOT EXISTS (
+          SELECT 1 FROM booking_items bi JOIN movies m ON m.movie_id = bi.movie_id
+          WHERE bi.booking_id = b.booking_id AND (m.showtime IS NULL OR m.showtime >= %s)
+      )
+    ORDER BY b.booking_date, b.booking_id
+    LIMIT %s
+"""
+
+PAST_MOVIES_SQL = """
+    SELECT m.movie_id FROM movies m
+    WHERE m.showtime < %s
+      AND NOT EXISTS (SELECT 1 FROM booking_items bi WHERE bi.movie_id = m.movie_id)
+    ORDER BY m.showtime, m.movie_id
+    LIMIT %s
+"""
+
+
+def include_archived(args):
+    return args.get('include_archived', '').lower() in ('1', 'true', 'yes')
+
+
+def merge_newest(live, archived, key, limit=None):
+    """Merge two row lists sorted newest first by key(row); keeps at most `limit` rows."""
+    rows = sorted(live + archived, key=key, reverse=True)
+    return rows if limit is None else rows[:limit]
+
+
+def cutoff_time(after_days):
+    return (datetime.now() - timedelta(days=after_days)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _in_list(ids):
+    return ",".join(["%s"] * len(ids))
+
+
+def _archive_bookings_batch(conn, cursor, cutoff, batch_size):
+    """Move up to batch_size finished bookings in one transaction; returns how many moved."""
+    begin(conn)
+    cursor.execute(FINISHED_BOOKINGS_SQL + for_update(), (cutoff, cutoff, batch_size))
+    ids = [r[0] for r in cursor.fetchall()]
+    if ids:
+        for live, archived, columns in BOOKING_TABLES:
+            cursor.execute(
+                f"INSERT INTO {archived} ({columns}) SELECT {columns} FROM {live} WHERE booking_id IN ({_in_list(ids)})",
+                ids
+            )
+        for live, _, _ in reversed(BOOKING_TABLES):
+            cursor.execute(f"DELETE FROM {live} WHERE booking_id IN ({_in_list(ids)})", ids)
+    conn.commit()
+    return len(ids)
+
+
+def _archive_movies_batch(conn, cursor, cutoff, batch_size):
+    """Move up to batch_size past movies in one transaction; returns their ids and the new catalog version."""
+    begin(conn)
+    cursor.execute(PAST_MOVIES_SQL + for_update(), (cutoff, batch_size))
+    ids = [r[0] for r in cursor.fetchall()]
+    version = None
+    if ids:
+        values = [f"m.{c}" for c in MOVIE_COLUMNS] + [f"COALESCE(mr.{c}, 0)" for c in RATING_COLUMNS]
+        cursor.execute(
+            f"INSERT INTO movies_archive ({', '.join(MOVIE_COLUMNS + RATING_COLUMNS)}) "
+            f"SELECT {', '.join(values)} FROM movies m LEFT JOIN movie_ratings mr ON mr.movie_id = m.movie_id "
+            f"WHERE m.movie_id IN ({_in_list(ids)})",
+            ids
+        )
+        cursor.execute(
+            f"INSERT INTO reviews_archive ({REVIEW_COLUMNS}) "
+            f"SELECT {REVIEW_COLUMNS} FROM reviews WHERE movie_id IN ({_in_list(ids)})",
+            ids
+        )
+        for table in ("reviews", "movie_ratings", "watchlist", "show_seats", "movies"):
+            cursor.execute(f"DELETE FROM {table} WHERE movie_id IN ({_in_list(ids)})", ids)
+        version = catalog_cache.bump_version(cursor)
+    conn.commit()
+    return ids, version
+
+
+@job("archiver", ARCHIVE_CONFIG["interval"], ARCHIVE_CONFIG["enabled"])
+def run_archive(after_days=None, batch_size=None, max_batches=None):
+    """Archive shows older than `after_days` and their bookings; returns counts for this run."""
+    cutoff = cutoff_time(after_days or ARCHIVE_CONFIG["after_days"])
+    batch_size = batch_size or ARCHIVE_CONFIG["batch_size"]
+    max_batches = max_batches or ARCHIVE_CONFIG["max_batches"]
+    totals = {"bookings": 0, "movies": 0, "batches": 0}
+
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        # Bookings first: a movie can only go once no live booking references it
+        for _ in range(max_batches):
+            moved = _archive_bookings_batch(conn, cursor, cutoff, batch_size)
+            totals["batches"] += 1
+            totals["bookings"] += moved
+            if moved < batch_size:
+                break
+        for _ in range(max_batches):
+            ids, version = _archive_movies_batch(conn, cursor, cutoff, batch_size)
+            totals["batches"] += 1
+            totals["movies"] += len(ids)
+            if ids:
+                catalog_cache.invalidate(prefixes=(movies_key(),), version=version)
+                for movie_id in ids:
+                    seatmap.forget(movie_id)
+            if len(ids) < batch_size:
+                break
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    if totals["bookings"] or totals["movies"]:
+        log.info("archiver: %(bookings)d bookings, %(movies)d movies archived", totals)
+    return totals
+
+
+if __name__ == "__main__":
+    print(run_archive())
@@ -0,0 +1,167 @@
+"""
+ASGI entry point for the async serving mode: uvicorn asgi:app
+
+The I/O-bound reads below run as coroutines on aiodb:
+
+    GET /movies/
+    GET /watchlist/<user_id>
+    GET /bookings/user/<user_id>
+
+While they wait on the database, one worker process keeps many of them
+in flight. They reuse each blueprint's SQL, row shaping and catalog
+cache, so their responses match the sync views. Every other route goes
+to the unchanged Flask app through a2wsgi, which runs it on a pool of
+ASYNC_CONFIG["wsgi_threads"] threads, so the API surface is the same in
+both modes, as do ?stream=1 and ?include_archived=1 reads. app.py with
+a WSGI server remains the default (sync) mode.
+"""
+
+import logging
+import re
+import time
+from urllib.parse import parse_qsl
+
+from a2wsgi import WSGIMiddleware
+
+import aiodb
+import compression
+import metrics
+from app import app as flask_app
+from archive import include_archived
+from cache import VERSION_SQL, catalog_cache, movies_key
+from config import ASYNC_CONFIG, COMPRESS_CONFIG
+from db import row_mapper
+from models.bookings import USER_BOOKINGS_SQL, group_user_bookings
+from models.movies import movie_rows, movies_query
+from models.watchlist import WATCHLIST_SQL
+from pool import PoolTimeout
+from streaming import wants_stream
+
+log = logging.getLogger(__name__)
+
+dumpb = flask_app.json.dumpb
+
+
+async def get_movies(query):
+    genre_id = query.get('genre_id')
+    if catalog_cache.version_check_due():
+        await _sync_catalog_version()
+    key = movies_key(genre_id)
+    body = catalog_cache.get_local(key)
+    if body is None:
+        generation = catalog_cache.generation
+        cols, rows = await aiodb.fetch_all(*movies_query(genre_id))
+        body = dumpb(list(movie_rows(rows, cols)))
+        catalog_cache.set(key, body, generation)
+    return 200, body
+
+
+async def _sync_catalog_version():
+    try:
+        row = await aiodb.fetch_one(VERSION_SQL, (catalog_cache.name,))
+    except Exception as e:
+        log.warning("cache version check for %s failed: %s", catalog_cache.name, e)
+        return
+    catalog_cache.apply_version(row[0] if row else 0)
+
+
+async def get_watchlist(query, user_id):
+    cols, rows = await aiodb.fetch_all(WATCHLIST_SQL, (int(user_id),))
+    return 200, _json(list(map(row_mapper(tuple(cols)), rows)))
+
+
+async def list_user_bookings(query, user_id):
+    _, rows = await aiodb.fetch_all(USER_BOOKINGS_SQL, (int(user_id),))
+    return 200, _json(group_user_bookings(rows))
+
+
+def _json(data):
+    # Same bytes as jsonify(): compact and with a trailing newline
+    return dumpb(data) + b"\n"
+
+
+# (path pattern, Flask endpoint used for metric labels, handler)
+ROUTES = [
+    (re.compile(r"^/movies/$"), "movies.get_movies", get_movies),
+    (re.compile(r"^/watchlist/(\d+)$"), "watchlist.get_watchlist", get_watchlist),
+    (re.compile(r"^/bookings/user/(\d+)$"), "bookings.list_user_bookings", list_user_bookings),
+]
+
+
+class AsyncAPI:
+    """ASGI app: native coroutine handlers for ROUTES, the Flask app for everything else."""
+
+    def __init__(self, wsgi_app):
+        self.wsgi = WSGIMiddleware(wsgi_app, workers=ASYNC_CONFIG["wsgi_threads"])
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] == "http" and scope["method"] == "GET":
+            for pattern, endpoint, handler in ROUTES:
+                match = pattern.match(scope["path"])
+                if match:
+                    query = dict(parse_qsl(scope["query_string"].decode("latin-1")))
+                    if not wants_stream(query) and not include_archived(query):
+                        return await self._serve(scope, send, endpoint, handler, query, match.groups())
+                    break
+        await self.wsgi(scope, receive, send)
+
+    async def _serve(self, scope, send, endpoint, handler, query, args):
+        timing = aiodb.RequestTiming(endpoint)
+        token = aiodb.request_timing.set(timing)
+        started = time.perf_counter()
+        try:
+            status, body = await handler(query, *args)
+        except PoolTimeout:
+            status, body = 503, _json({"success": False, "message": "Database busy, please retry"})
+        except Exception as e:
+            log.exception("%s failed", endpoint)
+            status, body = 500, _json({"success": False, "message": str(e)})
+        finally:
+            aiodb.request_timing.reset(token)
+        elapsed = time.perf_counter() - started
+
+        headers = [(b"content-type", b"application/json")]
+        if compression.enabled():
+            # What compression.py does for the sync responses
+            headers.append((b"vary", b"Accept-Encoding"))
+            accept = next((value for name, value in scope["headers"] if name == b"accept-encoding"), b"")
+            encoding = compression.choose_encoding(accept.decode("latin-1"))
+            if encoding is not None and len(body) >= COMPRESS_CONFIG["min_size"]:
+                body = compression.compress(body, encoding)
+                headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"content-length", str(len(body)).encode()))
+        if metrics.enabled():
+            blueprint = endpoint.split(".", 1)[0]
+            metrics.REQUEST_SECONDS.observe(elapsed, "GET", blueprint, endpoint, str(status))
+            metrics.REQUEST_DB_SECONDS.observe(timing.db_seconds, blueprint, endpoint)
+            headers.append((b"server-timing", (
+                f"db;dur={timing.db_seconds * 1000:.2f}, app;dur={(elapsed - timing.db_seconds) * 1000:.2f}"
+            ).encode()))
+        origin = next((value for name, value in scope["headers"] if name == b"origin"), None)
+        if origin is not None:
+            # What flask-cors adds to the sync responses
+            headers.append((b"access-control-allow-origin", origin))
+            headers.append((b"access-control-expose-headers", b"ETag, Idempotent-Replayed, Server-Timing, X-Next-Cursor"))
+            headers.append((b"vary", b"Origin"))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await aiodb.open_pool()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await aiodb.close_pool()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+app = AsyncAPI(flask_app)
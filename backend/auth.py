@@ -0,0 +1,126 @@
+"""
+Signed session tokens and the shared admin check used by the blueprints.
+
+/auth/login issues a token signed with AUTH_CONFIG["secret_key"] that
+carries the user's `token_version`. Admin endpoints keep verified tokens
+in a small TTL cache; filling an entry reads the user's current
+token_version and is_admin, so each token costs one primary-key lookup
+per `cache_ttl` seconds. Updating or deleting a user through users_bp
+bumps token_version in the same transaction, which revokes every token
+issued before the change in all workers within `cache_ttl`.
+"""
+
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import g, jsonify, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from config import AUTH_CONFIG
+from db import get_db
+from forking import on_fork
+
+log = logging.getLogger(__name__)
+
+_secret_key = AUTH_CONFIG["secret_key"]
+if not _secret_key:
+    # gunicorn.conf.py refuses to start without SECRET_KEY; this covers python app.py and scripts
+    _secret_key = secrets.token_urlsafe(32)
+    log.warning("SECRET_KEY is not set; using a random key, so tokens end with this process")
+_serializer = URLSafeTimedSerializer(_secret_key, salt="session")
+
+_cache = OrderedDict()  # token -> (claims, cached_until)
+_cache_lock = threading.Lock()
+
+TOKEN_USER_SQL = "SELECT token_version, is_admin FROM users WHERE user_id=%s"
+
+
+@on_fork
+def _after_fork():
+    global _cache_lock
+    _cache_lock = threading.Lock()
+    _cache.clear()
+
+
+def issue_token(user_id, is_admin, token_version=0):
+    return _serializer.dumps({"uid": user_id, "adm": int(is_admin or 0), "ver": token_version or 0,
+                              "iat": time.time()})
+
+
+def revoke_user_sessions(cursor, user_id):
+    """Invalidate all tokens issued to user_id so far; call inside the transaction changing the user."""
+    cursor.execute("UPDATE users SET token_version = token_version + 1 WHERE user_id=%s", (user_id,))
+    with _cache_lock:
+        for token in [t for t, (claims, _) in _cache.items() if claims["uid"] == int(user_id)]:
+            del _cache[token]
+
+
+def _current_claims(claims):
+    """claims with the user's current is_admin, or None if the user is gone or the token was revoked."""
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(TOKEN_USER_SQL, (claims["uid"],))
+        r = cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+    if r is None or (r[0] or 0) != claims.get("ver", 0):
+        return None
+    return {**claims, "adm": r[1]}
+
+
+def _verify(token):
+    """Return claims for a valid, unexpired, unrevoked token, else None."""
+    now = time.monotonic()
+    with _cache_lock:
+        hit = _cache.get(token)
+        if hit is not None:
+            if hit[1] > now:
+                _cache.move_to_end(token)
+                claims = hit[0]
+            else:
+                del _cache[token]
+                hit = None
+    if hit is None:
+        try:
+            claims = _serializer.loads(token, max_age=AUTH_CONFIG["token_ttl"])
+        except BadSignature:
+            return None
+        claims = _current_claims(claims)
+        if claims is None:
+            return None
+        remaining = claims["iat"] + AUTH_CONFIG["token_ttl"] - time.time()
+        with _cache_lock:
+            _cache[token] = (claims, now + min(AUTH_CONFIG["cache_ttl"], remaining))
+            if len(_cache) > AUTH_CONFIG["cache_size"]:
+                _cache.popitem(last=False)
+    return claims
+
+
+def _bearer_token():
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        return header[7:].strip()
+    return None
+
+
+def admin_required(view):
+    """Reject the request unless it carries an admin session token from /auth/login."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = _bearer_token()
+        if not token:
+            return jsonify({"success": False, "message": "Admin session required; log in via /auth/login"}), 401
+        claims = _verify(token)
+        if claims is None:
+            return jsonify({"success": False, "message": "Session expired or invalid"}), 401
+        if claims["adm"] != 1:
+            return jsonify({"success": False, "message": "Not authorized"}), 403
+        g.user_id = claims["uid"]
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Sync vs async serving mode on the I/O-bound read endpoints.
+
+Boots each mode in its own process:
+  sync   app.py on a WSGI server with a fixed pool of --threads handler
+         threads (what a threaded gunicorn/werkzeug worker gives you)
+  async  asgi.py under a single uvicorn worker (aiodb coroutines with
+         --connections SQLite connections; MySQL uses POOL_CONFIG)
+
+It then drives GET /movies/, /watchlist/<id> and /bookings/user/<id>
+round-robin at each --concurrency level from an asyncio client, using
+one connection per request in both modes. The report gives rps and
+p50/p95/p99 latency.
+
+A local SQLite query returns in microseconds, which would hide the
+difference. --db-latency therefore adds a simulated network round trip
+to every statement (time.sleep in the sync cursor, asyncio.sleep in
+aiodb). Use --db-latency 0 with --mysql to measure a real server.
+
+Run this: py benchmarks/async_mode.py --concurrency 16,64,256 --db-latency 20
+(needs requirements-async.txt; uses a throwaway SQLite database unless --mysql is given)
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from common import backend_path, environment, latency_summary, save_baseline, use_temp_sqlite
+
+backend_path()
+
+MODES = ("sync", "async")
+
+
+# ---------------------------------------------------------------------------
+# Server processes (py benchmarks/async_mode.py --serve sync|async --port N)
+# ---------------------------------------------------------------------------
+
+def add_db_latency(seconds):
+    """Sleep before every statement, in both drivers, to stand in for a remote database."""
+    import aiodb
+    import db
+
+    sync_execute = db.SQLiteCursor.execute
+
+    def execute(self, sql, params=()):
+        time.sleep(seconds)
+        return sync_execute(self, sql, params)
+
+    db.SQLiteCursor.execute = execute
+
+    for pool_class in (aiodb.SQLitePool, aiodb.MySQLPool):
+        def make_query(query):
+            async def delayed(self, conn, sql, params):
+                await asyncio.sleep(seconds)
+                return await query(self, conn, sql, params)
+            return delayed
+        pool_class.query = make_query(pool_class.query)
+
+
+def serve_sync(port, threads):
+    from concurrent.futures import ThreadPoolExecutor
+    from werkzeug.serving import BaseWSGIServer
+    from app import app
+
+    class PooledWSGIServer(BaseWSGIServer):
+        """One request per connection, handled on a bounded thread pool."""
+
+        def __init__(self):
+            super().__init__("127.0.0.1", port, app)
+            self.executor = ThreadPoolExecutor(max_workers=threads)
+
+        def process_request(self, request, client_address):
+            self.executor.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    PooledWSGIServer().serve_forever()
+
+
+def serve_async(port):
+    import uvicorn
+    from asgi import app
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def serve(args):
+    import logging
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    logging.getLogger("slowlog").setLevel(logging.ERROR)   # queued statements would flood the console
+    if args.db_latency:
+        add_db_latency(args.db_latency / 1000.0)
+    if args.serve == "sync":
+        serve_sync(args.port, args.threads)
+    else:
+        serve_async(args.port)
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+async def get(port, path):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n".encode())
+        data = await reader.read()
+    finally:
+        writer.close()
+    return int(data.split(b" ", 2)[1]) if data else 0
+
+
+async def drive(port, paths, concurrency, total):
+    latencies, errors = [], 0
+    issued = 0
+
+    async def worker():
+        nonlocal issued, errors
+        while issued < total:
+            path = paths[issued % len(paths)]
+            issued += 1
+            t0 = time.perf_counter()
+            try:
+                status = await get(port, path)
+            except OSError:
+                status = 0
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if status != 200:
+                errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    summary = latency_summary(latencies)
+    summary["errors"] = errors
+    summary["rps"] = round(len(latencies) / elapsed, 1)
+    return summary
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f"server on port {port} did not start")
+
+
+def seed_bookings(users):
+    """A couple of bookings and a cart per user so every endpoint returns rows."""
+    from app import app
+    client = app.test_client()
+    for user_id in users:
+        for movie_id in (1, 2):
+            client.post('/watchlist/', json={"user_id": user_id, "movie_id": movie_id, "seats_selected": 1})
+            client.post('/bookings', json={"customer_id": user_id})
+        client.post('/watchlist/', json={"user_id": user_id, "movie_id": 3, "seats_selected": 2})
+
+
+def run_mode(mode, args, paths):
+    port = free_port()
+    cmd = [sys.executable, os.path.abspath(__file__), "--serve", mode, "--port", str(port),
+           "--threads", str(args.threads), "--db-latency", str(args.db_latency)]
+    env = dict(os.environ, ASYNC_SQLITE_CONNECTIONS=str(args.connections))
+    server = subprocess.Popen(cmd, env=env)
+    try:
+        wait_ready(port)
+        asyncio.run(drive(port, paths, 4, 50))   # warm up caches and pools
+        results = {}
+        for concurrency in args.concurrency:
+            results[concurrency] = asyncio.run(drive(port, paths, concurrency, args.requests))
+            s = results[concurrency]
+            print(f"{mode:6} c={concurrency:<5} {s['rps']:>9.1f} rps  p50 {s['p50_ms']:>8.2f}  "
+                  f"p95 {s['p95_ms']:>8.2f}  p99 {s['p99_ms']:>8.2f} ms  errors={s['errors']}")
+        return results
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="16,64,256",
+                        type=lambda s: [int(c) for c in s.split(",")], help="in-flight requests per level")
+    parser.add_argument("--requests", type=int, default=3000, help="requests per level")
+    parser.add_argument("--threads", type=int, default=16, help="handler threads in sync mode")
+    parser.add_argument("--connections", type=int, default=64, help="async SQLite connections")
+    parser.add_argument("--db-latency", type=float, default=20.0, help="simulated ms per statement (SQLite)")
+    parser.add_argument("--mode", choices=MODES, action="append", help="only run this mode (repeatable)")
+    parser.add_argument("--mysql", action="store_true", help="use the configured MySQL database")
+    parser.add_argument("--out", help="write the JSON result here")
+    parser.add_argument("--serve", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args)
+
+    if not args.mysql:
+        use_temp_sqlite("async-bench-")
+    users = (2, 3)
+    seed_bookings(users)
+    paths = ["/movies/"] + [f"/watchlist/{u}" for u in users] + [f"/bookings/user/{u}" for u in users]
+
+    print(f"{len(paths)} paths, {args.requests} requests per level, db latency {args.db_latency} ms, "
+          f"sync threads {args.threads}, async connections {args.connections}")
+    results = {mode: run_mode(mode, args, paths) for mode in (args.mode or MODES)}
+
+    if len(results) == 2:
+        print("\nasync vs sync:")
+        for concurrency in args.concurrency:
+            s, a = results["sync"][concurrency], results["async"][concurrency]
+            print(f"  c={concurrency:<5} rps x{a['rps'] / s['rps']:.2f}   p95 {s['p95_ms']:.1f} -> {a['p95_ms']:.1f} ms")
+    if args.out:
+        save_baseline(args.out, {
+            "environment": environment(),
+            "config": {"requests": args.requests, "threads": args.threads, "connections": args.connections,
+                       "db_latency_ms": args.db_latency},
+            "results": {mode: {str(c): r for c, r in levels.items()} for mode, levels in results.items()},
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Shared helpers for the benchmark scripts in this directory.
+
+Scripts are run as `py benchmarks/<name>.py` from backend/, so this
+directory is on sys.path and backend/ is added by backend_path().
+"""
+
+import json
+import os
+import platform
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_DIR = os.path.join(BENCH_DIR, "baselines")
+
+
+def backend_path():
+    backend = os.path.dirname(BENCH_DIR)
+    if backend not in sys.path:
+        sys.path.insert(0, backend)
+
+
+def use_temp_sqlite(prefix="bench-"):
+    """Point the app at a fresh, seeded SQLite file; must run before importing db/app."""
+    backend_path()
+    tmpdir = tempfile.mkdtemp(prefix=prefix)
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["SQLITE_PATH"] = os.path.join(tmpdir, "bench.db")
+    from setup_sqlite_db import setup_database
+    setup_database()
+    return os.environ["SQLITE_PATH"]
+
+
+def percentile(sorted_samples, p):
+    """Nearest-rank percentile of an already sorted list (0 for an empty one)."""
+    if not sorted_samples:
+        return 0.0
+    return sorted_samples[min(len(sorted_samples) - 1, int(p * len(sorted_samples)))]
+
+
+def latency_summary(samples_ms):
+    samples = sorted(samples_ms)
+    return {
+        "count": len(samples),
+        "mean_ms": round(sum(samples) / len(samples), 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 0.50), 3),
+        "p95_ms": round(percentile(samples, 0.95), 3),
+        "p99_ms": round(percentile(samples, 0.99), 3),
+        "max_ms": round(samples[-1], 3) if samples else 0.0,
+    }
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "db_backend": os.environ.get("DB_BACKEND", "mysql"),
+    }
+
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(current, baseline, metric, higher_is_better=False, threshold=0.10):
+    """
+    Compare `metric` of every case present in both {case: {metric: value}} maps.
+
+    Returns [(case, old, new, relative change, regressed)]; a case regresses
+    when it got worse by more than `threshold` (0.10 = 10%).
+    """
+    rows = []
+    for case, values in current.items():
+        old = (baseline.get(case) or {}).get(metric)
+        new = values.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        rows.append((case, old, new, change, worse > threshold))
+    return rows
+
+
+def print_comparison(rows, unit):
+    for case, old, new, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"  {case:40} {old:>12.3f} -> {new:>12.3f} {unit}  {change:+7.1%}{flag}")
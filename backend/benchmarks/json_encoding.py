@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+JSON encoding and compression on the list endpoints.
+
+Compares Flask's default JSON provider with jsonio.FastJSONProvider:
+
+  encode      1000 movie rows typed as the MySQL driver returns them
+              (Decimal price, datetime showtime), row dicts to bytes
+  endpoints   GET /movies/ with the catalog cache cleared before every
+              request (the fill path), GET /bookings/all?limit=100, and
+              GET /bookings/all?stream=1 over the whole history, through
+              the Flask test client
+
+"fast+gzip" repeats the endpoint cases with Accept-Encoding: gzip and
+reports the bytes on the wire. The data comes from generate_dataset.py
+--scale small in a throwaway SQLite file, unless --sqlite or --mysql is
+given.
+
+Run this: py benchmarks/json_encoding.py [--requests 200] [--out result.json]
+"""
+
+import argparse
+import datetime
+import decimal
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+from common import BENCH_DIR, backend_path, environment, latency_summary, save_baseline
+
+backend_path()
+
+MOVIE_COLS = ("movie_id", "genre_id", "title", "price", "available_seats",
+              "description", "duration", "showtime", "genre")
+
+ENDPOINTS = {
+    "/movies/ (cache fill)": ("/movies/", True),
+    "/bookings/all?limit=100": ("/bookings/all?limit=100", False),
+    "/bookings/all?stream=1": ("/bookings/all?stream=1", False),
+}
+
+
+def generate_dataset():
+    path = os.path.join(tempfile.mkdtemp(prefix="json-bench-"), "bench.db")
+    print(f"generating --scale small into {path} ...")
+    subprocess.run([sys.executable, os.path.join(os.path.dirname(BENCH_DIR), "generate_dataset.py"),
+                    "--scale", "small", "--sqlite", path], check=True, stdout=subprocess.DEVNULL)
+    return path
+
+
+def mysql_typed_rows(n):
+    showtime = datetime.datetime(2025, 10, 5, 18, 0, 0)
+    return [(i, i % 5 + 1, f"Movie {i}", decimal.Decimal("299.00"), 50, "High-octane action thriller", 150,
+             showtime + datetime.timedelta(hours=i), "Action") for i in range(n)]
+
+
+def bench_encode(app, providers, repeat):
+    from db import row_mapper
+    rows = mysql_typed_rows(1000)
+    to_dict = row_mapper(MOVIE_COLS)
+    results = {}
+    for name, provider in providers.items():
+        timer = timeit.Timer(lambda: provider.dumpb(list(map(to_dict, rows))))
+        number, _ = timer.autorange()
+        results[name] = {"ms_per_op": round(min(timer.repeat(repeat=repeat, number=number)) / number * 1e3, 3)}
+    return results
+
+
+def bench_endpoint(app, path, clear_cache, requests, headers):
+    from cache import catalog_cache
+    client = app.test_client()
+    client.get(path, headers=headers)  # warm up
+    samples, size = [], 0
+    for _ in range(requests):
+        if clear_cache:
+            catalog_cache.clear()
+        start = time.perf_counter()
+        response = client.get(path, headers=headers)
+        size = len(response.get_data())
+        samples.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise SystemExit(f"{path}: HTTP {response.status_code} {response.get_data()[:200]!r}")
+    return {**latency_summary(samples), "bytes": size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and provider")
+    parser.add_argument("--repeat", type=int, default=5, help="timeit repeats for the encode case")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--sqlite", metavar="PATH", help="existing SQLite database to read")
+    target.add_argument("--mysql", action="store_true", help="use the configured MySQL database")
+    parser.add_argument("--out", help="write the JSON result here")
+    args = parser.parse_args()
+
+    if not args.mysql:
+        os.environ["DB_BACKEND"] = "sqlite"
+        os.environ["SQLITE_PATH"] = args.sqlite or generate_dataset()
+    os.environ.setdefault("SCHEDULER_ENABLED", "0")
+
+    from flask.json.provider import DefaultJSONProvider
+    from app import app
+    from auth import issue_token
+    from jsonio import FastJSONProvider, orjson
+
+    class FlaskProvider(DefaultJSONProvider):
+        def dumpb(self, obj):
+            # What the views did before: dumps() then encode()
+            return self.dumps(obj).encode()
+
+    providers = {"flask": FlaskProvider(app), "fast": FastJSONProvider(app)}
+    print(f"orjson: {'yes' if orjson is not None else 'no (stdlib fallback)'}")
+
+    print("\nencode 1000 MySQL-typed movie rows:")
+    encode = bench_encode(app, providers, args.repeat)
+    for name, r in encode.items():
+        print(f"  {name:10} {r['ms_per_op']:>9.3f} ms")
+    print(f"  speedup x{encode['flask']['ms_per_op'] / encode['fast']['ms_per_op']:.2f}")
+
+    auth = {"Authorization": f"Bearer {issue_token(1, 1)}"}
+    modes = {
+        "flask": (providers["flask"], auth),
+        "fast": (providers["fast"], auth),
+        "fast+gzip": (providers["fast"], {**auth, "Accept-Encoding": "gzip"}),
+    }
+    endpoints = {}
+    for case, (path, clear_cache) in ENDPOINTS.items():
+        requests = max(args.requests // 40, 3) if "stream" in path else args.requests
+        print(f"\n{case} ({requests} requests):")
+        endpoints[case] = {}
+        for mode, (provider, headers) in modes.items():
+            app.json = provider
+            r = endpoints[case][mode] = bench_endpoint(app, path, clear_cache, requests, headers)
+            print(f"  {mode:10} mean {r['mean_ms']:>9.3f}  p95 {r['p95_ms']:>9.3f} ms  {r['bytes']:>10,} bytes")
+        flask, fast = endpoints[case]["flask"], endpoints[case]["fast"]
+        print(f"  speedup x{flask['mean_ms'] / fast['mean_ms']:.2f}")
+    app.json = providers["fast"]
+
+    if args.out:
+        save_baseline(args.out, {
+            "environment": environment(),
+            "config": {"requests": args.requests, "orjson": orjson is not None},
+            "results": {"encode": encode, "endpoints": endpoints},
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the Flask API.
+
+Boots app.py on a local threaded WSGI server, or targets --url, and
+replays a traffic mix with --workers concurrent virtual users. Each user
+runs --requests actions chosen by a seeded RNG, so a run is reproducible
+for a given seed, mix and worker count. The report gives throughput plus
+p50/p95/p99 latency for each endpoint. Results can be written with --out
+and compared with a saved baseline (benchmarks/baselines/load_<mix>.json).
+
+Mixes:
+  browse    catalog reads: /movies, genre filter, /genres, reviews, seat maps
+  checkout  signed-in users: watchlist adds, cart reads, POST /bookings + /payments
+  admin     admin listings: /bookings/all pages, /users, /movies
+  mixed     80% browse, 15% checkout, 5% admin
+
+Run this: py benchmarks/load_test.py --mix mixed --workers 16 --requests 200
+(uses a throwaway SQLite database unless --mysql or --url is given)
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import random
+import threading
+import time
+import urllib.parse
+
+from common import (backend_path, baseline_path, compare, environment, latency_summary, load_baseline,
+                    print_comparison, save_baseline, use_temp_sqlite)
+
+backend_path()
+
+ADMIN = {"email": "admin@moviebooking.com", "password": "admin123"}
+
+
+class Client:
+    """One keep-alive HTTP connection per virtual user; records latency per endpoint label."""
+
+    def __init__(self, base_url, recorder):
+        parsed = urllib.parse.urlparse(base_url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self.prefix = parsed.path.rstrip("/")
+        self.recorder = recorder
+        self.token = None
+        self.last_headers = {}
+        self._conn = None
+
+    def request(self, method, path, label, body=None, ok=(200,)):
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        payload = json.dumps(body).encode() if body is not None else None
+        t0 = time.perf_counter()
+        status, data = None, None
+        for attempt in (1, 2):
+            try:
+                if self._conn is None:
+                    self._conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+                self._conn.request(method, self.prefix + path, body=payload, headers=headers)
+                resp = self._conn.getresponse()
+                status, raw = resp.status, resp.read()
+                self.last_headers = dict(resp.getheaders())
+                if resp.getheader("Connection", "").lower() == "close":
+                    self._conn.close()
+                    self._conn = None
+                data = json.loads(raw) if raw else None
+                break
+            except (http.client.HTTPException, ConnectionError, OSError):
+                # Stale keep-alive connection: reconnect once
+                if self._conn is not None:
+                    self._conn.close()
+                self._conn = None
+                if attempt == 2:
+                    status = 0
+        self.recorder.record(label, (time.perf_counter() - t0) * 1000, status in ok, status)
+        return status, data
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.statuses = {}
+
+    def record(self, label, ms, ok, status):
+        with self._lock:
+            self.latencies.setdefault(label, []).append(ms)
+            self.statuses.setdefault(label, {}).setdefault(status, 0)
+            self.statuses[label][status] += 1
+            if not ok:
+                self.errors[label] = self.errors.get(label, 0) + 1
+
+
+# ---------------------------------------------------------------------------
+# Scenario actions; each takes (client, rnd, state)
+# ---------------------------------------------------------------------------
+
+def browse_movies(client, rnd, state):
+    client.request("GET", "/movies/", "GET /movies")
+
+
+def browse_genre(client, rnd, state):
+    client.request("GET", f"/movies/?genre_id={rnd.randint(1, 5)}", "GET /movies?genre_id")
+
+
+def browse_genres(client, rnd, state):
+    client.request("GET", "/genres/", "GET /genres")
+
+
+def browse_reviews(client, rnd, state):
+    client.request("GET", f"/reviews/{rnd.choice(state['movie_ids'])}?limit=20", "GET /reviews/<id>")
+
+
+def browse_seat_map(client, rnd, state):
+    client.request("GET", f"/movies/{rnd.choice(state['movie_ids'])}/seats", "GET /movies/<id>/seats")
+
+
+def add_to_watchlist(client, rnd, state):
+    movie_id = rnd.choice(state["movie_ids"])
+    body = {"user_id": state["user_id"], "movie_id": movie_id, "seats_selected": rnd.randint(1, 3)}
+    if rnd.random() < 0.3:
+        # Picking specific seats can collide with other users (409 is expected)
+        body["selected_seats"] = f"{rnd.choice('ABCDEFGHIJ')}{rnd.randint(1, 15)}"
+        body["seats_selected"] = 1
+    status, _ = client.request("POST", "/watchlist/", "POST /watchlist", body, ok=(200, 409))
+    return status
+
+
+def view_watchlist(client, rnd, state):
+    client.request("GET", f"/watchlist/{state['user_id']}", "GET /watchlist/<user_id>")
+
+
+def checkout(client, rnd, state):
+    if add_to_watchlist(client, rnd, state) != 200:
+        return
+    status, data = client.request("POST", "/bookings", "POST /bookings", {"customer_id": state["user_id"]},
+                                  ok=(200, 409))
+    if status == 200 and data and data.get("order_id"):
+        client.request("POST", "/payments", "POST /payments",
+                       {"booking_id": data["order_id"], "amount": data.get("total_amount"), "method": "card"})
+
+
+def view_bookings(client, rnd, state):
+    client.request("GET", f"/bookings/user/{state['user_id']}", "GET /bookings/user/<id>")
+
+
+def admin_bookings(client, rnd, state):
+    # First page, sometimes followed by a couple of "Load more" pages
+    path = "/bookings/all?limit=50"
+    for _ in range(rnd.randint(1, 3)):
+        status, _ = client.request("GET", path, "GET /bookings/all")
+        cursor = client.last_headers.get("X-Next-Cursor")
+        if status != 200 or not cursor:
+            break
+        path = f"/bookings/all?limit=50&cursor={cursor}"
+
+
+def admin_users(client, rnd, state):
+    client.request("GET", "/users/", "GET /users")
+
+
+BROWSE = [(browse_movies, 55), (browse_genre, 20), (browse_genres, 10), (browse_reviews, 5), (browse_seat_map, 10)]
+CHECKOUT = [(browse_movies, 20), (add_to_watchlist, 30), (view_watchlist, 20), (checkout, 15), (view_bookings, 15)]
+ADMIN_MIX = [(admin_bookings, 40), (admin_users, 20), (browse_movies, 40)]
+
+MIXES = {
+    "browse": [("browse", 1.0)],
+    "checkout": [("checkout", 1.0)],
+    "admin": [("admin", 1.0)],
+    "mixed": [("browse", 0.80), ("checkout", 0.15), ("admin", 0.05)],
+}
+PROFILES = {"browse": BROWSE, "checkout": CHECKOUT, "admin": ADMIN_MIX}
+
+
+def pick(rnd, weighted):
+    actions, weights = zip(*weighted)
+    return rnd.choices(actions, weights=weights)[0]
+
+
+# ---------------------------------------------------------------------------
+# Setup and run
+# ---------------------------------------------------------------------------
+
+def start_local_server():
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import app
+
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"   # keep-alive
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)   # no per-request access log
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def seed_show_capacity():
+    """Give the seeded shows enough capacity that checkouts don't run dry mid-run."""
+    from db import get_db
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("UPDATE movies SET available_seats = 1000000")
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def prepare_users(base_url, workers, run_id):
+    """Sign up one user per worker, log everybody in; returns (admin token, [(user_id, token)])."""
+    recorder = Recorder()
+    client = Client(base_url, recorder)
+    _, admin = client.request("POST", "/auth/login", "setup", ADMIN)
+    users = []
+    for i in range(workers):
+        creds = {"name": f"Load {i}", "email": f"load-{run_id}-{i}@example.com", "password": "load-pass"}
+        client.request("POST", "/signup", "setup", creds, ok=(200, 400))
+        _, login = client.request("POST", "/auth/login", "setup", creds)
+        users.append((login["customer_id"], login["token"]))
+    return admin["token"], users
+
+
+def run(args, base_url):
+    admin_token, users = prepare_users(base_url, args.workers, args.seed)
+    client = Client(base_url, Recorder())
+    _, movies = client.request("GET", "/movies/", "setup")
+    movie_ids = [m["movie_id"] for m in movies]
+
+    recorder = Recorder()
+    gate = threading.Barrier(args.workers + 1)
+
+    def worker(index):
+        rnd = random.Random(args.seed * 7919 + index)
+        user_id, token = users[index]
+        user_client = Client(base_url, recorder)
+        admin_client = Client(base_url, recorder)
+        user_client.token, admin_client.token = token, admin_token
+        state = {"user_id": user_id, "movie_ids": movie_ids}
+        gate.wait()
+        for _ in range(args.requests):
+            profile = pick(rnd, MIXES[args.mix])
+            action = pick(rnd, PROFILES[profile])
+            action(admin_client if profile == "admin" else user_client, rnd, state)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.workers)]
+    for t in threads:
+        t.start()
+    gate.wait()
+    t_start = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t_start
+
+    endpoints = {}
+    for label, samples in sorted(recorder.latencies.items()):
+        summary = latency_summary(samples)
+        summary["errors"] = recorder.errors.get(label, 0)
+        summary["rps"] = round(len(samples) / elapsed, 1)
+        summary["statuses"] = {str(k): v for k, v in sorted(recorder.statuses[label].items(), key=str)}
+        endpoints[label] = summary
+    total = sum(len(s) for s in recorder.latencies.values())
+    overall = latency_summary([ms for s in recorder.latencies.values() for ms in s])
+    overall["rps"] = round(total / elapsed, 1)
+    overall["errors"] = sum(recorder.errors.values())
+    return {
+        "environment": environment(),
+        "config": {"mix": args.mix, "workers": args.workers, "requests": args.requests, "seed": args.seed},
+        "elapsed_s": round(elapsed, 3),
+        "overall": overall,
+        "endpoints": endpoints,
+    }
+
+
+def report(result):
+    cfg = result["config"]
+    print(f"mix={cfg['mix']} workers={cfg['workers']} requests/worker={cfg['requests']} "
+          f"elapsed={result['elapsed_s']:.2f}s")
+    print(f"{'endpoint':28} {'count':>7} {'err':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for label, s in list(result["endpoints"].items()) + [("TOTAL", result["overall"])]:
+        print(f"{label:28} {s['count']:>7} {s['errors']:>5} {s['rps']:>8.1f} "
+              f"{s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument("--workers", type=int, default=16, help="concurrent virtual users")
+    parser.add_argument("--requests", type=int, default=200, help="actions per virtual user")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--url", help="target an already running server instead of booting app.py")
+    parser.add_argument("--mysql", action="store_true", help="boot app.py against the configured MySQL database")
+    parser.add_argument("--out", help="write the JSON result here")
+    parser.add_argument("--baseline", help="compare with this result file (default: baselines/load_<mix>.json)")
+    parser.add_argument("--threshold", type=float, default=0.20, help="allowed p95 slowdown before --check fails")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--save", action="store_true", help="write the result as the new baseline")
+    group.add_argument("--check", action="store_true", help="exit 1 on a p95 regression against the baseline")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        base_url = args.url
+    else:
+        if not args.mysql:
+            use_temp_sqlite("load-bench-")
+        seed_show_capacity()
+        server, base_url = start_local_server()
+
+    try:
+        result = run(args, base_url)
+    finally:
+        if server is not None:
+            server.shutdown()
+    report(result)
+
+    if args.out:
+        save_baseline(args.out, result)
+    path = args.baseline or baseline_path(f"load_{args.mix}")
+    baseline = load_baseline(path)
+    regressions = []
+    if baseline and not args.save:
+        if baseline.get("config") != result["config"]:
+            print(f"\nnote: baseline {path} was recorded with {baseline.get('config')}")
+        print(f"\np95 vs baseline {path}:")
+        rows = compare(result["endpoints"], baseline["endpoints"], "p95_ms", threshold=args.threshold)
+        print_comparison(rows, "ms")
+        regressions = [r for r in rows if r[4]]
+    if args.save:
+        save_baseline(path, result)
+        print(f"\nSaved baseline to {path}")
+    if args.check and regressions:
+        print(f"\n{len(regressions)} endpoint(s) slower at p95 than baseline by more than {args.threshold:.0%}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for POST /movies/import (importer.py).
+
+Generates a synthetic weekly schedule, streams it through the endpoint
+as CSV and as NDJSON via the Flask test client and reports rows/second.
+It also times showtime normalisation on its own, comparing
+ShowtimeParser with the per-row parse_datetime() used by add_movie.
+
+Run this: py benchmarks/movie_import.py --rows 20000
+(uses a throwaway SQLite database unless --mysql is given)
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from common import backend_path, use_temp_sqlite
+
+backend_path()
+
+SHOWTIME_STYLES = [
+    lambda dt: dt.strftime('%Y-%m-%d %H:%M:%S'),
+    lambda dt: dt.strftime('%Y-%m-%dT%H:%M:%SZ'),
+    lambda dt: dt.strftime('%a, %d %b %Y %H:%M:%S GMT'),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="rows per import")
+    parser.add_argument("--style", type=int, default=2, choices=range(len(SHOWTIME_STYLES)),
+                        help="showtime format: 0 MySQL, 1 ISO-Z, 2 HTTP date (worst case for parse_datetime)")
+    parser.add_argument("--bad-ratio", type=float, default=0.01, help="share of rows with an invalid field")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mysql", action="store_true", help="use the configured MySQL database")
+    return parser.parse_args()
+
+
+def make_rows(args):
+    rnd = random.Random(args.seed)
+    start = datetime(2026, 1, 5, 10, 0, 0)
+    fmt = SHOWTIME_STYLES[args.style]
+    for i in range(args.rows):
+        showtime = fmt(start + timedelta(minutes=15 * rnd.randrange(7 * 24 * 4)))
+        row = {
+            "title": f"Bench Movie {i}",
+            "genre_id": rnd.randint(1, 5),
+            "price": f"{rnd.randint(99, 499)}.00",
+            "available_seats": rnd.randint(20, 150),
+            "description": "synthetic schedule row",
+            "duration": rnd.randint(80, 180),
+            "showtime": showtime,
+        }
+        if rnd.random() < args.bad_ratio:
+            row["showtime"] = "sometime next week"
+        yield row
+
+
+def to_csv(rows):
+    import csv
+    import io
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=["title", "genre_id", "price", "available_seats",
+                                             "description", "duration", "showtime"])
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue().encode()
+
+
+def to_ndjson(rows):
+    return "".join(json.dumps(r) + "\n" for r in rows).encode()
+
+
+def main():
+    args = parse_args()
+    if not args.mysql:
+        use_temp_sqlite("import-bench-")
+
+    from app import app
+    from importer import ShowtimeParser
+    from models.movies import parse_datetime
+
+    rows = list(make_rows(args))
+    showtimes = [r["showtime"] for r in rows]
+
+    t0 = time.perf_counter()
+    for value in showtimes:
+        parse_datetime(value)
+    legacy = time.perf_counter() - t0
+    parser = ShowtimeParser()
+    t0 = time.perf_counter()
+    for value in showtimes:
+        parser.parse(value)
+    cached = time.perf_counter() - t0
+    print(f"showtime parsing ({len(showtimes)} values, style {args.style}):")
+    print(f"  parse_datetime  {len(showtimes) / legacy:>10.0f} values/s")
+    print(f"  ShowtimeParser  {len(showtimes) / cached:>10.0f} values/s  ({legacy / cached:.1f}x)")
+
+    client = app.test_client()
+    login = client.post('/auth/login', json={"email": "admin@moviebooking.com", "password": "admin123"})
+    headers = {"Authorization": f"Bearer {login.get_json()['token']}"}
+
+    for name, body, mimetype in (("csv", to_csv(rows), "text/csv"),
+                                 ("ndjson", to_ndjson(rows), "application/x-ndjson")):
+        t0 = time.perf_counter()
+        resp = client.post('/movies/import', data=body, headers={**headers, "Content-Type": mimetype})
+        elapsed = time.perf_counter() - t0
+        result = resp.get_json()
+        if resp.status_code != 200:
+            print(f"{name}: HTTP {resp.status_code} {result}")
+            sys.exit(1)
+        print(f"import {name:6} {len(body) / 1e6:6.1f} MB  inserted={result['inserted']} failed={result['failed']}  "
+              f"{elapsed:.2f}s  {len(rows) / elapsed:.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
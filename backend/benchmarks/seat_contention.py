@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Contention benchmark for the seat inventory (seats.py).
+
+Many concurrent users race to hold and confirm seats on ONE show. Every
+successful hold/confirm is recorded client-side; at the end the script
+checks that no seat was ever granted to two users and that the
+show_seats table agrees with what the clients were told.
+
+Run this: py benchmarks/seat_contention.py --users 200 --attempts 20
+(uses a throwaway SQLite database unless --mysql is given)
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+
+from common import backend_path, use_temp_sqlite
+
+backend_path()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200, help="concurrent client threads")
+    parser.add_argument("--attempts", type=int, default=20, help="hold attempts per user")
+    parser.add_argument("--max-seats", type=int, default=4, help="seats per hold attempt (1..N)")
+    parser.add_argument("--confirm-ratio", type=float, default=0.3, help="share of holds that are confirmed")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mysql", action="store_true", help="use the configured MySQL database")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not args.mysql:
+        use_temp_sqlite("seat-bench-")
+
+    from db import get_db, OperationalError
+    from seats import ROW_LABELS, SEATS_PER_ROW, SeatConflict, confirm_seats, hold_seats, release_seats
+
+    movie_id = 1
+    all_seats = [f"{r}{n}" for r in ROW_LABELS for n in range(1, SEATS_PER_ROW + 1)]
+
+    conn = get_db()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM show_seats WHERE movie_id=%s", (movie_id,))
+    conn.commit()
+    cur.close()
+    conn.close()
+
+    lock = threading.Lock()
+    granted = {}         # seat -> user currently granted (held or booked)
+    violations = []
+    counts = {"holds": 0, "conflicts": 0, "confirms": 0, "releases": 0, "busy": 0}
+    latencies = []
+    start_gate = threading.Barrier(args.users)
+
+    def record(kind, n=1):
+        with lock:
+            counts[kind] += n
+
+    def user_loop(user_id):
+        rnd = random.Random(args.seed * 100003 + user_id)
+        start_gate.wait()
+        for _ in range(args.attempts):
+            seats = rnd.sample(all_seats, rnd.randint(1, args.max_seats))
+            conn = get_db()
+            cur = conn.cursor()
+            t0 = time.perf_counter()
+            try:
+                hold_seats(cur, movie_id, user_id, seats)
+                confirm = rnd.random() < args.confirm_ratio
+                if confirm:
+                    confirm_seats(cur, movie_id, user_id, seats, booking_id=user_id)
+                conn.commit()
+                with lock:
+                    for s in seats:
+                        owner = granted.get(s)
+                        if owner is not None and owner != user_id:
+                            violations.append((s, owner, user_id))
+                        granted[s] = user_id
+                    counts["confirms" if confirm else "holds"] += 1
+                if not confirm and rnd.random() < 0.7:
+                    # Most carts are abandoned or emptied again
+                    with lock:
+                        for s in seats:
+                            granted.pop(s, None)
+                    release_seats(cur, movie_id, user_id, seats)
+                    conn.commit()
+                    record("releases")
+            except SeatConflict:
+                conn.rollback()
+                record("conflicts")
+            except OperationalError:
+                conn.rollback()
+                record("busy")
+            finally:
+                with lock:
+                    latencies.append(time.perf_counter() - t0)
+                cur.close()
+                conn.close()
+
+    threads = [threading.Thread(target=user_loop, args=(i + 1,)) for i in range(args.users)]
+    t_start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t_start
+
+    conn = get_db()
+    cur = conn.cursor()
+    cur.execute("SELECT seat_id, user_id FROM show_seats WHERE movie_id=%s", (movie_id,))
+    db_rows = dict(cur.fetchall())
+    cur.close()
+    conn.close()
+
+    mismatches = {s: (db_rows.get(s), u) for s, u in granted.items() if db_rows.get(s) != u}
+    mismatches.update({s: (u, None) for s, u in db_rows.items() if s not in granted})
+    latencies.sort()
+    ops = len(latencies)
+
+    def pct(p):
+        return latencies[min(ops - 1, int(p * ops))] * 1000 if ops else 0.0
+
+    print(f"users={args.users} attempts/user={args.attempts} elapsed={elapsed:.2f}s")
+    print(f"throughput: {ops / elapsed:.0f} ops/s  (p50 {pct(0.5):.2f} ms, p95 {pct(0.95):.2f} ms, p99 {pct(0.99):.2f} ms)")
+    print("outcomes:", counts)
+    print(f"seats taken at end: {len(db_rows)}/{len(all_seats)}")
+    print(f"double grants: {len(violations)}  table/client mismatches: {len(mismatches)}")
+    if violations or mismatches:
+        print("FAILED: seat inventory granted a seat to two users")
+        sys.exit(1)
+    print("OK: no seat was ever granted to two users")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+In-process read-through caches.
+
+catalog_cache holds the serialized JSON bodies of GET /movies and
+GET /genres, and GET /home's combination of the two. Admin writes
+invalidate the affected keys locally and bump a version row in
+`cache_versions`; other worker processes poll that row (at most every
+`version_check_interval` seconds) and drop their copies when it changes.
+Checkouts and reviews only change seat counts and ratings, so they drop
+this worker's entries without a bump; entries expire after `max_age`
+seconds, which bounds how long other workers show the old numbers.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from config import CACHE_CONFIG
+from db import get_db, table_columns
+from forking import on_fork
+
+log = logging.getLogger(__name__)
+
+VERSION_SQL = "SELECT version FROM cache_versions WHERE name=%s"
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with hit/miss/eviction counters; entries expire after max_age seconds."""
+
+    def __init__(self, maxsize=128, max_age=None):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bumped on every removal so a fill computed before an invalidation
+        # (see set(..., generation=...)) cannot resurrect stale data
+        self.generation = 0
+        on_fork(self._after_fork)
+
+    def _after_fork(self):
+        # A pre-fork server child starts empty; the parent's lock may have been held mid-fork
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self.generation += 1
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value, expires = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            if expires is not None and time.monotonic() >= expires:
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, generation=None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            expires = time.monotonic() + self.max_age if self.max_age else None
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self.generation += 1
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            self.generation += 1
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "max_age": self.max_age,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+class VersionedCache(LRUCache):
+    """LRU cache whose contents are dropped when a shared version row changes."""
+
+    def __init__(self, name, maxsize=128, version_check_interval=1.0, derived=(), max_age=None):
+        super().__init__(maxsize, max_age)
+        self.name = name
+        self.derived = tuple(derived)  # keys built from other entries; dropped on every invalidation
+        self.version_check_interval = version_check_interval
+        self._version = None
+        self._checked_at = 0.0
+        self.version_reloads = 0
+        self._has_table = None  # whether cache_versions exists; looked up once
+
+    def _after_fork(self):
+        super()._after_fork()
+        self._version = None
+        self._checked_at = 0.0
+
+    def reset(self):
+        """Drop every entry and forget the last seen version, so the next get() reads it again."""
+        self.clear()
+        self._version = None
+        self._checked_at = 0.0
+
+    def get(self, key):
+        self._sync_version()
+        return super().get(key)
+
+    def get_local(self, key):
+        """get() without the version check; for callers that run it themselves (asgi.py)."""
+        return super().get(key)
+
+    def version_check_due(self):
+        """True at most once per version_check_interval; the caller then reads VERSION_SQL."""
+        now = time.monotonic()
+        if now - self._checked_at < self.version_check_interval:
+            return False
+        self._checked_at = now
+        return True
+
+    def _sync_version(self):
+        if not self.version_check_due():
+            return
+        try:
+            conn = get_db()
+            cursor = conn.cursor()
+            try:
+                cursor.execute(VERSION_SQL, (self.name,))
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+                conn.close()
+        except Exception as e:
+            # Without the table we can only see this process's own invalidations
+            log.warning("cache version check for %s failed: %s", self.name, e)
+            return
+        self.apply_version(row[0] if row else 0)
+
+    def apply_version(self, version):
+        """Drop local entries if the shared version moved since the last check."""
+        if self._version is not None and version != self._version:
+            self.clear()
+            self.version_reloads += 1
+        self._version = version
+
+    def _versioned(self, cursor):
+        """Whether the cache_versions table exists; checked on the first bump only."""
+        if self._has_table is None:
+            self._has_table = bool(table_columns(cursor, "cache_versions"))
+            if not self._has_table:
+                log.warning("cache_versions table missing (run migrations.py); "
+                            "other workers will not see %s invalidations", self.name)
+        return self._has_table
+
+    def bump_version(self, cursor):
+        """
+        Record a change for other workers inside the writing transaction; returns the new version.
+
+        Errors propagate, so a deadlock or lock timeout fails (or retries) the
+        caller's transaction instead of committing a write nobody is told about.
+        Only a database without the table gets None.
+        """
+        if not self._versioned(cursor):
+            return None
+        cursor.execute("UPDATE cache_versions SET version=version+1 WHERE name=%s", (self.name,))
+        if cursor.rowcount == 0:
+            cursor.execute("INSERT INTO cache_versions (name, version) VALUES (%s, 1)", (self.name,))
+        cursor.execute("SELECT version FROM cache_versions WHERE name=%s", (self.name,))
+        return cursor.fetchone()[0]
+
+    def invalidate(self, *keys, prefixes=(), version=None):
+        """Drop local entries after a committed write that bumped to `version`."""
+        if version is not None and self._version is not None and version != self._version + 1:
+            # Another worker changed the catalog since our last check
+            self.clear()
+            self.version_reloads += 1
+        else:
+            for key in keys:
+                self.delete(key)
+            for prefix in prefixes:
+                self.delete_prefix(prefix)
+            for key in self.derived:
+                self.delete(key)
+        if version is not None:
+            self._version = version
+
+    def stats(self):
+        stats = super().stats()
+        stats["version"] = self._version
+        stats["version_reloads"] = self.version_reloads
+        return stats
+
+
+# GET /home's shared part: the full movie listing and the genres
+HOME_KEY = "home"
+
+catalog_cache = VersionedCache(
+    "catalog",
+    maxsize=CACHE_CONFIG["catalog_maxsize"],
+    version_check_interval=CACHE_CONFIG["version_check_interval"],
+    derived=(HOME_KEY,),
+    max_age=CACHE_CONFIG["catalog_max_age"],
+)
+
+
+def movies_key(genre_id=None):
+    genre_id = str(genre_id).strip() if genre_id else ''
+    if genre_id.isdigit():
+        genre_id = str(int(genre_id))
+    return f"movies:{genre_id}"
+
+
+GENRES_KEY = "genres"
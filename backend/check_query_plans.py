@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Check that the hot-path queries are served by their indexes.
+
+Runs EXPLAIN (MySQL) / EXPLAIN QUERY PLAN (SQLite) for each query below
+and fails if the driving table is scanned in full or none of the expected
+indexes is used. Meant for CI after `py migrations.py`; exits 1 on
+failure.
+
+MySQL may still prefer a table scan on near-empty tables, so run it
+against a database with representative data.
+
+Run this: py check_query_plans.py
+"""
+
+import sys
+
+from archive import FINISHED_BOOKINGS_SQL, PAST_MOVIES_SQL
+from db import get_db, is_sqlite, seconds_ago
+
+# (name, sql, params, table alias, acceptable indexes)
+PLAN_CHECKS = [
+    (
+        "GET /watchlist/<user_id>",
+        "SELECT w.watchlist_id, w.movie_id, w.seats_selected, w.selected_seats, m.title, m.price "
+        "FROM watchlist w JOIN movies m ON w.movie_id=m.movie_id WHERE w.user_id=%s",
+        (1,), "w", ["idx_watchlist_user_movie"],
+    ),
+    (
+        "GET /home (watchlist count)",
+        "SELECT COUNT(*) FROM watchlist WHERE user_id=%s",
+        (1,), "watchlist", ["idx_watchlist_user_movie"],
+    ),
+    (
+        "POST /watchlist (existing row lookup)",
+        "SELECT watchlist_id, seats_selected, selected_seats FROM watchlist WHERE user_id=%s AND movie_id=%s",
+        (1, 1), "watchlist", ["idx_watchlist_user_movie"],
+    ),
+    (
+        "GET /bookings/user/<user_id>",
+        "SELECT b.booking_id, b.booking_date, b.status FROM bookings b "
+        "WHERE b.user_id=%s ORDER BY b.booking_date DESC, b.booking_id DESC",
+        (1,), "b", ["idx_bookings_user_date"],
+    ),
+    (
+        "GET /bookings/all (keyset page)",
+        "SELECT b.booking_id, b.booking_date FROM bookings b "
+        "WHERE (b.booking_date < %s OR (b.booking_date = %s AND b.booking_id < %s)) "
+        "ORDER BY b.booking_date DESC, b.booking_id DESC LIMIT 51",
+        ("2030-01-01 00:00:00", "2030-01-01 00:00:00", 1000000), "b", ["idx_bookings_date"],
+    ),
+    (
+        "booking items by booking",
+        "SELECT bi.booking_id, bi.booking_item_id, bi.movie_id, bi.seats_booked, bi.price "
+        "FROM booking_items bi WHERE bi.booking_id IN (%s, %s)",
+        (1, 2), "bi", ["idx_booking_items_booking"],
+    ),
+    (
+        "GET /reviews/<movie_id>",
+        "SELECT r.review_id, r.rating, r.comment, r.review_date FROM reviews r WHERE r.movie_id=%s "
+        "ORDER BY r.review_date DESC, r.review_id DESC LIMIT 51",
+        (1,), "r", ["idx_reviews_movie_date"],
+    ),
+    (
+        "GET /movies?genre_id=",
+        "SELECT m.movie_id, m.title FROM movies m WHERE m.genre_id=%s",
+        (1,), "m", ["idx_movies_genre"],
+    ),
+    (
+        "POST /auth/login",
+        "SELECT user_id, is_admin FROM users WHERE email=%s AND password=%s",
+        # The UNIQUE(email) index is an equally good single-row lookup
+        ("admin@moviebooking.com", "admin123"), "users",
+        ["idx_users_email_password", "email", "sqlite_autoindex_users_1"],
+    ),
+    (
+        "watchlist reaper batch",
+        f"SELECT watchlist_id, user_id, movie_id FROM watchlist WHERE added_at < {seconds_ago()} "
+        "ORDER BY added_at, watchlist_id LIMIT %s",
+        (3600, 200), "watchlist", ["idx_watchlist_added"],
+    ),
+    (
+        "archiver: finished bookings",
+        FINISHED_BOOKINGS_SQL,
+        ("2025-01-01 00:00:00", "2025-01-01 00:00:00", 200), "b", ["idx_bookings_date"],
+    ),
+    (
+        "archiver: past movies",
+        PAST_MOVIES_SQL,
+        ("2025-01-01 00:00:00", 200), "m", ["idx_movies_showtime"],
+    ),
+]
+
+
+def _sqlite_plan(cursor, sql, params, alias, indexes):
+    cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+    details = [r[3] for r in cursor.fetchall()]
+    for detail in details:
+        words = detail.split()
+        if words[:2] == ["SCAN", alias] and "INDEX" not in words:
+            return False, details
+    used = any(f"INDEX {name}" in d for d in details for name in indexes)
+    return used, details
+
+
+def _mysql_plan(cursor, sql, params, alias, indexes):
+    cursor.execute("EXPLAIN " + sql, params)
+    cols = [c[0] for c in cursor.description]
+    rows = [dict(zip(cols, r)) for r in cursor.fetchall()]
+    details = [f"{r['table']}: type={r['type']} key={r['key']} rows={r['rows']}" for r in rows]
+    for r in rows:
+        if r["table"] == alias:
+            return r["type"] != "ALL" and r["key"] in indexes, details
+    return False, details
+
+
+def check_plans():
+    """Return [(name, ok, plan details)] for every entry in PLAN_CHECKS."""
+    explain = _sqlite_plan if is_sqlite() else _mysql_plan
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        return [(name, *explain(cursor, sql, params, alias, indexes))
+                for name, sql, params, alias, indexes in PLAN_CHECKS]
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    failed = 0
+    for name, ok, details in check_plans():
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+        if not ok:
+            failed += 1
+            for detail in details:
+                print(f"       {detail}")
+    sys.exit(1 if failed else 0)
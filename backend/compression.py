@@ -0,0 +1,119 @@
+"""
+gzip / brotli compression of API responses.
+
+init_app() adds an after_request hook that compresses a response when:
+- the client accepts the encoding;
+- the body is JSON or text of at least `min_size` bytes;
+- nothing encoded it already.
+
+Streamed responses (?stream=1 exports) are compressed chunk by chunk,
+whatever their size.
+
+brotli is used when the client accepts it and the `brotli` package is
+installed, else gzip. The catalog bodies (GET /movies/, /genres/, /home)
+are the same bytes object until the next invalidation, so recent
+compressed results are kept in a small LRU keyed by encoding and body.
+A cached listing then costs a dict lookup instead of a compression pass.
+"""
+
+import gzip
+import zlib
+
+from flask import request
+
+from cache import LRUCache
+from config import COMPRESS_CONFIG
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESSIBLE = ("application/json", "text/")
+
+_compressed = LRUCache(COMPRESS_CONFIG["cache_entries"])
+
+
+def enabled():
+    return COMPRESS_CONFIG["enabled"]
+
+
+def choose_encoding(accept_encoding):
+    """"br", "gzip" or None for an Accept-Encoding header value."""
+    accepted = set()
+    for part in (accept_encoding or "").lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body, encoding):
+    """body (bytes) encoded with `encoding`, reusing a recent result for the same bytes."""
+    key = (encoding, body)
+    data = _compressed.get(key)
+    if data is None:
+        if encoding == "br":
+            data = brotli.compress(body, quality=COMPRESS_CONFIG["brotli_quality"])
+        else:
+            data = gzip.compress(body, compresslevel=COMPRESS_CONFIG["gzip_level"], mtime=0)
+        _compressed.set(key, data)
+    return data
+
+
+def compress_stream(chunks, encoding):
+    """Incrementally encode an iterable of byte chunks; closes it when done or abandoned."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=COMPRESS_CONFIG["brotli_quality"])
+        step, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(COMPRESS_CONFIG["gzip_level"], zlib.DEFLATED, 31)  # 31: gzip framing
+        step, finish = compressor.compress, compressor.flush
+    try:
+        for chunk in chunks:
+            data = step(chunk.encode() if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield finish()
+    finally:
+        # The wrapped generator releases its DB connection in its own finally
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def _compress_response(response):
+    if (response.direct_passthrough
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers
+            or not (response.mimetype or "").startswith(COMPRESSIBLE)):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+    if encoding is None:
+        return response
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+        response.headers["Content-Encoding"] = encoding
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_CONFIG["min_size"]:
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def stats():
+    return {**_compressed.stats(), "brotli": brotli is not None}
+
+
+def init_app(app):
+    if enabled():
+        app.after_request(_compress_response)
@@ -1,3 +1,8 @@
+import os
+
+# Database backend used by db.get_db(): "mysql" or "sqlite"
+DB_BACKEND = os.environ.get("DB_BACKEND", "mysql")
+
 # MySQL configuration
 DB_CONFIG = {
     "host": "localhost",
@@ -5,3 +10,141 @@ DB_CONFIG = {
     "password": "Bablu@123",
     "database": "movie_booking_db"
 }
+
+# SQLite configuration (embedded mode, benchmarks and CI)
+SQLITE_CONFIG = {
+    "path": os.environ.get(
+        "SQLITE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "movie_booking.db")
+    ),
+    "journal_mode": "WAL",     # readers never block the writer
+    "synchronous": "NORMAL",   # safe with WAL, avoids an fsync per commit
+    "cache_size": -65536,      # page cache in KiB when negative (64 MB)
+    "mmap_size": 268435456,    # memory-map up to 256 MB of the database file
+    "busy_timeout": 5000,      # ms to wait for the write lock before failing
+}
+
+# Connection pool used by db.get_db() for MySQL
+POOL_CONFIG = {
+    "size": 10,            # connections kept open while idle
+    "max_overflow": 10,    # extra connections allowed under load
+    "timeout": 30,         # seconds to wait for a free connection
+    "recycle": 3600,       # reconnect connections older than this (seconds)
+    "pre_ping": True,      # check liveness when borrowing an idle connection
+    "ping_after": 5,       # only ping connections idle longer than this (seconds)
+}
+
+# Session tokens issued by /auth/login and checked by auth.admin_required
+AUTH_CONFIG = {
+    "secret_key": os.environ.get("SECRET_KEY"),  # required by gunicorn.conf.py; random per process otherwise
+    "token_ttl": 8 * 3600,  # seconds a token stays valid
+    "cache_size": 1024,     # verified tokens kept in memory
+    "cache_ttl": 10,        # seconds before a cached token is re-checked against the users table
+}
+
+# In-process read-through caches (see cache.py)
+CACHE_CONFIG = {
+    "catalog_maxsize": 256,          # cached /movies and /genres responses
+    "version_check_interval": 1.0,   # seconds between cross-worker version checks
+    "catalog_max_age": 30.0,         # seconds; other workers' seat counts/ratings are at most this old
+}
+
+# Seat inventory (see seats.py); matches the grid in SeatSelection.js
+SEAT_CONFIG = {
+    "rows": 10,            # rows A..J
+    "seats_per_row": 15,
+    "hold_ttl": 900,       # seconds a seat stays held in a watchlist before it can be reclaimed
+    "map_refresh_interval": 2.0,  # seconds before a seat map is re-read to see other workers' changes
+}
+
+# Streaming JSON listings (see streaming.py)
+STREAM_CONFIG = {
+    "batch_size": 500,         # rows fetched per fetchmany() round
+    "chunk_bytes": 64 * 1024,  # flush the response after this many bytes
+}
+
+# Bulk movie import (see importer.py)
+IMPORT_CONFIG = {
+    "batch_size": 500,     # rows per executemany() round
+    "max_errors": 1000,    # per-row errors reported back; the rest are only counted
+}
+
+# Prometheus-format metrics at GET /metrics (see metrics.py)
+METRICS_CONFIG = {
+    "enabled": os.environ.get("METRICS_ENABLED", "1") not in ("0", "false", "no"),
+    "allow_remote": os.environ.get("METRICS_ALLOW_REMOTE", "0") in ("1", "true", "yes"),  # else loopback only
+}
+
+# Per-statement totals and slow-query log at GET /admin/queries (see slowlog.py)
+SLOW_QUERY_CONFIG = {
+    "enabled": os.environ.get("SLOW_QUERY_LOG", "1") not in ("0", "false", "no"),
+    "threshold_ms": float(os.environ.get("SLOW_QUERY_MS", "100")),  # log statements slower than this
+    "explain_samples": 3,    # slow occurrences per normalised statement that get an EXPLAIN
+    "max_statements": 1000,  # distinct statements tracked; the rest share one "(other)" entry
+    "recent": 200,           # slow statements kept for GET /admin/queries/slow
+}
+
+# Async serving mode, `uvicorn asgi:app` (see asgi.py, aiodb.py); MySQL pool sizes come from POOL_CONFIG
+ASYNC_CONFIG = {
+    "sqlite_connections": int(os.environ.get("ASYNC_SQLITE_CONNECTIONS", "8")),  # aiosqlite connections, a thread each
+    "wsgi_threads": 16,        # threads for the routes still served by the sync Flask views
+}
+
+# Production server, `gunicorn -c gunicorn.conf.py` (see gunicorn.conf.py)
+SERVER_CONFIG = {
+    "bind": os.environ.get("BIND", "0.0.0.0:" + os.environ.get("PORT", "5000")),
+    "workers": int(os.environ.get("WEB_CONCURRENCY", "0")),  # 0 = one per CPU core
+    "threads": int(os.environ.get("WEB_THREADS", "4")),      # per worker; 1 = sync worker
+    "max_requests": 10000,     # recycle a worker after this many requests...
+    "max_requests_jitter": 1000,  # ...plus a random 0..jitter so workers don't restart together
+    "timeout": 30,             # seconds before a stuck worker is killed and replaced
+    "graceful_timeout": 30,    # seconds to finish in-flight requests on reload/shutdown
+    "keepalive": 5,            # seconds to hold idle keep-alive connections (gthread)
+    "preload": os.environ.get("WEB_PRELOAD", "0") in ("1", "true", "yes"),  # import the app before forking
+}
+
+# Periodic maintenance jobs, one scheduler thread per worker (see scheduler.py)
+SCHEDULER_CONFIG = {
+    "enabled": os.environ.get("SCHEDULER_ENABLED", "1") not in ("0", "false", "no"),
+    "tick": 5.0,   # seconds between checks for due jobs
+}
+
+# Abandoned watchlist reaper (see reaper.py)
+REAPER_CONFIG = {
+    "interval": 60,        # seconds between runs
+    "watchlist_ttl": int(os.environ.get("WATCHLIST_TTL", "3600")),  # carts untouched this long are removed
+    "batch_size": 200,     # rows per delete transaction
+    "max_batches": 50,     # per run; anything left waits for the next run
+}
+
+# Archival of past showtimes and finished bookings (see archive.py)
+ARCHIVE_CONFIG = {
+    "enabled": os.environ.get("ARCHIVE_ENABLED", "0") in ("1", "true", "yes"),  # run from the scheduler
+    "interval": 3600,      # seconds between runs
+    "after_days": int(os.environ.get("ARCHIVE_AFTER_DAYS", "90")),  # shows this far in the past are archived
+    "batch_size": 200,     # bookings or movies per transaction
+    "max_batches": 50,     # per table per run; anything left waits for the next run
+}
+
+# Idempotency-Key handling for POST /bookings and POST /payments (see idempotency.py)
+IDEMPOTENCY_CONFIG = {
+    "max_entries": 10000,  # completed responses kept in memory per worker
+    "ttl": 86400,          # seconds a key is remembered
+    "wait_timeout": 30.0,  # seconds a duplicate waits for the first request before answering 409
+    "lock_timeout": 60,    # seconds after which an unfinished claim (crashed worker) may be taken over
+    "poll_interval": 0.05, # seconds between checks on a claim held by another worker
+    "max_key_length": 128,
+}
+
+# POST /batch (see models/batch.py)
+BATCH_CONFIG = {
+    "max_requests": int(os.environ.get("BATCH_MAX_REQUESTS", "50")),  # sub-requests per batch
+}
+
+# gzip/brotli response compression (see compression.py)
+COMPRESS_CONFIG = {
+    "enabled": os.environ.get("COMPRESS_ENABLED", "1") not in ("0", "false", "no"),  # off behind a compressing proxy
+    "min_size": int(os.environ.get("COMPRESS_MIN_SIZE", "1024")),  # bytes; smaller bodies are sent as is
+    "gzip_level": 5,
+    "brotli_quality": 4,   # brotli is used only when the package is installed
+    "cache_entries": 32,   # compressed bodies kept for repeated (cached) responses
+}
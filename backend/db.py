@@ -1,12 +1,531 @@
-import mysql.connector
-from config import DB_CONFIG
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
 
-def get_db():
-    conn = mysql.connector.connect(
+import metrics
+import slowlog
+from config import DB_BACKEND, DB_CONFIG, POOL_CONFIG, SQLITE_CONFIG
+from pool import ConnectionPool
+
+try:
+    import mysql.connector
+except ImportError:  # SQLite-only deployments don't need the MySQL driver
+    mysql = None
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Driver-neutral exception types for `except` clauses in the blueprints
+if mysql is not None:
+    IntegrityError = (sqlite3.IntegrityError, mysql.connector.IntegrityError)
+    OperationalError = (sqlite3.OperationalError, mysql.connector.OperationalError)
+else:
+    IntegrityError = (sqlite3.IntegrityError,)
+    OperationalError = (sqlite3.OperationalError,)
+
+
+def dialect():
+    """Name of the configured backend: "mysql" or "sqlite"."""
+    return DB_BACKEND
+
+
+def is_sqlite():
+    return DB_BACKEND == "sqlite"
+
+
+# ---------------------------------------------------------------------------
+# MySQL: pooled connections
+# ---------------------------------------------------------------------------
+
+def _connect():
+    return mysql.connector.connect(
         host=DB_CONFIG["host"],
         user=DB_CONFIG["user"],
         password=DB_CONFIG["password"],
         database=DB_CONFIG["database"],
         autocommit=False
     )
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(_connect, **POOL_CONFIG)
+    return _pool
+
+
+# ---------------------------------------------------------------------------
+# SQLite: one long-lived connection per thread
+# ---------------------------------------------------------------------------
+
+_local = threading.local()
+_sqlite_lock = threading.Lock()
+_sqlite_opened = 0
+_placeholder_cache = {}
+
+
+def to_qmark(sql):
+    """Translate the blueprints' %s placeholders to SQLite's ? style."""
+    converted = _placeholder_cache.get(sql)
+    if converted is None:
+        converted = sql.replace('%s', '?')
+        if len(_placeholder_cache) < 2048:
+            _placeholder_cache[sql] = converted
+    return converted
+
+
+def sqlite_pragmas():
+    """Per-connection tuning from SQLITE_CONFIG, shared with the async driver (aiodb.py)."""
+    cfg = SQLITE_CONFIG
+    return [
+        f"PRAGMA journal_mode={cfg['journal_mode']}",
+        f"PRAGMA synchronous={cfg['synchronous']}",
+        f"PRAGMA cache_size={int(cfg['cache_size'])}",
+        f"PRAGMA mmap_size={int(cfg['mmap_size'])}",
+        f"PRAGMA busy_timeout={int(cfg['busy_timeout'])}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def sqlite_connect(path=None):
+    """Open a tuned SQLite connection (WAL, relaxed fsync, large cache, mmap)."""
+    global _sqlite_opened
+    cfg = SQLITE_CONFIG
+    conn = sqlite3.connect(
+        path or cfg["path"],
+        timeout=cfg["busy_timeout"] / 1000.0,
+        isolation_level="IMMEDIATE",
+        check_same_thread=False,
+    )
+    for pragma in sqlite_pragmas():
+        conn.execute(pragma)
+    with _sqlite_lock:
+        _sqlite_opened += 1
     return conn
+
+
+class SQLiteCursor:
+    """Cursor wrapper accepting MySQL-style %s placeholders."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(to_qmark(sql), tuple(params) if params else ())
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(to_qmark(sql), seq_of_params)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class SQLiteConnection:
+    """Per-thread SQLite connection; close() only ends the current transaction."""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def cursor(self, *args, **kwargs):
+        # MySQL cursor options (buffered, dictionary, ...) have no SQLite equivalent
+        return SQLiteCursor(self.raw.cursor())
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    @property
+    def in_transaction(self):
+        return self.raw.in_transaction
+
+    def close(self):
+        if self.raw.in_transaction:
+            self.raw.rollback()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def _sqlite_thread_connection():
+    raw = getattr(_local, 'conn', None)
+    if raw is None or getattr(_local, 'pid', None) != os.getpid():
+        raw = sqlite_connect()
+        _local.conn = raw
+        _local.pid = os.getpid()
+    return SQLiteConnection(raw)
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation: per-statement latency and row counts (see metrics.py, slowlog.py)
+# ---------------------------------------------------------------------------
+
+_STATEMENT_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN|TABLE)\s+`?(\w+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=2048)
+def statement_kind(sql):
+    """(operation, main table) of a statement, e.g. ("SELECT", "movies"); used as metric labels."""
+    words = sql.lstrip(" \t\r\n(").split(None, 1)
+    operation = words[0].upper() if words else "?"
+    match = _STATEMENT_TABLE.search(sql)
+    return operation, (match.group(1).lower() if match else "-")
+
+
+class TimedCursor:
+    """Cursor proxy recording each statement's latency and the rows it returned or changed."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._last = None   # (sql, params, seconds, many, endpoint) until its rows are counted
+        self._rows = 0
+
+    def _flush_rows(self):
+        if self._last is None:
+            return
+        sql, params, seconds, many, endpoint = self._last
+        self._last = None
+        operation, table = statement_kind(sql)
+        rows = self._rows if operation == "SELECT" else max(self._cursor.rowcount, 0)
+        if metrics.enabled():
+            metrics.QUERY_ROWS.observe(rows, operation, table)
+        if slowlog.enabled():
+            slowlog.QUERY_LOG.record(sql, params, seconds, rows, operation, table, endpoint, many)
+
+    def _timed(self, method, sql, params, many=False):
+        self._flush_rows()
+        endpoint = metrics.current_endpoint()
+        start = time.perf_counter()
+        try:
+            result = method(sql, params)
+        except Exception:
+            metrics.QUERY_ERRORS.inc(*statement_kind(sql))
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if metrics.enabled():
+                operation, table = statement_kind(sql)
+                metrics.QUERY_SECONDS.observe(elapsed, operation, table, endpoint)
+            metrics.add_request_db_time(elapsed)
+        self._last, self._rows = (sql, params, elapsed, many, endpoint), 0
+        return result
+
+    def execute(self, sql, params=()):
+        return self._timed(self._cursor.execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self._timed(self._cursor.executemany, sql, seq_of_params, many=True)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._rows += len(rows)
+        return rows
+
+    def close(self):
+        self._flush_rows()
+        return self._cursor.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TimedConnection:
+    """Connection proxy handing out TimedCursors; everything else goes to the wrapped connection."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._cursors = []
+
+    def cursor(self, *args, **kwargs):
+        cursor = TimedCursor(self._conn.cursor(*args, **kwargs))
+        self._cursors.append(cursor)
+        return cursor
+
+    def close(self):
+        # Count rows for cursors the caller never closed
+        for cursor in self._cursors:
+            cursor._flush_rows()
+        self._cursors = []
+        return self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def get_db():
+    """Borrow a connection for the configured backend; conn.close() releases it."""
+    shared = getattr(_local, 'shared', None)
+    if shared is not None:
+        return shared
+    if not (metrics.enabled() or slowlog.enabled()):
+        return _sqlite_thread_connection() if DB_BACKEND == "sqlite" else get_pool().acquire()
+    start = time.perf_counter()
+    conn = _sqlite_thread_connection() if DB_BACKEND == "sqlite" else get_pool().acquire()
+    if metrics.enabled():
+        metrics.ACQUIRE_SECONDS.observe(time.perf_counter() - start, DB_BACKEND)
+    return TimedConnection(conn)
+
+
+@contextmanager
+def db_connection():
+    conn = get_db()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+class SharedConnection:
+    """
+    The connection every get_db() returns inside shared_connection().
+
+    close() only ends the caller's turn. In a transaction, commit() waits
+    for the end of the block and rollback() undoes the work since the last
+    savepoint(), so one failed step does not discard the steps before it.
+    """
+
+    def __init__(self, conn, transaction):
+        self._conn = conn
+        self.transaction = transaction
+        self.rollback_only = False   # set to roll the whole block back at the end
+        self.discard = False         # a stream was abandoned mid-result; don't reuse the connection
+        self._savepoints = 0
+
+    def cursor(self, *args, **kwargs):
+        return self._conn.cursor(*args, **kwargs)
+
+    def savepoint(self):
+        """Mark where the next rollback() returns to."""
+        self._savepoints += 1
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute(f"SAVEPOINT step{self._savepoints}")
+        finally:
+            cursor.close()
+
+    def commit(self):
+        if not self.transaction:
+            self._conn.commit()
+
+    def rollback(self):
+        if not (self.transaction and self._savepoints):
+            self._conn.rollback()
+            return
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT step{self._savepoints}")
+        except Exception:
+            # The server already ended the transaction (e.g. a MySQL deadlock victim)
+            self._conn.rollback()
+            self.rollback_only = True
+        finally:
+            cursor.close()
+
+    def close(self):
+        if not self.transaction and getattr(self._conn, 'in_transaction', True):
+            # What returning a pooled connection would do: end the caller's open transaction
+            self._conn.rollback()
+
+    def invalidate(self):
+        self.discard = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+@contextmanager
+def shared_connection(transaction=False):
+    """
+    Hand one connection to every get_db() on this thread for the block.
+
+    With transaction=True the block's writes commit together when it ends,
+    and roll back if it raises or sets rollback_only.
+    """
+    if getattr(_local, 'shared', None) is not None:
+        raise RuntimeError("shared_connection() blocks do not nest")
+    conn = get_db()
+    shared = SharedConnection(conn, transaction)
+    _local.shared = shared
+    try:
+        if transaction:
+            begin(conn)
+        yield shared
+        if transaction:
+            if shared.rollback_only:
+                conn.rollback()
+            else:
+                conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        _local.shared = None
+        if shared.discard and hasattr(conn, 'invalidate'):
+            conn.invalidate()
+        else:
+            conn.close()
+
+
+def pool_stats():
+    if DB_BACKEND == "sqlite":
+        return {"backend": "sqlite", "opened": _sqlite_opened, "path": SQLITE_CONFIG["path"]}
+    stats = get_pool().stats()
+    stats["backend"] = "mysql"
+    return stats
+
+
+def dispose_pool():
+    if _pool is not None:
+        _pool.dispose()
+
+
+# MySQL ER_LOCK_DEADLOCK / ER_LOCK_WAIT_TIMEOUT
+_RETRYABLE_MYSQL_ERRNOS = (1213, 1205)
+
+
+def is_retryable(exc):
+    """True for deadlocks / lock timeouts where re-running the transaction may succeed."""
+    if isinstance(exc, sqlite3.OperationalError):
+        return "locked" in str(exc) or "busy" in str(exc)
+    return getattr(exc, 'errno', None) in _RETRYABLE_MYSQL_ERRNOS
+
+
+def begin(conn):
+    """Start a write transaction up front (SQLite takes the write lock immediately)."""
+    if DB_BACKEND == "sqlite" and not conn.in_transaction:
+        conn.raw.execute("BEGIN IMMEDIATE")
+    # MySQL (autocommit off) opens the transaction on the first statement
+
+
+def for_update():
+    """Row-locking suffix for SELECTs inside a write transaction."""
+    return "" if DB_BACKEND == "sqlite" else " FOR UPDATE"
+
+
+def seconds_ago():
+    """SQL for "now minus %s seconds", comparable with TIMESTAMP DEFAULT CURRENT_TIMESTAMP columns."""
+    if DB_BACKEND == "sqlite":
+        return "datetime('now', '-' || %s || ' seconds')"
+    return "(CURRENT_TIMESTAMP - INTERVAL %s SECOND)"
+
+
+def on_conflict_update(key_columns, assignments):
+    """
+    Suffix turning an INSERT that hits `key_columns` into an UPDATE.
+
+    Unqualified columns in `assignments` refer to the existing row on both
+    backends, e.g. "hits = hits + 1".
+    """
+    if DB_BACKEND == "sqlite":
+        return f" ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {assignments}"
+    return f" ON DUPLICATE KEY UPDATE {assignments}"
+
+
+def run_transaction(fn, attempts=3):
+    """
+    Run fn(cursor) in one transaction on a fresh connection and commit.
+
+    Deadlocks and lock timeouts roll back and retry with jittered backoff;
+    any other exception rolls back and propagates.
+    """
+    for attempt in range(1, attempts + 1):
+        conn = get_db()
+        cursor = conn.cursor()
+        try:
+            begin(conn)
+            result = fn(cursor)
+            conn.commit()
+            return result
+        except Exception as e:
+            conn.rollback()
+            if attempt == attempts or not is_retryable(e):
+                raise
+        finally:
+            cursor.close()
+            conn.close()
+        time.sleep(random.uniform(0, 0.02 * 2 ** attempt))
+
+
+def row_mapper(cols):
+    """Function turning one row tuple into a {column: value} dict."""
+    cols = tuple(cols)
+
+    def to_dict(r):
+        return dict(zip(cols, r))
+    return to_dict
+
+
+def column_names(cursor):
+    return tuple(c[0] for c in cursor.description)
+
+
+def dict_from_cursor(cursor):
+    """The rest of the cursor's result set as a list of dicts."""
+    cols = column_names(cursor)
+    return [dict(zip(cols, r)) for r in cursor.fetchall()]
+
+
+def table_columns(cursor, table):
+    """Return [(name, type), ...] for a table on either backend."""
+    if DB_BACKEND == "sqlite":
+        cursor.execute(f"PRAGMA table_info({table})")
+        return [(r[1], r[2]) for r in cursor.fetchall()]
+    cursor.execute(
+        "SELECT COLUMN_NAME, COLUMN_TYPE FROM INFORMATION_SCHEMA.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION",
+        (table,)
+    )
+    return [(r[0], r[1]) for r in cursor.fetchall()]
+
+
+def column_exists(cursor, table, column):
+    return any(name == column for name, _ in table_columns(cursor, table))
@@ -0,0 +1,28 @@
+"""
+Per-process state reset in forked children.
+
+With WEB_PRELOAD=1, gunicorn.conf.py imports the app once and forks the
+workers from it, so every lock, pooled socket, cache and background
+thread a module created at import time is copied into each worker.
+Modules register a function that rebuilds that state with on_fork(); it
+runs in the child right after fork(), in registration order.
+"""
+
+import os
+
+_callbacks = []
+
+
+def on_fork(fn):
+    """Run fn() in every forked child; returns fn, so it also works as a decorator."""
+    _callbacks.append(fn)
+    return fn
+
+
+def _after_fork():
+    for fn in _callbacks:
+        fn()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
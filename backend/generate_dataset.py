@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Synthetic dataset generator for capacity testing.
+
+Bulk-loads seeded, skewed volumes of users, showtimes (movies rows),
+bookings with items and payments, reviews, and watchlist rows into the
+configured database: SQLite by default via --sqlite PATH, or the
+configured MySQL database with --mysql.
+
+- Skew: movie popularity and user activity follow a Zipf-like curve,
+  so a few blockbusters and heavy users dominate. Showtimes favour
+  evenings and weekends, and booking lead times cluster just before
+  showtime.
+- Fast paths: rows go in with executemany() batches inside large
+  transactions. The secondary (idx_*) indexes are dropped first and
+  rebuilt once loading ends. Durability knobs are relaxed for the load
+  (SQLite synchronous=OFF; MySQL unique/foreign key checks off), and
+  the tables are ANALYZEd at the end.
+
+Rows get explicit ids after the current MAX(id), so the generator can
+top up an existing database. available_seats is not reconciled with the
+generated bookings.
+
+Run this: py generate_dataset.py --scale small --sqlite /tmp/capacity.db
+          py generate_dataset.py --scale production --mysql
+          py generate_dataset.py --users 50000 --bookings 2000000 --sqlite /tmp/custom.db
+"""
+
+import argparse
+import bisect
+import itertools
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+SCALES = {
+    #              users,     shows, bookings,   reviews,  watchlist
+    "small":      (10_000,      500,    50_000,    20_000,    10_000),
+    "medium":     (200_000,   5_000, 1_000_000,   400_000,   200_000),
+    "large":      (1_000_000, 20_000, 10_000_000, 4_000_000, 2_000_000),
+    "production": (2_000_000, 30_000, 25_000_000, 10_000_000, 5_000_000),
+}
+
+GENRES = ["Action", "Comedy", "Drama", "Horror", "Sci-Fi", "Thriller", "Romance",
+          "Animation", "Documentary", "Fantasy", "Mystery", "Family"]
+TITLE_WORDS = (["Last", "Dark", "Silent", "Broken", "Golden", "Final", "Hidden", "Crimson", "Lost", "Wild"],
+               ["Dance", "Empire", "Horizon", "Signal", "Storm", "Kingdom", "Protocol", "Echo", "River", "Code"])
+PRICE_TIERS = [(149.0, 2), (199.0, 4), (249.0, 4), (299.0, 3), (349.0, 2), (449.0, 1)]
+# Relative demand per showtime hour (10:00 .. 23:00)
+HOUR_WEIGHTS = {10: 0.3, 11: 0.4, 12: 0.6, 13: 0.7, 14: 0.8, 15: 0.9, 16: 1.0, 17: 1.5,
+                18: 2.5, 19: 3.0, 20: 3.0, 21: 2.5, 22: 1.5, 23: 0.6}
+PAYMENT_METHODS = [("card", 60), ("upi", 25), ("wallet", 10), ("cash", 5)]
+
+TS = "%Y-%m-%d %H:%M:%S"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--shows", type=int, help="movies rows (one per showtime)")
+    parser.add_argument("--bookings", type=int)
+    parser.add_argument("--reviews", type=int)
+    parser.add_argument("--watchlist", type=int)
+    parser.add_argument("--items-per-booking", type=float, default=1.3, help="mean booking_items per booking")
+    parser.add_argument("--days", type=int, default=120, help="span of showtimes, ending two weeks from now")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for movie popularity")
+    parser.add_argument("--user-skew", type=float, default=0.8, help="Zipf exponent for user activity")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per executemany()")
+    parser.add_argument("--commit-every", type=int, default=500_000, help="rows per transaction")
+    parser.add_argument("--keep-indexes", action="store_true", help="load with secondary indexes in place")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--sqlite", metavar="PATH", help="SQLite file to create or extend")
+    target.add_argument("--mysql", action="store_true", help="load into the configured MySQL database")
+    args = parser.parse_args()
+    defaults = dict(zip(("users", "shows", "bookings", "reviews", "watchlist"), SCALES[args.scale]))
+    for key, value in defaults.items():
+        if getattr(args, key) is None:
+            setattr(args, key, value)
+    return args
+
+
+def zipf_cum_weights(n, s):
+    total, cum = 0.0, []
+    for rank in range(1, n + 1):
+        total += 1.0 / rank ** s
+        cum.append(total)
+    return cum
+
+
+class Picker:
+    """Skewed sampling over ids: popularity rank is shuffled across the id range."""
+
+    def __init__(self, rnd, ids, s):
+        self.rnd = rnd
+        self.ids = list(ids)
+        rnd.shuffle(self.ids)
+        self.cum = zipf_cum_weights(len(self.ids), s)
+        self.total = self.cum[-1]
+
+    def pick(self):
+        return self.ids[bisect.bisect_left(self.cum, self.rnd.random() * self.total)]
+
+
+class Loader:
+    """Batched executemany() inserts with periodic commits and progress output."""
+
+    def __init__(self, conn, batch_size, commit_every):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self._uncommitted = 0
+
+    def load(self, table, columns, rows, total):
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+        done, t0 = 0, time.perf_counter()
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                break
+            self.cursor.executemany(sql, batch)
+            done += len(batch)
+            self._uncommitted += len(batch)
+            if self._uncommitted >= self.commit_every:
+                self.conn.commit()
+                self._uncommitted = 0
+            if done % (self.batch_size * 20) < self.batch_size:
+                self._progress(table, done, total, t0)
+        self.conn.commit()
+        self._uncommitted = 0
+        self._progress(table, done, total, t0, end="\n")
+        return done
+
+    @staticmethod
+    def _progress(table, done, total, t0, end="\r"):
+        elapsed = max(time.perf_counter() - t0, 1e-9)
+        print(f"  {table:14} {done:>12,}/{total:,} rows  {done / elapsed:>10,.0f} rows/s", end=end, flush=True)
+
+
+# ---------------------------------------------------------------------------
+# Schema preparation
+# ---------------------------------------------------------------------------
+
+LOADED_TABLES = ("users", "genres", "movies", "bookings", "booking_items", "payments",
+                 "reviews", "watchlist", "movie_ratings")
+
+
+def secondary_indexes(cursor, sqlite):
+    """[(name, table, create statement)] for the idx_* indexes on the loaded tables."""
+    tables = ",".join(["%s"] * len(LOADED_TABLES))
+    if sqlite:
+        cursor.execute(
+            f"SELECT name, tbl_name, sql FROM sqlite_master WHERE type='index' AND name LIKE 'idx\\_%' ESCAPE '\\' "
+            f"AND tbl_name IN ({tables})",
+            LOADED_TABLES
+        )
+        return cursor.fetchall()
+    cursor.execute(
+        "SELECT INDEX_NAME, TABLE_NAME, NON_UNIQUE, COLUMN_NAME FROM INFORMATION_SCHEMA.STATISTICS "
+        f"WHERE TABLE_SCHEMA = DATABASE() AND INDEX_NAME LIKE 'idx\\_%' AND TABLE_NAME IN ({tables}) "
+        "ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX",
+        LOADED_TABLES
+    )
+    indexes = {}
+    for name, table, non_unique, column in cursor.fetchall():
+        entry = indexes.setdefault((name, table), [non_unique, []])
+        entry[1].append(column)
+    return [(name, table, f"CREATE {'' if non_unique else 'UNIQUE '}INDEX {name} ON {table} ({', '.join(cols)})")
+            for (name, table), (non_unique, cols) in indexes.items()]
+
+
+def drop_indexes(cursor, indexes, sqlite):
+    for name, table, _ in indexes:
+        cursor.execute(f"DROP INDEX {name}" if sqlite else f"DROP INDEX {name} ON {table}")
+
+
+def rebuild_indexes(cursor, indexes):
+    for name, table, create_sql in indexes:
+        t0 = time.perf_counter()
+        cursor.execute(create_sql)
+        print(f"  {name:32} on {table:14} {time.perf_counter() - t0:8.2f}s")
+
+
+def tune_for_load(cursor, sqlite):
+    if sqlite:
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA cache_size=-262144")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    else:
+        cursor.execute("SET SESSION unique_checks=0")
+        cursor.execute("SET SESSION foreign_key_checks=0")
+
+
+def next_id(cursor, table, column):
+    cursor.execute(f"SELECT COALESCE(MAX({column}), 0) FROM {table}")
+    return cursor.fetchone()[0] + 1
+
+
+# ---------------------------------------------------------------------------
+# Row generators
+# ---------------------------------------------------------------------------
+
+def gen_users(first_id, n):
+    for user_id in range(first_id, first_id + n):
+        yield (user_id, f"User {user_id}", f"user{user_id}@example.com", f"pass{user_id % 1000:03d}", 0)
+
+
+def gen_shows(rnd, first_id, n, genre_ids, start, days):
+    genre_picker = Picker(rnd, genre_ids, 0.7)
+    hours, hour_w = zip(*HOUR_WEIGHTS.items())
+    prices, price_w = zip(*PRICE_TIERS)
+    day_w = [1.6 if (start + timedelta(days=d)).weekday() >= 5 else 1.0 for d in range(days)]
+    for movie_id in range(first_id, first_id + n):
+        day = rnd.choices(range(days), weights=day_w)[0]
+        showtime = start + timedelta(days=day, hours=rnd.choices(hours, weights=hour_w)[0],
+                                     minutes=rnd.choice((0, 15, 30, 45)))
+        title = f"{rnd.choice(TITLE_WORDS[0])} {rnd.choice(TITLE_WORDS[1])} {movie_id}"
+        yield (movie_id, genre_picker.pick(), title, rnd.choices(prices, weights=price_w)[0],
+               rnd.randint(40, 300), "Generated showtime", rnd.randint(85, 180), showtime.strftime(TS))
+
+
+def gen_bookings(rnd, first_id, n, user_picker, movie_picker, shows, items_mean, first_item_id, sinks):
+    """Bookings; booking_items and payments rows are appended to `sinks` as a side effect."""
+    item_id = first_item_id
+    methods, method_w = zip(*PAYMENT_METHODS)
+    extra_item_p = max(0.0, min(0.9, 1 - 1 / items_mean)) if items_mean > 1 else 0.0
+    for booking_id in range(first_id, first_id + n):
+        movie_id = movie_picker.pick()
+        price, showtime = shows[movie_id]
+        booked_at = showtime - timedelta(hours=min(rnd.expovariate(1 / 36.0), 24 * 30))
+        status = "cancelled" if rnd.random() < 0.03 else "confirmed"
+        total = 0.0
+        while True:
+            seats = rnd.choices((1, 2, 3, 4, 5, 6), weights=(20, 40, 15, 15, 5, 5))[0]
+            line_total = round(price * seats, 2)
+            sinks["booking_items"].append((item_id, booking_id, movie_id, seats, line_total))
+            item_id += 1
+            total += line_total
+            if rnd.random() >= extra_item_p:
+                break
+            movie_id = movie_picker.pick()
+            price = shows[movie_id][0]
+        if rnd.random() < 0.97:
+            sinks["payments"].append((booking_id, (booked_at + timedelta(seconds=rnd.randint(5, 600))).strftime(TS),
+                                      round(total, 2), rnd.choices(methods, weights=method_w)[0],
+                                      "refunded" if status == "cancelled" else "success"))
+        yield (booking_id, user_picker.pick(), booked_at.strftime(TS), status)
+
+
+def gen_reviews(rnd, n, user_picker, movie_picker, shows, quality, summaries):
+    for _ in range(n):
+        movie_id = movie_picker.pick()
+        rating = min(5, max(1, round(rnd.gauss(quality[movie_id], 1.0))))
+        summary = summaries.setdefault(movie_id, [0, 0, 0, 0, 0, 0, 0])
+        summary[0] += 1
+        summary[1] += rating
+        summary[1 + rating] += 1
+        reviewed_at = shows[movie_id][1] + timedelta(hours=rnd.randint(3, 24 * 21))
+        yield (user_picker.pick(), movie_id, rating, "Generated review", reviewed_at.strftime(TS))
+
+
+def gen_watchlist(rnd, n, user_picker, movie_picker, now):
+    for _ in range(n):
+        added = now - timedelta(minutes=rnd.randint(0, 60 * 24 * 14))
+        yield (user_picker.pick(), movie_picker.pick(), rnd.choices((1, 2, 3, 4), weights=(30, 45, 15, 10))[0],
+               None, added.strftime(TS))
+
+
+class Drain:
+    """Iterate a generator while flushing side tables it fills once they reach a batch."""
+
+    def __init__(self, loader, sinks, columns, batch_size):
+        self.loader, self.sinks, self.columns, self.batch_size = loader, sinks, columns, batch_size
+        self.counts = {table: 0 for table in sinks}
+
+    def flush(self, force=False):
+        for table, rows in self.sinks.items():
+            if rows and (force or len(rows) >= self.batch_size):
+                sql = (f"INSERT INTO {table} ({', '.join(self.columns[table])}) "
+                       f"VALUES ({', '.join(['%s'] * len(self.columns[table]))})")
+                self.loader.cursor.executemany(sql, rows)
+                self.counts[table] += len(rows)
+                rows.clear()
+
+    def wrap(self, rows):
+        for i, row in enumerate(rows, 1):
+            yield row
+            if i % self.batch_size == 0:
+                self.flush()
+        self.flush(force=True)
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    args = parse_args()
+    if args.sqlite:
+        os.environ["DB_BACKEND"] = "sqlite"
+        os.environ["SQLITE_PATH"] = os.path.abspath(args.sqlite)
+    elif args.mysql:
+        os.environ["DB_BACKEND"] = "mysql"
+
+    from db import get_db, is_sqlite
+    from migrations import migrate
+    from sales import rebuild_sales
+
+    sqlite = is_sqlite()
+    if sqlite and not os.path.exists(os.environ.get("SQLITE_PATH", "")):
+        from setup_sqlite_db import setup_database
+        setup_database()
+    else:
+        migrate(verbose=False)
+
+    rnd = random.Random(args.seed)
+    conn = get_db()
+    loader = Loader(conn, args.batch_size, args.commit_every)
+    cursor = loader.cursor
+    started = time.perf_counter()
+    print(f"Generating into {os.environ.get('SQLITE_PATH') if sqlite else 'MySQL'} "
+          f"(seed {args.seed}): users={args.users:,} shows={args.shows:,} bookings={args.bookings:,} "
+          f"reviews={args.reviews:,} watchlist={args.watchlist:,}")
+
+    try:
+        tune_for_load(cursor, sqlite)
+        indexes = [] if args.keep_indexes else secondary_indexes(cursor, sqlite)
+        drop_indexes(cursor, indexes, sqlite)
+        conn.commit()
+
+        # Genres: reuse existing names, add the missing ones
+        cursor.execute("SELECT genre_id, name FROM genres")
+        existing = {name: gid for gid, name in cursor.fetchall()}
+        missing = [name for name in GENRES if name not in existing]
+        if missing:
+            first = next_id(cursor, "genres", "genre_id")
+            loader.load("genres", ("genre_id", "name"),
+                        [(first + i, name) for i, name in enumerate(missing)], len(missing))
+        cursor.execute("SELECT genre_id FROM genres")
+        genre_ids = [r[0] for r in cursor.fetchall()]
+
+        first_user = next_id(cursor, "users", "user_id")
+        loader.load("users", ("user_id", "name", "email", "password", "is_admin"),
+                    gen_users(first_user, args.users), args.users)
+
+        now = datetime.now().replace(microsecond=0, second=0)
+        start = now - timedelta(days=max(args.days - 14, 0))
+        first_movie = next_id(cursor, "movies", "movie_id")
+        show_rows = list(gen_shows(rnd, first_movie, args.shows, genre_ids, start, args.days))
+        loader.load("movies", ("movie_id", "genre_id", "title", "price", "available_seats",
+                               "description", "duration", "showtime"), show_rows, args.shows)
+        shows = {r[0]: (r[3], datetime.strptime(r[7], TS)) for r in show_rows}
+        del show_rows
+
+        user_picker = Picker(rnd, range(first_user, first_user + args.users), args.user_skew)
+        movie_picker = Picker(rnd, range(first_movie, first_movie + args.shows), args.skew)
+
+        sinks = {"booking_items": [], "payments": []}
+        drain = Drain(loader, sinks, {
+            "booking_items": ("booking_item_id", "booking_id", "movie_id", "seats_booked", "price"),
+            "payments": ("booking_id", "payment_date", "amount", "method", "status"),
+        }, args.batch_size)
+        bookings = gen_bookings(rnd, next_id(cursor, "bookings", "booking_id"), args.bookings, user_picker,
+                                movie_picker, shows, args.items_per_booking,
+                                next_id(cursor, "booking_items", "booking_item_id"), sinks)
+        loader.load("bookings", ("booking_id", "user_id", "booking_date", "status"),
+                    drain.wrap(bookings), args.bookings)
+        print(f"  {'booking_items':14} {drain.counts['booking_items']:>12,} rows")
+        print(f"  {'payments':14} {drain.counts['payments']:>12,} rows")
+
+        quality = {movie_id: rnd.uniform(2.5, 4.7) for movie_id in shows}
+        summaries = {}
+        loader.load("reviews", ("user_id", "movie_id", "rating", "comment", "review_date"),
+                    gen_reviews(rnd, args.reviews, user_picker, movie_picker, shows, quality, summaries),
+                    args.reviews)
+        loader.load("watchlist", ("user_id", "movie_id", "seats_selected", "selected_seats", "added_at"),
+                    gen_watchlist(rnd, args.watchlist, user_picker, movie_picker, now), args.watchlist)
+
+        # Rating summaries for the new shows (all their reviews were generated here)
+        loader.load("movie_ratings", ("movie_id", "review_count", "rating_sum", "r1", "r2", "r3", "r4", "r5"),
+                    ((movie_id, *values) for movie_id, values in summaries.items()), len(summaries))
+
+        if indexes:
+            print("Rebuilding secondary indexes:")
+            rebuild_indexes(cursor, indexes)
+        # Report aggregates cover the whole history, old rows included
+        t0 = time.perf_counter()
+        counts = rebuild_sales(cursor)
+        print(f"Rebuilt sales aggregates ({', '.join(f'{t} {n:,}' for t, n in counts.items())}) "
+              f"in {time.perf_counter() - t0:.2f}s")
+        print("Analyzing tables ...")
+        if sqlite:
+            cursor.execute("ANALYZE")
+        else:
+            for table in LOADED_TABLES:
+                cursor.execute(f"ANALYZE TABLE {table}")
+                cursor.fetchall()
+        # Running workers drop their cached catalog
+        cursor.execute("UPDATE cache_versions SET version=version+1")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
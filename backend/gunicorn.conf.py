@@ -0,0 +1,48 @@
+"""
+Production launcher: gunicorn -c gunicorn.conf.py
+
+The master pre-forks SERVER_CONFIG["workers"] processes (one per core by
+default), each running `threads` request threads. It replaces workers
+that die, time out or reach max_requests. Worker count and code can be
+changed without dropping connections:
+
+    kill -HUP  <master>   graceful reload: new workers start, old ones finish in-flight requests
+    kill -TTIN <master>   add a worker; -TTOU removes one
+    kill -TERM <master>   graceful shutdown (graceful_timeout)
+
+Workers import app.py after the fork unless WEB_PRELOAD=1. Either way,
+DB pools and caches are per process: they are created lazily, and the
+modules that hold them reset in forked children (forking.on_fork).
+Point liveness probes at /healthz and readiness probes at /readyz.
+"""
+
+import os
+
+from config import AUTH_CONFIG, SERVER_CONFIG
+
+if not AUTH_CONFIG["secret_key"]:
+    # Workers would each sign with their own random key and reject each other's tokens
+    raise SystemExit("SECRET_KEY must be set to run the production server")
+
+wsgi_app = "app:app"
+bind = SERVER_CONFIG["bind"]
+workers = SERVER_CONFIG["workers"] or os.cpu_count() or 1
+threads = SERVER_CONFIG["threads"]
+worker_class = "gthread" if threads > 1 else "sync"
+max_requests = SERVER_CONFIG["max_requests"]
+max_requests_jitter = SERVER_CONFIG["max_requests_jitter"]
+timeout = SERVER_CONFIG["timeout"]
+graceful_timeout = SERVER_CONFIG["graceful_timeout"]
+keepalive = SERVER_CONFIG["keepalive"]
+preload_app = SERVER_CONFIG["preload"]
+accesslog = os.environ.get("ACCESS_LOG")   # e.g. "-" for stdout; off by default
+
+
+def on_starting(server):
+    server.log.info("starting %d worker(s) x %d thread(s) on %s", workers, threads, bind)
+
+
+def worker_exit(server, worker):
+    # Release this worker's DB connections instead of leaving them to time out server-side
+    from db import dispose_pool
+    dispose_pool()
@@ -0,0 +1,325 @@
+"""
+Idempotency-Key support for write endpoints (POST /bookings, POST /payments).
+
+A client sends the same Idempotency-Key header when it retries a request.
+The first request with a key runs the view. Its response is stored both
+in a bounded in-memory LRU and in the `idempotency_keys` table, and later
+requests with that key get the stored response back, marked with
+`Idempotent-Replayed: true`. Those replays never touch the booking or
+payment tables. A duplicate that arrives while the first request is still
+running waits for it instead of racing:
+
+- within a worker, on a threading.Event;
+- across workers, by polling the claim row, which the first request
+  inserts before running the view.
+
+Replaying a key with a different body answers 422. 5xx responses are not
+stored, so the client can retry. A view that commits its writes calls
+save_response() in that same transaction, so the stored response and the
+rows it describes commit together: a worker dying after the commit
+cannot leave a claim that a retry would run a second time. Other
+responses are stored once the view returns. A claim left behind by a crashed worker
+can be taken over after `lock_timeout` seconds. The idempotency_cleanup
+job drops keys older than `ttl`.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from functools import wraps
+
+from flask import Response, current_app, g, jsonify, request
+
+from cache import LRUCache
+from config import IDEMPOTENCY_CONFIG
+from db import IntegrityError, get_db
+from forking import on_fork
+from scheduler import job
+
+log = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+
+
+class StoredResponse:
+    __slots__ = ("fingerprint", "status", "body", "content_type", "created_at")
+
+    def __init__(self, fingerprint, status, body, content_type, created_at):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.created_at = created_at
+
+
+class Claim:
+    """This request's hold on a key: the claim row's created_at, and the response once saved."""
+    __slots__ = ("key", "fingerprint", "created_at", "stored")
+
+    def __init__(self, key, fingerprint, created_at):
+        self.key = key
+        self.fingerprint = fingerprint
+        self.created_at = created_at
+        self.stored = None
+
+
+class InProgress(Exception):
+    """The first request with this key did not finish within wait_timeout."""
+
+
+class ClaimLost(Exception):
+    """The claim expired and another request took the key over; the caller must roll back."""
+
+
+class IdempotencyStore:
+    def __init__(self, config):
+        self.ttl = config["ttl"]
+        self.wait_timeout = config["wait_timeout"]
+        self.lock_timeout = config["lock_timeout"]
+        self.poll_interval = config["poll_interval"]
+        self._done = LRUCache(config["max_entries"])
+        self._init_state()
+        on_fork(self._init_state)
+
+    def _init_state(self):
+        self._lock = threading.Lock()
+        self._pending = {}    # key -> Event set when this worker's first request finishes
+        self.replays = 0
+
+    def run(self, key, fingerprint, view):
+        """Return view()'s response, or the stored one if `key` was already used."""
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            stored = self._stored(key)
+            if stored is not None:
+                return self._replay(stored, fingerprint)
+            with self._lock:
+                event = self._pending.get(key)
+                if event is None:
+                    event = self._pending[key] = threading.Event()
+                    break
+            # Same key in flight on another thread of this worker
+            if not event.wait(max(0.0, deadline - time.monotonic())):
+                raise InProgress()
+
+        try:
+            stored, claimed_at = self._claim(key, fingerprint, deadline)
+            if stored is not None:
+                self._done.set(key, stored)
+                return self._replay(stored, fingerprint)
+            claim = g.idempotency_claim = Claim(key, fingerprint, claimed_at)
+            try:
+                response = current_app.make_response(view())
+            except Exception:
+                self._release(claim)
+                raise
+            finally:
+                g.pop("idempotency_claim", None)
+            self._finish(claim, response)
+            return response
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            event.set()
+
+    def _stored(self, key):
+        stored = self._done.get(key)
+        if stored is not None and stored.created_at < time.time() - self.ttl:
+            self._done.delete(key)
+            return None
+        return stored
+
+    def _claim(self, key, fingerprint, deadline):
+        """
+        Insert the claim row and return (None, its created_at), or
+        (stored response, None) if the key already completed.
+        """
+        while True:
+            now = int(time.time())
+            conn = get_db()
+            cursor = conn.cursor()
+            try:
+                try:
+                    cursor.execute(
+                        "INSERT INTO idempotency_keys (idempotency_key, fingerprint, created_at) VALUES (%s, %s, %s)",
+                        (key, fingerprint, now)
+                    )
+                    conn.commit()
+                    return None, now
+                except IntegrityError:
+                    conn.rollback()
+                cursor.execute(
+                    "SELECT fingerprint, status_code, body, content_type, created_at "
+                    "FROM idempotency_keys WHERE idempotency_key=%s",
+                    (key,)
+                )
+                row = cursor.fetchone()
+                if row is not None and row[1] is not None and row[4] >= now - self.ttl:
+                    return StoredResponse(*row), None
+                if row is not None and row[4] < now - (self.ttl if row[1] is not None else self.lock_timeout):
+                    # Expired response or abandoned claim: take the key over
+                    cursor.execute(
+                        "UPDATE idempotency_keys SET fingerprint=%s, status_code=NULL, body=NULL, "
+                        "content_type=NULL, created_at=%s WHERE idempotency_key=%s AND created_at=%s",
+                        (fingerprint, now, key, row[4])
+                    )
+                    taken = cursor.rowcount == 1
+                    conn.commit()
+                    if taken:
+                        return None, now
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+                conn.close()
+            if row is not None and time.monotonic() >= deadline:
+                raise InProgress()
+            if row is not None:
+                # Another worker is running the first request
+                time.sleep(self.poll_interval)
+
+    def _release(self, claim):
+        """Drop our claim so a retry runs the request again."""
+        conn = get_db()
+        cursor = conn.cursor()
+        try:
+            # created_at: leave the key alone if another request has taken it over
+            cursor.execute("DELETE FROM idempotency_keys WHERE idempotency_key=%s AND created_at=%s",
+                           (claim.key, claim.created_at))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            log.warning("releasing idempotency key %s failed: %s", claim.key, e)
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _finish(self, claim, response):
+        if response.status_code >= 500:
+            # Not a final answer
+            return self._release(claim)
+        if claim.stored is not None and claim.stored.body == response.get_data(as_text=True):
+            # Saved by the view in its own transaction
+            self._done.set(claim.key, claim.stored)
+            return
+        conn = get_db()
+        cursor = conn.cursor()
+        try:
+            save_claim(cursor, claim, response)
+            conn.commit()
+            self._done.set(claim.key, claim.stored)
+        except Exception as e:
+            # Nothing was written by the view (it would have saved the response); its claim
+            # expires after lock_timeout
+            conn.rollback()
+            log.warning("storing idempotent response for %s failed: %s", claim.key, e)
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _replay(self, stored, fingerprint):
+        if stored.fingerprint != fingerprint:
+            return jsonify({"success": False,
+                            "message": f"{HEADER} was already used with a different request"}), 422
+        self.replays += 1
+        response = Response(stored.body, status=stored.status, content_type=stored.content_type)
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {**self._done.stats(), "pending": pending, "replays": self.replays}
+
+
+STORE = IdempotencyStore(IDEMPOTENCY_CONFIG)
+
+
+def save_claim(cursor, claim, response):
+    """Write response into the claim row on cursor; raises ClaimLost if the row is no longer ours."""
+    stored = StoredResponse(claim.fingerprint, response.status_code, response.get_data(as_text=True),
+                            response.content_type, int(time.time()))
+    cursor.execute(
+        "UPDATE idempotency_keys SET status_code=%s, body=%s, content_type=%s "
+        "WHERE idempotency_key=%s AND created_at=%s",
+        (stored.status, stored.body, stored.content_type, claim.key, claim.created_at)
+    )
+    if cursor.rowcount != 1:
+        raise ClaimLost(f"{HEADER} was taken over by another request")
+    claim.stored = stored
+
+
+def save_response(cursor, response):
+    """
+    Store response as the answer to this request's Idempotency-Key, on the
+    caller's cursor, so it commits or rolls back with the writes it reports.
+    Does nothing without a key. Returns the response.
+    """
+    claim = g.get("idempotency_claim")
+    if claim is not None:
+        save_claim(cursor, claim, response)
+    return response
+
+
+def fingerprint():
+    """Hash of what makes two requests "the same": route and body."""
+    digest = hashlib.sha256(f"{request.method} {request.path}\n".encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def idempotent(scope):
+    """Honour an Idempotency-Key header on the decorated view; `scope` namespaces its keys."""
+    def decorate(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(HEADER)
+            if key is None:
+                return view(*args, **kwargs)
+            key = key.strip()
+            if not key or len(key) > IDEMPOTENCY_CONFIG["max_key_length"]:
+                return jsonify({"success": False, "message": (
+                    f"{HEADER} must be 1-{IDEMPOTENCY_CONFIG['max_key_length']} characters")}), 400
+            try:
+                return STORE.run(f"{scope}:{key}", fingerprint(), lambda: view(*args, **kwargs))
+            except InProgress:
+                response = jsonify({"success": False,
+                                    "message": f"A request with this {HEADER} is still in progress"})
+                response.headers["Retry-After"] = "1"
+                return response, 409
+        return wrapper
+    return decorate
+
+
+@job("idempotency_cleanup", 3600)
+def expire_keys(batch_size=500, max_batches=50):
+    """Delete keys older than the ttl in batches; returns the number removed."""
+    cutoff = int(time.time()) - IDEMPOTENCY_CONFIG["ttl"]
+    removed = 0
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        for _ in range(max_batches):
+            cursor.execute(
+                "SELECT idempotency_key FROM idempotency_keys WHERE created_at < %s ORDER BY created_at LIMIT %s",
+                (cutoff, batch_size)
+            )
+            keys = [r[0] for r in cursor.fetchall()]
+            if keys:
+                cursor.execute(
+                    f"DELETE FROM idempotency_keys WHERE idempotency_key IN ({','.join(['%s'] * len(keys))})",
+                    keys
+                )
+            conn.commit()
+            removed += len(keys)
+            if len(keys) < batch_size:
+                break
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    return {"keys": removed}
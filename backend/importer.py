@@ -0,0 +1,285 @@
+"""
+Bulk movie/showtime import (POST /movies/import).
+
+The request body (CSV with a header row, or NDJSON) is parsed straight off
+the input stream, one row at a time. Each row is validated on its own.
+Invalid rows are reported with their line number and skipped. Valid rows
+are inserted with executemany() in batches, all in one transaction. A
+batch that the database rejects is rolled back to a savepoint and retried
+row by row, so one bad row only costs its own insert.
+
+Showtimes go through ShowtimeParser, which remembers which format matched
+each "shape" of input (digits and letters masked out). A schedule in a
+single format therefore costs one parse per row instead of a walk through
+parse_datetime's strptime list.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from config import IMPORT_CONFIG
+
+MOVIE_COLUMNS = ("genre_id", "title", "price", "available_seats", "description", "duration", "showtime")
+INSERT_MOVIE_SQL = (
+    f"INSERT INTO movies ({', '.join(MOVIE_COLUMNS)}) "
+    f"VALUES ({', '.join(['%s'] * len(MOVIE_COLUMNS))})"
+)
+
+# Same inputs parse_datetime() understands
+SHOWTIME_FORMATS = [
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%dT%H:%M:%SZ',
+    '%Y-%m-%dT%H:%M:%S.%fZ',
+    '%a, %d %b %Y %H:%M:%S GMT',
+    '%a, %d %b %Y %H:%M:%S %Z',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d',
+]
+
+_SHAPE = str.maketrans(
+    "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ",
+    "0" * 10 + "a" * 52,
+)
+
+
+def _isoformat(value):
+    return datetime.fromisoformat(value)
+
+
+def _strptime(fmt):
+    return lambda value: datetime.strptime(value, fmt)
+
+
+class ShowtimeParser:
+    """Normalise showtimes to 'YYYY-MM-DD HH:MM:SS', caching the parser per input shape."""
+
+    max_shapes = 64
+
+    def __init__(self, formats=SHOWTIME_FORMATS):
+        self._candidates = [_isoformat] + [_strptime(f) for f in formats]
+        self._by_shape = {}
+
+    def parse(self, value):
+        """Normalised string, or None when no known format matches."""
+        value = str(value).strip()
+        shape = value.translate(_SHAPE)
+        if shape in self._by_shape:
+            parser = self._by_shape[shape]
+            if parser is None:
+                return None
+            try:
+                return parser(value).strftime('%Y-%m-%d %H:%M:%S')
+            except ValueError:
+                # Same shape, different literal (e.g. "UTC" vs "GMT") or an impossible date
+                pass
+        for candidate in self._candidates:
+            try:
+                parsed = candidate(value)
+            except ValueError:
+                continue
+            self._remember(shape, candidate)
+            return parsed.strftime('%Y-%m-%d %H:%M:%S')
+        self._remember(shape, None)
+        return None
+
+    def _remember(self, shape, parser):
+        if shape in self._by_shape or len(self._by_shape) < self.max_shapes:
+            self._by_shape[shape] = parser
+
+
+# ---------------------------------------------------------------------------
+# Streaming readers: yield (line number, raw row) or (line number, ValueError)
+# ---------------------------------------------------------------------------
+
+def iter_csv(stream):
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield reader.line_num, ValueError(f"Malformed CSV: {e}")
+            continue
+        if None in row:
+            yield reader.line_num, ValueError("Too many fields")
+            continue
+        yield reader.line_num, row
+
+
+def iter_ndjson(stream):
+    # The text wrapper reads ahead in large chunks; raw request streams are slow line by line
+    for line_num, line in enumerate(io.TextIOWrapper(stream, encoding="utf-8-sig"), 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_num, ValueError(f"Malformed JSON: {e}")
+            continue
+        if not isinstance(row, dict):
+            yield line_num, ValueError("Each line must be a JSON object")
+            continue
+        yield line_num, row
+
+
+# ---------------------------------------------------------------------------
+# Validation and batched inserts
+# ---------------------------------------------------------------------------
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _non_negative_int(row, field):
+    value = row.get(field)
+    if _blank(value):
+        return 0
+    try:
+        number = int(str(value).strip())
+    except ValueError:
+        raise ValueError(f"{field} must be a whole number")
+    if number < 0:
+        raise ValueError(f"{field} cannot be negative")
+    return number
+
+
+class MovieRowValidator:
+    """Turns raw import rows into INSERT parameter tuples; raises ValueError on bad rows."""
+
+    def __init__(self, genres):
+        # genres: {genre_id: name}; rows may give either genre_id or the genre name
+        self.genre_ids = set(genres)
+        self.genre_by_name = {name.lower(): gid for gid, name in genres.items() if name}
+        self.showtimes = ShowtimeParser()
+
+    def __call__(self, row):
+        title = str(row.get("title") or "").strip()
+        if not title:
+            raise ValueError("title is required")
+        if len(title) > 150:
+            raise ValueError("title is longer than 150 characters")
+
+        genre_id = self._genre(row)
+
+        price = row.get("price")
+        try:
+            price = Decimal(str(price).strip()) if not _blank(price) else Decimal("0")
+        except InvalidOperation:
+            raise ValueError("price must be a number")
+        if not price.is_finite() or price < 0:
+            raise ValueError("price must be a non-negative number")
+
+        showtime_raw = row.get("showtime")
+        if _blank(showtime_raw):
+            raise ValueError("showtime is required")
+        showtime = self.showtimes.parse(showtime_raw)
+        if not showtime:
+            raise ValueError(f"Unrecognised showtime: {showtime_raw}")
+
+        return (
+            genre_id,
+            title,
+            str(price.quantize(Decimal("0.01"))),
+            _non_negative_int(row, "available_seats"),
+            str(row.get("description") or ""),
+            _non_negative_int(row, "duration"),
+            showtime,
+        )
+
+    def _genre(self, row):
+        genre_id = row.get("genre_id")
+        if not _blank(genre_id):
+            try:
+                genre_id = int(str(genre_id).strip())
+            except ValueError:
+                raise ValueError("genre_id must be a whole number")
+            if genre_id not in self.genre_ids:
+                raise ValueError(f"Unknown genre_id: {genre_id}")
+            return genre_id
+        name = str(row.get("genre") or "").strip()
+        if not name:
+            raise ValueError("genre_id or genre is required")
+        try:
+            return self.genre_by_name[name.lower()]
+        except KeyError:
+            raise ValueError(f"Unknown genre: {name}")
+
+
+class ImportResult:
+    def __init__(self, max_errors=None):
+        self.max_errors = max_errors or IMPORT_CONFIG["max_errors"]
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+        self.genre_ids = set()
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "message": message})
+
+    def as_dict(self):
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def load_genres(cursor):
+    cursor.execute("SELECT genre_id, name FROM genres")
+    return dict(cursor.fetchall())
+
+
+def _flush(cursor, batch, result):
+    cursor.execute("SAVEPOINT movie_import_batch")
+    try:
+        cursor.executemany(INSERT_MOVIE_SQL, [params for _, params in batch])
+    except Exception:
+        cursor.execute("ROLLBACK TO SAVEPOINT movie_import_batch")
+        # Find the offending rows; a failed single-row INSERT undoes only itself
+        for line, params in batch:
+            try:
+                cursor.execute(INSERT_MOVIE_SQL, params)
+            except Exception as e:
+                result.error(line, str(e))
+                continue
+            result.inserted += 1
+            result.genre_ids.add(params[0])
+    else:
+        result.inserted += len(batch)
+        result.genre_ids.update(params[0] for _, params in batch)
+    cursor.execute("RELEASE SAVEPOINT movie_import_batch")
+
+
+def import_movies(cursor, rows, validate, batch_size=None, result=None):
+    """
+    Validate and insert (line, raw row) pairs from iter_csv/iter_ndjson.
+
+    Runs inside the caller's transaction; the caller commits. Returns an
+    ImportResult with inserted/failed counts and per-row errors.
+    """
+    batch_size = batch_size or IMPORT_CONFIG["batch_size"]
+    result = result or ImportResult()
+    batch = []
+    for line, row in rows:
+        if isinstance(row, Exception):
+            result.error(line, str(row))
+            continue
+        try:
+            batch.append((line, validate(row)))
+        except ValueError as e:
+            result.error(line, str(e))
+            continue
+        if len(batch) >= batch_size:
+            _flush(cursor, batch, result)
+            batch = []
+    if batch:
+        _flush(cursor, batch, result)
+    return result
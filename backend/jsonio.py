@@ -0,0 +1,100 @@
+"""
+JSON encoding for API responses.
+
+FastJSONProvider replaces Flask's default provider (app.json). With orjson
+installed it encodes in C. datetime, date and time become ISO 8601
+strings, matching the isoformat() the blueprints already use for
+booking_date. Decimal (MySQL DECIMAL prices) becomes a JSON number. The
+stdlib encoder makes the same conversions when orjson is missing, so the
+output does not depend on which one is installed.
+
+Keys keep their insertion (SELECT column) order instead of being sorted.
+dumpb() returns bytes, which is what cached bodies and responses need.
+"""
+
+import dataclasses
+import datetime
+import decimal
+import json
+import uuid
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # the stdlib encoder below produces the same output, just slower
+    orjson = None
+
+
+def _default(o):
+    """Conversions for what neither encoder handles on its own."""
+    if isinstance(o, decimal.Decimal):
+        return float(o)
+    if isinstance(o, (datetime.date, datetime.time)):
+        return o.isoformat()
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(",", ":"))
+_pretty_encoder = json.JSONEncoder(default=_default, ensure_ascii=False, indent=2)
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def dumpb(obj, pretty=False, sort_keys=False):
+    """Encode obj as compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        options = _OPTIONS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        if sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_default, option=options)
+    if sort_keys:
+        return json.dumps(obj, default=_default, ensure_ascii=False, sort_keys=True,
+                          indent=2 if pretty else None, separators=None if pretty else (",", ":")).encode()
+    return (_pretty_encoder if pretty else _encoder).encode(obj).encode()
+
+
+def loads(s):
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+class FastJSONProvider(JSONProvider):
+    """app.json backed by dumpb()/loads(); install with app.json = FastJSONProvider(app)."""
+
+    sort_keys = False
+    # None: indent responses only in debug mode, like Flask's default provider
+    compact = None
+    mimetype = "application/json"
+
+    def dumpb(self, obj):
+        return dumpb(obj, sort_keys=self.sort_keys)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # json.dumps options (indent, separators, ...) only the stdlib understands
+            kwargs.setdefault("default", _default)
+            kwargs.setdefault("ensure_ascii", False)
+            return json.dumps(obj, **kwargs)
+        return self.dumpb(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        body = dumpb(obj, pretty=pretty, sort_keys=self.sort_keys) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,246 @@
+"""
+In-process metrics exported in the Prometheus text format (GET /metrics).
+
+Histograms and counters are plain Python objects guarded by a lock, with
+no client library. An observation is one bisect plus a few additions, so
+they can stay on in production. Values are per process: with several
+worker processes, each one's /metrics reports only its own share, so
+scrape every worker, or aggregate on a per-instance label.
+
+init_app() adds request timing to a Flask app and registers /metrics.
+The DB layer (db.py) records statement latency, row counts and
+connection-acquire time through the histograms defined here.
+"""
+
+import bisect
+import math
+import threading
+import time
+
+from flask import Response, g, jsonify, request
+
+from config import METRICS_CONFIG
+from forking import on_fork
+
+# Seconds; tuned for web requests and DB statements (0.5ms .. 10s)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 100000)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _reset_after_fork(metric):
+    """Give a metric a fresh lock (and no samples) in forked children; values are per process."""
+    @on_fork
+    def reset():
+        metric._lock = threading.Lock()
+        if hasattr(metric, "_values"):
+            metric._values = {}
+        if hasattr(metric, "_series"):
+            metric._series = {}
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+        _reset_after_fork(self)
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=(), registry=REGISTRY):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _reset_after_fork(self)
+        registry.register(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Gauge:
+    """Gauge whose values come from a callback returning {label tuple: value} at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), collect=None, registry=REGISTRY):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.collect = collect
+        registry.register(self)
+
+    def samples(self):
+        try:
+            values = self.collect() if self.collect else {}
+        except Exception:
+            return []
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in sorted(values.items())]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        _reset_after_fork(self)
+        registry.register(self)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = []
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, [le])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+# ---------------------------------------------------------------------------
+# Application metrics
+# ---------------------------------------------------------------------------
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to build the response, by route.",
+    ("method", "blueprint", "endpoint", "status"))
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in database statements per request, by route.",
+    ("blueprint", "endpoint"))
+QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "cursor.execute() latency by statement kind and calling route.",
+    ("operation", "table", "endpoint"))
+QUERY_ROWS = Histogram(
+    "db_query_rows", "Rows fetched (SELECT) or affected (writes) per statement.",
+    ("operation", "table"), buckets=ROW_BUCKETS)
+QUERY_ERRORS = Counter(
+    "db_query_errors_total", "Statements that raised.", ("operation", "table"))
+ACQUIRE_SECONDS = Histogram(
+    "db_connection_acquire_seconds", "Time to obtain a connection in get_db().", ("backend",))
+JOB_SECONDS = Histogram(
+    "job_run_duration_seconds", "Scheduled maintenance job runs.", ("job", "status"),
+    buckets=LATENCY_BUCKETS + (30.0, 60.0, 300.0))
+JOB_ROWS = Histogram(
+    "job_rows_per_run", "Rows a maintenance job processed in one run, by kind.", ("job", "kind"),
+    buckets=ROW_BUCKETS)
+POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Pooled connections by state.", ("state",))
+
+
+def enabled():
+    return METRICS_CONFIG["enabled"]
+
+
+def current_endpoint():
+    """Route name for labels, or "-" outside a request."""
+    try:
+        return request.endpoint or "-"
+    except RuntimeError:
+        return "-"
+
+
+def add_request_db_time(seconds):
+    try:
+        g._db_seconds = g.get("_db_seconds", 0.0) + seconds
+    except RuntimeError:
+        pass
+
+
+def _before_request():
+    g._request_started = time.perf_counter()
+    g._db_seconds = 0.0
+
+
+def _after_request(response):
+    started = g.get("_request_started")
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    endpoint = request.endpoint or "-"
+    blueprint = request.blueprint or "-"
+    db_seconds = g.get("_db_seconds", 0.0)
+    REQUEST_SECONDS.observe(elapsed, request.method, blueprint, endpoint, str(response.status_code))
+    REQUEST_DB_SECONDS.observe(db_seconds, blueprint, endpoint)
+    # Browser devtools show this split under "Timing"
+    response.headers["Server-Timing"] = (
+        f"db;dur={db_seconds * 1000:.2f}, app;dur={(elapsed - db_seconds) * 1000:.2f}"
+    )
+    return response
+
+
+def _is_local():
+    return request.remote_addr in ("127.0.0.1", "::1", None)
+
+
+def metrics_view():
+    if not (METRICS_CONFIG["allow_remote"] or _is_local()):
+        return jsonify({"success": False, "message": "Metrics are only served locally"}), 403
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app, pool_stats=None):
+    """Time every request and serve GET /metrics; pool_stats() feeds the pool gauges."""
+    if pool_stats is not None:
+        POOL_CONNECTIONS.collect = lambda: _pool_gauges(pool_stats())
+    if enabled():
+        app.before_request(_before_request)
+        app.after_request(_after_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view, methods=["GET"])
+
+
+def _pool_gauges(stats):
+    return {(state,): stats[state] for state in ("opened", "idle", "in_use", "waiting") if state in stats}
@@ -0,0 +1,555 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for MySQL and SQLite.
+
+Applied versions are recorded in `schema_migrations`. Every step is
+idempotent (CREATE ... IF NOT EXISTS, column/index existence checks), so
+re-running after a partial failure is safe even on MySQL, where DDL
+commits implicitly.
+
+Run this: py migrations.py            (apply pending migrations)
+          py migrations.py status     (list applied / pending)
+"""
+
+import sys
+
+from db import SQLiteConnection, get_db, is_sqlite
+
+MIGRATIONS = []
+
+
+def migration(version, name):
+    def register(fn):
+        MIGRATIONS.append((version, name, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+
+# ---------------------------------------------------------------------------
+# Dialect helpers
+# ---------------------------------------------------------------------------
+
+class Schema:
+    """DDL helpers bound to one cursor; each migration receives one of these."""
+
+    def __init__(self, cursor, sqlite):
+        self.cursor = cursor
+        self.sqlite = sqlite
+
+    def execute(self, sql, params=()):
+        """Run DDL, filling {pk} (auto-increment key) and {cascade} (FK delete action)."""
+        if self.sqlite:
+            sql = sql.format(pk="INTEGER PRIMARY KEY AUTOINCREMENT", cascade="")
+        else:
+            sql = sql.format(pk="INT AUTO_INCREMENT PRIMARY KEY", cascade="ON DELETE CASCADE")
+        self.cursor.execute(sql, params)
+
+    def columns(self, table):
+        if self.sqlite:
+            self.cursor.execute(f"PRAGMA table_info({table})")
+            return [r[1] for r in self.cursor.fetchall()]
+        self.cursor.execute(
+            "SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table,)
+        )
+        return [r[0] for r in self.cursor.fetchall()]
+
+    def index_exists(self, table, name):
+        if self.sqlite:
+            self.cursor.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name=%s", (name,))
+        else:
+            self.cursor.execute(
+                "SELECT 1 FROM INFORMATION_SCHEMA.STATISTICS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s LIMIT 1",
+                (table, name)
+            )
+        return self.cursor.fetchone() is not None
+
+    def create_index(self, name, table, columns, unique=False):
+        if not self.index_exists(table, name):
+            kind = "UNIQUE INDEX" if unique else "INDEX"
+            self.cursor.execute(f"CREATE {kind} {name} ON {table} ({', '.join(columns)})")
+
+    def drop_index(self, name, table):
+        if self.index_exists(table, name):
+            self.cursor.execute(f"DROP INDEX {name}" if self.sqlite else f"DROP INDEX {name} ON {table}")
+
+    def add_column(self, table, column, definition):
+        if column not in self.columns(table):
+            self.cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+# ---------------------------------------------------------------------------
+# Migrations
+# ---------------------------------------------------------------------------
+
+@migration(1, "baseline schema")
+def baseline(schema):
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            user_id {pk},
+            name VARCHAR(100),
+            email VARCHAR(100) UNIQUE,
+            password VARCHAR(255),
+            is_admin INTEGER DEFAULT 0
+        )
+    """)
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS genres (
+            genre_id {pk},
+            name VARCHAR(100) UNIQUE
+        )
+    """)
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS movies (
+            movie_id {pk},
+            genre_id INTEGER,
+            title VARCHAR(150),
+            price DECIMAL(10,2),
+            available_seats INTEGER,
+            description TEXT,
+            duration INTEGER,
+            showtime DATETIME,
+            FOREIGN KEY (genre_id) REFERENCES genres(genre_id)
+        )
+    """)
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS watchlist (
+            watchlist_id {pk},
+            user_id INTEGER,
+            movie_id INTEGER,
+            seats_selected INTEGER,
+            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(user_id) {cascade},
+            FOREIGN KEY (movie_id) REFERENCES movies(movie_id) {cascade}
+        )
+    """)
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS bookings (
+            booking_id {pk},
+            user_id INTEGER,
+            booking_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            status VARCHAR(30) DEFAULT 'confirmed',
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    """)
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS booking_items (
+            booking_item_id {pk},
+            booking_id INTEGER,
+            movie_id INTEGER,
+            seats_booked INTEGER,
+            price DECIMAL(10,2),
+            FOREIGN KEY (booking_id) REFERENCES bookings(booking_id),
+            FOREIGN KEY (movie_id) REFERENCES movies(movie_id)
+        )
+    """)
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS payments (
+            payment_id {pk},
+            booking_id INTEGER,
+            payment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            amount DECIMAL(10,2),
+            method VARCHAR(30),
+            status VARCHAR(30),
+            FOREIGN KEY (booking_id) REFERENCES bookings(booking_id)
+        )
+    """)
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS reviews (
+            review_id {pk},
+            user_id INTEGER,
+            movie_id INTEGER,
+            rating INTEGER,
+            comment TEXT,
+            review_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(user_id) {cascade},
+            FOREIGN KEY (movie_id) REFERENCES movies(movie_id) {cascade}
+        )
+    """)
+
+
+@migration(2, "watchlist.selected_seats")
+def watchlist_selected_seats(schema):
+    schema.add_column("watchlist", "selected_seats", "VARCHAR(500) DEFAULT NULL")
+
+
+@migration(3, "cache_versions table")
+def cache_versions(schema):
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS cache_versions (
+            name VARCHAR(50) PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+
+@migration(4, "show_seats seat inventory")
+def show_seats(schema):
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS show_seats (
+            movie_id INTEGER NOT NULL,
+            seat_id VARCHAR(8) NOT NULL,
+            user_id INTEGER NOT NULL,
+            status VARCHAR(10) NOT NULL,
+            held_until BIGINT,
+            booking_id INTEGER,
+            PRIMARY KEY (movie_id, seat_id),
+            FOREIGN KEY (movie_id) REFERENCES movies(movie_id) {cascade}
+        )
+    """)
+    schema.create_index("idx_show_seats_user", "show_seats", ["user_id", "movie_id"])
+    schema.create_index("idx_show_seats_held_until", "show_seats", ["status", "held_until"])
+
+
+@migration(5, "hot-path indexes")
+def hot_path_indexes(schema):
+    # GET /watchlist/<user_id>, add_to_watchlist's (user_id, movie_id) lookup, checkout
+    schema.create_index("idx_watchlist_user_movie", "watchlist", ["user_id", "movie_id"])
+    # Item lookups by booking; covering for the listing columns
+    schema.create_index("idx_booking_items_booking", "booking_items",
+                 ["booking_id", "movie_id", "seats_booked", "price"])
+    # GET /bookings/user/<id> ordered by date
+    schema.create_index("idx_bookings_user_date", "bookings", ["user_id", "booking_date", "booking_id"])
+    # GET /bookings/all keyset pagination
+    schema.create_index("idx_bookings_date", "bookings", ["booking_date", "booking_id"])
+    # GET /reviews/<movie_id>
+    schema.create_index("idx_reviews_movie", "reviews", ["movie_id"])
+    # GET /movies?genre_id=
+    schema.create_index("idx_movies_genre", "movies", ["genre_id"])
+    # Login and legacy admin checks (email + password), covering is_admin
+    schema.create_index("idx_users_email_password", "users", ["email", "password", "is_admin"])
+
+
+@migration(6, "movie_ratings summaries and review pagination index")
+def movie_ratings(schema):
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS movie_ratings (
+            movie_id INTEGER PRIMARY KEY,
+            review_count INTEGER NOT NULL DEFAULT 0,
+            rating_sum INTEGER NOT NULL DEFAULT 0,
+            r1 INTEGER NOT NULL DEFAULT 0,
+            r2 INTEGER NOT NULL DEFAULT 0,
+            r3 INTEGER NOT NULL DEFAULT 0,
+            r4 INTEGER NOT NULL DEFAULT 0,
+            r5 INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (movie_id) REFERENCES movies(movie_id) {cascade}
+        )
+    """)
+    # Backfill from existing reviews (only movies without a summary yet)
+    schema.execute("""
+        INSERT INTO movie_ratings (movie_id, review_count, rating_sum, r1, r2, r3, r4, r5)
+        SELECT r.movie_id, COUNT(*), SUM(r.rating),
+               SUM(CASE WHEN r.rating = 1 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN r.rating = 2 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN r.rating = 3 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN r.rating = 4 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN r.rating = 5 THEN 1 ELSE 0 END)
+        FROM reviews r
+        JOIN movies m ON m.movie_id = r.movie_id
+        WHERE r.rating BETWEEN 1 AND 5
+          AND NOT EXISTS (SELECT 1 FROM movie_ratings mr WHERE mr.movie_id = r.movie_id)
+        GROUP BY r.movie_id
+    """)
+    # GET /reviews/<movie_id> pages newest first; supersedes idx_reviews_movie
+    schema.create_index("idx_reviews_movie_date", "reviews", ["movie_id", "review_date", "review_id"])
+    schema.drop_index("idx_reviews_movie", "reviews")
+
+
+@migration(7, "job_leases and watchlist expiry index")
+def job_leases(schema):
+    # One row per scheduled job; the worker holding an unexpired lease runs it
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS job_leases (
+            name VARCHAR(100) PRIMARY KEY,
+            owner VARCHAR(200) NOT NULL,
+            expires_at BIGINT NOT NULL
+        )
+    """)
+    # The watchlist reaper walks carts oldest first
+    schema.create_index("idx_watchlist_added", "watchlist", ["added_at", "watchlist_id"])
+
+
+@migration(8, "archive tables")
+def archive_tables(schema):
+    # Past showtimes and finished bookings move here (see archive.py). Same
+    # columns and keys as the live tables, no foreign keys, plus archived_at.
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS movies_archive (
+            movie_id INTEGER PRIMARY KEY,
+            genre_id INTEGER,
+            title VARCHAR(150),
+            price DECIMAL(10,2),
+            available_seats INTEGER,
+            description TEXT,
+            duration INTEGER,
+            showtime DATETIME,
+            review_count INTEGER NOT NULL DEFAULT 0,
+            rating_sum INTEGER NOT NULL DEFAULT 0,
+            r1 INTEGER NOT NULL DEFAULT 0,
+            r2 INTEGER NOT NULL DEFAULT 0,
+            r3 INTEGER NOT NULL DEFAULT 0,
+            r4 INTEGER NOT NULL DEFAULT 0,
+            r5 INTEGER NOT NULL DEFAULT 0,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS reviews_archive (
+            review_id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            movie_id INTEGER,
+            rating INTEGER,
+            comment TEXT,
+            review_date TIMESTAMP NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS bookings_archive (
+            booking_id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            booking_date TIMESTAMP NULL,
+            status VARCHAR(30),
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS booking_items_archive (
+            booking_item_id INTEGER PRIMARY KEY,
+            booking_id INTEGER,
+            movie_id INTEGER,
+            seats_booked INTEGER,
+            price DECIMAL(10,2)
+        )
+    """)
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS payments_archive (
+            payment_id INTEGER PRIMARY KEY,
+            booking_id INTEGER,
+            payment_date TIMESTAMP NULL,
+            amount DECIMAL(10,2),
+            method VARCHAR(30),
+            status VARCHAR(30)
+        )
+    """)
+    # The read paths of the live tables, for ?include_archived=1
+    schema.create_index("idx_bookings_archive_user_date", "bookings_archive", ["user_id", "booking_date", "booking_id"])
+    schema.create_index("idx_bookings_archive_date", "bookings_archive", ["booking_date", "booking_id"])
+    schema.create_index("idx_booking_items_archive_booking", "booking_items_archive",
+                        ["booking_id", "movie_id", "seats_booked", "price"])
+    schema.create_index("idx_payments_archive_booking", "payments_archive", ["booking_id"])
+    schema.create_index("idx_reviews_archive_movie_date", "reviews_archive", ["movie_id", "review_date", "review_id"])
+    # The archiver walks past showtimes oldest first and checks for live items per movie
+    schema.create_index("idx_movies_showtime", "movies", ["showtime", "movie_id"])
+    schema.create_index("idx_booking_items_movie", "booking_items", ["movie_id"])
+    schema.create_index("idx_payments_booking", "payments", ["booking_id"])
+
+
+@migration(9, "sales aggregates")
+def sales_aggregates(schema):
+    # Maintained by sales.py alongside booking_items and payments writes
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS sales_by_movie (
+            movie_id INTEGER PRIMARY KEY,
+            bookings INTEGER NOT NULL DEFAULT 0,
+            seats_sold INTEGER NOT NULL DEFAULT 0,
+            revenue DECIMAL(14,2) NOT NULL DEFAULT 0
+        )
+    """)
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS sales_by_day (
+            day DATE NOT NULL,
+            movie_id INTEGER NOT NULL,
+            bookings INTEGER NOT NULL DEFAULT 0,
+            seats_sold INTEGER NOT NULL DEFAULT 0,
+            revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, movie_id)
+        )
+    """)
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS payments_by_day (
+            day DATE NOT NULL,
+            status VARCHAR(30) NOT NULL,
+            payments INTEGER NOT NULL DEFAULT 0,
+            amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, status)
+        )
+    """)
+    # Daily report for one movie
+    schema.create_index("idx_sales_by_day_movie", "sales_by_day", ["movie_id", "day"])
+    # Backfill from existing bookings and payments, live and archived. The SQL
+    # is inlined as of this version: `python sales.py` rebuilds with current code
+    for table in ("sales_by_movie", "sales_by_day", "payments_by_day"):
+        schema.execute(f"DELETE FROM {table}")
+    schema.execute("""
+        INSERT INTO sales_by_day (day, movie_id, bookings, seats_sold, revenue)
+        SELECT day, movie_id, SUM(bookings), SUM(seats_sold), SUM(revenue) FROM (
+            SELECT DATE(b.booking_date) AS day, bi.movie_id AS movie_id, COUNT(*) AS bookings,
+                   SUM(COALESCE(bi.seats_booked, 0)) AS seats_sold, SUM(COALESCE(bi.price, 0)) AS revenue
+            FROM bookings b JOIN booking_items bi ON bi.booking_id = b.booking_id
+            WHERE b.status <> 'cancelled'
+            GROUP BY DATE(b.booking_date), bi.movie_id
+            UNION ALL
+            SELECT DATE(b.booking_date) AS day, bi.movie_id AS movie_id, COUNT(*) AS bookings,
+                   SUM(COALESCE(bi.seats_booked, 0)) AS seats_sold, SUM(COALESCE(bi.price, 0)) AS revenue
+            FROM bookings_archive b JOIN booking_items_archive bi ON bi.booking_id = b.booking_id
+            WHERE b.status <> 'cancelled'
+            GROUP BY DATE(b.booking_date), bi.movie_id
+        ) s
+        GROUP BY day, movie_id
+    """)
+    schema.execute("""
+        INSERT INTO sales_by_movie (movie_id, bookings, seats_sold, revenue)
+        SELECT movie_id, SUM(bookings), SUM(seats_sold), SUM(revenue) FROM sales_by_day GROUP BY movie_id
+    """)
+    schema.execute("""
+        INSERT INTO payments_by_day (day, status, payments, amount)
+        SELECT day, status, SUM(payments), SUM(amount) FROM (
+            SELECT DATE(payment_date) AS day, COALESCE(status, '') AS status, COUNT(*) AS payments,
+                   SUM(COALESCE(amount, 0)) AS amount
+            FROM payments GROUP BY DATE(payment_date), COALESCE(status, '')
+            UNION ALL
+            SELECT DATE(payment_date) AS day, COALESCE(status, '') AS status, COUNT(*) AS payments,
+                   SUM(COALESCE(amount, 0)) AS amount
+            FROM payments_archive GROUP BY DATE(payment_date), COALESCE(status, '')
+        ) p
+        GROUP BY day, status
+    """)
+
+
+@migration(10, "idempotency_keys")
+def idempotency_keys(schema):
+    # Claims and stored responses for Idempotency-Key requests (see idempotency.py)
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            idempotency_key VARCHAR(200) PRIMARY KEY,
+            fingerprint CHAR(64) NOT NULL,
+            status_code INTEGER,
+            body TEXT,
+            content_type VARCHAR(100),
+            created_at BIGINT NOT NULL
+        )
+    """)
+    schema.create_index("idx_idempotency_keys_created", "idempotency_keys", ["created_at"])
+
+
+@migration(11, "users.token_version")
+def users_token_version(schema):
+    # Bumped to revoke a user's session tokens in every worker (see auth.py)
+    schema.add_column("users", "token_version", "INTEGER NOT NULL DEFAULT 0")
+
+
+@migration(12, "bookings_by_day")
+def bookings_by_day(schema):
+    # Checkouts per day; sales_by_day.bookings counts a booking once per movie in it
+    schema.execute("""
+        CREATE TABLE IF NOT EXISTS bookings_by_day (
+            day DATE PRIMARY KEY,
+            bookings INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    # Backfill from existing bookings (live and archived) with at least one item
+    schema.execute("DELETE FROM bookings_by_day")
+    schema.execute("""
+        INSERT INTO bookings_by_day (day, bookings)
+        SELECT day, SUM(bookings) FROM (
+            SELECT DATE(b.booking_date) AS day, COUNT(*) AS bookings FROM bookings b
+            WHERE b.status <> 'cancelled'
+              AND EXISTS (SELECT 1 FROM booking_items bi WHERE bi.booking_id = b.booking_id)
+            GROUP BY DATE(b.booking_date)
+            UNION ALL
+            SELECT DATE(b.booking_date) AS day, COUNT(*) AS bookings FROM bookings_archive b
+            WHERE b.status <> 'cancelled'
+              AND EXISTS (SELECT 1 FROM booking_items_archive bi WHERE bi.booking_id = b.booking_id)
+            GROUP BY DATE(b.booking_date)
+        ) b
+        GROUP BY day
+    """)
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _ensure_version_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(200) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_versions(cursor):
+    _ensure_version_table(cursor)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {r[0] for r in cursor.fetchall()}
+
+
+def schema_version(cursor):
+    """Highest applied migration, or None before the first migrate(); never creates tables."""
+    cursor.execute("SELECT MAX(version) FROM schema_migrations")
+    return cursor.fetchone()[0]
+
+
+def latest_version():
+    return MIGRATIONS[-1][0]
+
+
+def migrate(conn=None, target=None, verbose=True):
+    """
+    Apply pending migrations up to `target` (all by default) and return the
+    versions applied. Uses the configured backend unless a connection is
+    passed in; a passed-in connection is left open.
+    """
+    own = conn is None
+    conn = conn or get_db()
+    cursor = conn.cursor()
+    schema = Schema(cursor, isinstance(conn, SQLiteConnection) if not own else is_sqlite())
+    applied = []
+    try:
+        done = applied_versions(cursor)
+        conn.commit()
+        for version, name, up in MIGRATIONS:
+            if version in done or (target is not None and version > target):
+                continue
+            if verbose:
+                print(f"Applying {version:04d} {name} ...")
+            up(schema)
+            cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+            conn.commit()
+            applied.append(version)
+        return applied
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        if own:
+            conn.close()
+
+
+def status():
+    """[(version, name, applied)] for every known migration."""
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        done = applied_versions(cursor)
+        conn.commit()
+        return [(version, name, version in done) for version, name, _ in MIGRATIONS]
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "status":
+        for version, name, is_applied in status():
+            print(f"{version:04d} {'applied' if is_applied else 'pending':8} {name}")
+    else:
+        applied = migrate()
+        print(f"Applied {len(applied)} migration(s)." if applied else "Schema is up to date.")
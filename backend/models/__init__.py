@@ -7,3 +7,7 @@ from .reviews import reviews_bp
 from .genres import genres_bp
 from .signup import signup_bp
 from .login import login_bp
+from .admin import admin_bp
+from .reports import reports_bp
+from .batch import batch_bp
+from .home import home_bp
@@ -0,0 +1,56 @@
+from flask import Blueprint, request, jsonify
+from auth import admin_required
+from pagination import page_limit
+from scheduler import JOBS, run_job
+from slowlog import QUERY_LOG, SORT_KEYS
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/queries', methods=['GET'])
+@admin_required
+def top_queries():
+    """Normalised statements ranked by ?sort= (total, mean, max, calls, rows), with EXPLAIN samples."""
+    sort = request.args.get('sort', 'total')
+    if sort not in SORT_KEYS:
+        return jsonify({"success": False, "message": f"sort must be one of {', '.join(SORT_KEYS)}"}), 400
+    try:
+        limit = page_limit(request.args, default=20)
+    except ValueError:
+        return jsonify({"success": False, "message": "limit must be a positive integer"}), 400
+    return jsonify({"success": True, **QUERY_LOG.summary(), "sort": sort,
+                    "statements": QUERY_LOG.top(sort, limit)})
+
+@admin_bp.route('/queries/slow', methods=['GET'])
+@admin_required
+def slow_queries():
+    """Most recent statements over the slow-query threshold, newest first."""
+    try:
+        limit = page_limit(request.args)
+    except ValueError:
+        return jsonify({"success": False, "message": "limit must be a positive integer"}), 400
+    return jsonify({"success": True, "threshold_ms": QUERY_LOG.threshold * 1000,
+                    "queries": QUERY_LOG.recent(limit)})
+
+@admin_bp.route('/queries', methods=['DELETE'])
+@admin_required
+def reset_queries():
+    QUERY_LOG.reset()
+    return jsonify({"success": True, "message": "Query statistics reset"})
+
+@admin_bp.route('/jobs', methods=['GET'])
+@admin_required
+def list_jobs():
+    """Scheduled maintenance jobs as seen by this worker (last run, result, error)."""
+    return jsonify({"success": True, "jobs": [j.as_dict() for j in JOBS.values()]})
+
+@admin_bp.route('/jobs/<name>/run', methods=['POST'])
+@admin_required
+def run_job_now(name):
+    job = JOBS.get(name)
+    if job is None:
+        return jsonify({"success": False, "message": "Unknown job"}), 404
+    try:
+        result = run_job(job)
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    return jsonify({"success": True, "job": name, "result": result})
@@ -0,0 +1,146 @@
+"""
+POST /batch: several API calls in one HTTP round trip.
+
+    {"requests": [{"method": "GET", "path": "/movies/?genre_id=2"},
+                  {"method": "PUT", "path": "/movies/7", "body": {...}}],
+     "transaction": false}
+
+Each sub-request is dispatched through the app's normal routing, with the
+batch's Authorization header unless it sets its own "headers", and all of
+them run on one pooled connection. Results come back in request order as
+{"status", "headers", "body"}.
+
+With "transaction": true the writes commit together. The first
+sub-request answering 4xx/5xx rolls everything back and stops the batch.
+An Idempotency-Key belongs on the /batch request itself there, since a
+sub-request's key would be remembered even if the batch rolls back.
+"""
+
+from flask import Blueprint, current_app, jsonify, request
+from werkzeug.test import EnvironBuilder
+
+import seatmap
+from cache import catalog_cache
+from config import BATCH_CONFIG
+from db import shared_connection
+from idempotency import HEADER as IDEMPOTENCY_HEADER, idempotent, save_response
+
+batch_bp = Blueprint('batch', __name__)
+
+METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+# Response headers worth passing back to the caller
+FORWARDED_HEADERS = ("ETag", "Location", "Retry-After", "X-Next-Cursor", "Idempotent-Replayed")
+
+
+def _parse(data):
+    """Validated [(method, path, headers, body)] from the batch body; raises ValueError."""
+    if not isinstance(data, dict) or not isinstance(data.get('requests'), list):
+        raise ValueError("requests must be a list")
+    subrequests = data['requests']
+    if not subrequests:
+        raise ValueError("requests is empty")
+    if len(subrequests) > BATCH_CONFIG["max_requests"]:
+        raise ValueError(f"at most {BATCH_CONFIG['max_requests']} requests per batch")
+    parsed = []
+    for i, sub in enumerate(subrequests):
+        if not isinstance(sub, dict):
+            raise ValueError(f"requests[{i}] must be an object")
+        method = str(sub.get('method', 'GET')).upper()
+        path = sub.get('path')
+        headers = sub.get('headers') or {}
+        if method not in METHODS:
+            raise ValueError(f"requests[{i}].method must be one of {', '.join(METHODS)}")
+        if not isinstance(path, str) or not path.startswith('/') or path.startswith('//'):
+            raise ValueError(f"requests[{i}].path must be an absolute path such as /movies/")
+        if path.split('?', 1)[0].rstrip('/') == '/batch':
+            raise ValueError(f"requests[{i}] cannot be another batch")
+        if not isinstance(headers, dict):
+            raise ValueError(f"requests[{i}].headers must be an object")
+        if data.get('transaction') and any(k.lower() == IDEMPOTENCY_HEADER.lower() for k in headers):
+            raise ValueError(f"requests[{i}]: send {IDEMPOTENCY_HEADER} on the batch, not inside a transaction")
+        parsed.append((method, path, {str(k): str(v) for k, v in headers.items()}, sub.get('body')))
+    return parsed
+
+
+def _dispatch(method, path, headers, body):
+    """Run one sub-request through the app and return (status, headers, body)."""
+    app = current_app._get_current_object()
+    if 'Authorization' in request.headers and not any(k.lower() == 'authorization' for k in headers):
+        headers = {**headers, 'Authorization': request.headers['Authorization']}
+    builder = EnvironBuilder(
+        path=path, method=method, headers=headers, json=body,
+        base_url=request.host_url, environ_base={"REMOTE_ADDR": request.remote_addr},
+    )
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+    # A fresh app context gives each sub-request its own `g` (request timing, DB time)
+    with app.app_context(), app.request_context(environ):
+        try:
+            response = app.full_dispatch_request()
+        except Exception as e:
+            response = app.make_response(app.handle_exception(e))
+        data = response.get_data()
+        response.close()
+    if not data:
+        payload = None
+    elif response.is_json:
+        payload = response.get_json()
+    else:
+        payload = data.decode('utf-8', 'replace')
+    return response.status_code, {k: response.headers[k] for k in FORWARDED_HEADERS if k in response.headers}, payload
+
+
+@batch_bp.route('', methods=['POST'])
+@idempotent("batch")
+def run_batch():
+    """Run the listed API calls in order on one connection, optionally as one transaction."""
+    data = request.get_json(silent=True)
+    try:
+        subrequests = _parse(data)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    transaction = bool(data.get('transaction'))
+    writes = any(method != 'GET' for method, _, _, _ in subrequests)
+
+    results = []
+    failed = None
+    try:
+        with shared_connection(transaction) as shared:
+            for i, (method, path, headers, body) in enumerate(subrequests):
+                if transaction:
+                    shared.savepoint()
+                status, response_headers, payload = _dispatch(method, path, headers, body)
+                results.append({"status": status, "headers": response_headers, "body": payload})
+                if transaction and (status >= 400 or shared.rollback_only):
+                    failed = i
+                    shared.rollback_only = True
+                    break
+            if transaction and failed is None:
+                # The batch's own Idempotency-Key response commits with its writes
+                cursor = shared.cursor()
+                try:
+                    response = save_response(cursor, jsonify({"success": True, "results": results}))
+                finally:
+                    cursor.close()
+                return response
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e), "results": results}), 500
+    finally:
+        if transaction and writes:
+            # Sub-requests updated these caches before the real commit, or for writes
+            # that were just rolled back (including a catalog version that never
+            # committed); let them reload from the database
+            catalog_cache.reset()
+            seatmap.forget_all()
+
+    if failed is not None:
+        status = results[failed]["status"]
+        return jsonify({
+            "success": False,
+            "message": f"requests[{failed}] failed; no changes were saved",
+            "failed": failed,
+            "results": results,
+        }), status if status >= 400 else 409
+    return jsonify({"success": True, "results": results})
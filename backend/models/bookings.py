@@ -1,99 +1,315 @@
 from flask import Blueprint, request, jsonify
-from db import get_db
+from db import get_db, for_update, run_transaction
+from auth import admin_required
+from cache import catalog_cache, movies_key
+from seats import SeatConflict, confirm_booking_seats, parse_seat_ids
+import seatmap
+from streaming import stream_query, wants_stream
+from pagination import PAGINATION_ERRORS, after_cursor, encode_cursor, page_limit
+from archive import include_archived, merge_newest
+from sales import record_booking_items
+from idempotency import idempotent, save_response
+from .movies import parse_datetime
 
 bookings_bp = Blueprint('bookings', __name__)
 
+class CheckoutError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _checkout(cursor, user_id):
+    """Move the user's watchlist into a new booking; runs inside one transaction."""
+    cursor.execute(
+        "SELECT w.movie_id, w.seats_selected, w.selected_seats, m.price, m.title, m.genre_id, m.available_seats "
+        "FROM watchlist w JOIN movies m ON m.movie_id = w.movie_id "
+        "WHERE w.user_id=%s ORDER BY w.movie_id" + for_update(),
+        (user_id,)
+    )
+    cart = [r for r in cursor.fetchall() if r[1]]
+    if not cart:
+        raise CheckoutError("Watchlist is empty")
+    short = [r[4] for r in cart if (r[6] or 0) < r[1]]
+    if short:
+        raise CheckoutError("Not enough seats available for: " + ", ".join(short), 409)
+
+    cursor.execute("INSERT INTO bookings (user_id) VALUES (%s)", (user_id,))
+    booking_id = cursor.lastrowid
+
+    items = [(booking_id, movie_id, seats, float(price or 0) * seats)
+             for movie_id, seats, _, price, _, _, _ in cart]
+    cursor.executemany(
+        "INSERT INTO booking_items (booking_id, movie_id, seats_booked, price) VALUES (%s,%s,%s,%s)",
+        items
+    )
+    record_booking_items(cursor, items)
+
+    # Guarded decrement: a movie without enough seats left matches no row
+    cursor.executemany(
+        "UPDATE movies SET available_seats = available_seats - %s WHERE movie_id=%s AND available_seats >= %s",
+        [(seats, movie_id, seats) for movie_id, seats, _, _, _, _, _ in cart]
+    )
+    if cursor.rowcount != len(cart):
+        raise CheckoutError("Not enough seats available", 409)
+
+    seats_by_movie = {r[0]: parse_seat_ids(r[2]) for r in cart}
+    confirm_booking_seats(cursor, user_id, booking_id, seats_by_movie)
+
+    cursor.execute("DELETE FROM watchlist WHERE user_id=%s", (user_id,))
+    return {
+        "booking_id": booking_id,
+        "total_amount": round(sum(i[3] for i in items), 2),
+        "total_seats": sum(i[2] for i in items),
+        "seats_by_movie": seats_by_movie,
+        "genre_ids": {r[5] for r in cart},
+    }
+
 
 @bookings_bp.route('', methods=['POST'])
+@idempotent("bookings")
 def create_booking():
+    """Checkout: turn the user's watchlist into a booking with its items in one transaction."""
     data = request.get_json() or {}
     user_id = data.get('customer_id')  # keep naming for frontend
     if not user_id:
         return jsonify({"success": False, "message": "customer_id required"}), 400
 
-    conn = get_db()
-    cursor = conn.cursor()
+    def checkout(cursor):
+        result = _checkout(cursor, user_id)
+        # Stored with the booking, so a retry after a crash replays it instead of booking again
+        result["response"] = save_response(cursor, jsonify({
+            "success": True,
+            "order_id": result["booking_id"],
+            "total_amount": result["total_amount"],
+            "total_seats": result["total_seats"],
+        }))
+        return result
+
     try:
-        cursor.execute("INSERT INTO bookings (user_id) VALUES (%s)", (user_id,))
-        booking_id = cursor.lastrowid
-        conn.commit()
-        return jsonify({"success": True, "order_id": booking_id})
+        result = run_transaction(checkout)
+    except CheckoutError as e:
+        return jsonify({"success": False, "message": str(e)}), e.status
+    except SeatConflict as e:
+        return jsonify({"success": False, "message": str(e), "seats": e.seats}), 409
     except Exception as e:
-        conn.rollback()
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+
+    for movie_id, seat_ids in result["seats_by_movie"].items():
+        if seat_ids:
+            seatmap.mark_booked(movie_id, seat_ids)
+    # Listings show available_seats, which just changed. Only this worker's copies are
+    # dropped: the seat map is authoritative for seat counts, and bumping the shared
+    # catalog version would flush every worker's cache on every checkout
+    catalog_cache.invalidate(movies_key(), *[movies_key(g) for g in result["genre_ids"]])
+    return result["response"]
+
+
+# (bookings table, items table, joins for the item's movie, movie title) for live and archived bookings
+LIVE_BOOKINGS = ("bookings", "booking_items", "LEFT JOIN movies m ON m.movie_id = bi.movie_id", "m.title")
+ARCHIVED_BOOKINGS = (
+    "bookings_archive", "booking_items_archive",
+    "LEFT JOIN movies m ON m.movie_id = bi.movie_id LEFT JOIN movies_archive ma ON ma.movie_id = bi.movie_id",
+    "COALESCE(m.title, ma.title)",
+)
+
+
+def _booking_sources(args):
+    return [LIVE_BOOKINGS, ARCHIVED_BOOKINGS] if include_archived(args) else [LIVE_BOOKINGS]
+
+
+def _newest_first(row):
+    return row[2], row[0]
+
+
+def _booking_filters(args, items_table="booking_items"):
+    """WHERE clauses and params for the /bookings/all filters; raises ValueError on bad input."""
+    where, params = [], []
+    date_from = args.get('date_from')
+    if date_from:
+        parsed = parse_datetime(date_from)
+        if not parsed:
+            raise ValueError("Invalid date_from")
+        where.append("b.booking_date >= %s")
+        params.append(parsed)
+    date_to = args.get('date_to')
+    if date_to:
+        parsed = parse_datetime(date_to)
+        if not parsed:
+            raise ValueError("Invalid date_to")
+        if len(date_to.strip()) == 10:  # a bare date includes the whole day
+            parsed = parsed[:10] + " 23:59:59"
+        where.append("b.booking_date <= %s")
+        params.append(parsed)
+    if args.get('status'):
+        where.append("b.status = %s")
+        params.append(args['status'])
+    if args.get('user_id'):
+        where.append("b.user_id = %s")
+        params.append(int(args['user_id']))
+    if args.get('movie_id'):
+        where.append(f"EXISTS (SELECT 1 FROM {items_table} fi WHERE fi.booking_id = b.booking_id AND fi.movie_id = %s)")
+        params.append(int(args['movie_id']))
+    return where, params
+
+
+def _group_booking_rows(rows, cols):
+    """Fold consecutive joined rows into one booking dict at a time."""
+    booking = None
+    for r in rows:
+        if booking is None or booking["booking_id"] != r[0]:
+            if booking is not None:
+                yield booking
+            booking = {
+                "booking_id": r[0],
+                "user_id": r[1],
+                "booking_date": r[2].isoformat() if hasattr(r[2], 'isoformat') else str(r[2]),
+                "status": r[3],
+                "user_name": r[4],
+                "user_email": r[5],
+                "items": [],
+                "total_amount": 0.0,
+                "total_seats": 0,
+            }
+        if r[6] is not None:
+            item = {
+                "booking_item_id": r[6],
+                "movie_id": r[7],
+                "seats_booked": r[8],
+                "price": float(r[9]) if r[9] is not None else 0.0,
+                "movie_title": r[10],
+            }
+            booking["items"].append(item)
+            booking["total_amount"] += item["price"]
+            booking["total_seats"] += (item["seats_booked"] or 0)
+    if booking is not None:
+        yield booking
 
 
 @bookings_bp.route('/all', methods=['GET'])
+@admin_required
 def list_all_bookings():
-    """Admin endpoint: list all bookings with user and item details."""
-    admin_email = request.args.get('admin_email')
-    admin_password = request.args.get('admin_password')
+    """
+    Admin endpoint: one page of bookings with user and item details.
+
+    Keyset-paginated on (booking_date, booking_id), newest first. Filters:
+    date_from, date_to, status, movie_id, user_id. The body stays a JSON
+    array; the cursor for the next page is returned in X-Next-Cursor.
+    With ?stream=1 every matching booking is streamed instead (exports).
+    ?include_archived=1 also reads bookings moved to the archive tables.
+    """
+    sources = _booking_sources(request.args)
+    if wants_stream(request.args):
+        selects, params = [], []
+        try:
+            for bookings_table, items_table, movie_join, title in sources:
+                where, source_params = _booking_filters(request.args, items_table)
+                selects.append(f"""
+                    SELECT b.booking_id, b.user_id, b.booking_date, b.status,
+                           u.name AS user_name, u.email AS user_email,
+                           bi.booking_item_id, bi.movie_id, bi.seats_booked, bi.price,
+                           {title} AS movie_title
+                    FROM {bookings_table} b
+                    JOIN users u ON u.user_id = b.user_id
+                    LEFT JOIN {items_table} bi ON bi.booking_id = b.booking_id
+                    {movie_join}
+                    {"WHERE " + " AND ".join(where) if where else ""}
+                """)
+                params.extend(source_params)
+        except (ValueError, TypeError) as e:
+            return jsonify({"success": False, "message": f"Invalid query: {e}"}), 400
+        if len(selects) == 1:
+            sql = selects[0] + " ORDER BY b.booking_date DESC, b.booking_id DESC"
+        else:
+            sql = f"SELECT * FROM ({' UNION ALL '.join(selects)}) x ORDER BY booking_date DESC, booking_id DESC"
+        return stream_query(sql, params, transform=_group_booking_rows)
+
+    try:
+        limit = page_limit(request.args)
+        clause, cursor_params = after_cursor(request.args, "b.booking_date", "b.booking_id")
+        filters = []
+        for source in sources:
+            where, params = _booking_filters(request.args, source[1])
+            if clause:
+                where.append(clause)
+                params.extend(cursor_params)
+            filters.append((source, where, params))
+    except PAGINATION_ERRORS as e:
+        return jsonify({"success": False, "message": f"Invalid query: {e}"}), 400
 
     conn = get_db()
     cursor = conn.cursor()
     try:
-        # Simple admin check by email/password against users table with is_admin=1
-        if admin_email and admin_password:
+        # Page of bookings first (merged newest first across sources), then only their items
+        rows, source_of = [], {}
+        for source, where, params in filters:
             cursor.execute(
-                "SELECT user_id FROM users WHERE email=%s AND password=%s AND is_admin=1",
-                (admin_email, admin_password)
+                f"""
+                SELECT b.booking_id, b.user_id, b.booking_date, b.status,
+                       u.name AS user_name, u.email AS user_email
+                FROM {source[0]} b
+                JOIN users u ON u.user_id = b.user_id
+                {"WHERE " + " AND ".join(where) if where else ""}
+                ORDER BY b.booking_date DESC, b.booking_id DESC
+                LIMIT %s
+                """,
+                params + [limit + 1]
             )
-            if cursor.fetchone() is None:
-                return jsonify({"success": False, "message": "Unauthorized"}), 401
-        else:
-            return jsonify({"success": False, "message": "Admin credentials required"}), 401
-
-        # Fetch bookings with user and aggregated item info
-        cursor.execute(
-            """
-            SELECT b.booking_id, b.user_id, b.booking_date, b.status,
-                   u.name AS user_name, u.email AS user_email,
-                   bi.booking_item_id, bi.movie_id, bi.seats_booked, bi.price,
-                   m.title AS movie_title
-            FROM bookings b
-            JOIN users u ON u.user_id = b.user_id
-            LEFT JOIN booking_items bi ON bi.booking_id = b.booking_id
-            LEFT JOIN movies m ON m.movie_id = bi.movie_id
-            ORDER BY b.booking_date DESC, b.booking_id DESC
-            """
-        )
-
-        # Group rows by booking
-        rows = cursor.fetchall()
+            source_rows = cursor.fetchall()
+            source_of.update((r[0], source) for r in source_rows)
+            rows = merge_newest(rows, source_rows, _newest_first, limit + 1)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
         bookings_by_id = {}
         for r in rows:
-            booking_id = r[0]
-            if booking_id not in bookings_by_id:
-                bookings_by_id[booking_id] = {
-                    "booking_id": booking_id,
-                    "user_id": r[1],
-                    "booking_date": r[2].isoformat() if hasattr(r[2], 'isoformat') else str(r[2]),
-                    "status": r[3],
-                    "user_name": r[4],
-                    "user_email": r[5],
-                    "items": [],
-                    "total_amount": 0.0,
-                    "total_seats": 0,
-                }
-            # Append item if exists
-            booking_item_id = r[6]
-            if booking_item_id is not None:
+            bookings_by_id[r[0]] = {
+                "booking_id": r[0],
+                "user_id": r[1],
+                "booking_date": r[2].isoformat() if hasattr(r[2], 'isoformat') else str(r[2]),
+                "status": r[3],
+                "user_name": r[4],
+                "user_email": r[5],
+                "items": [],
+                "total_amount": 0.0,
+                "total_seats": 0,
+            }
+
+        for source in sources:
+            _, items_table, movie_join, title = source
+            ids = [booking_id for booking_id in bookings_by_id if source_of[booking_id] is source]
+            if not ids:
+                continue
+            placeholders = ",".join(["%s"] * len(ids))
+            cursor.execute(
+                f"""
+                SELECT bi.booking_id, bi.booking_item_id, bi.movie_id, bi.seats_booked, bi.price,
+                       {title} AS movie_title
+                FROM {items_table} bi
+                {movie_join}
+                WHERE bi.booking_id IN ({placeholders})
+                ORDER BY bi.booking_item_id
+                """,
+                ids
+            )
+            for r in cursor.fetchall():
                 item = {
-                    "booking_item_id": booking_item_id,
-                    "movie_id": r[7],
-                    "seats_booked": r[8],
-                    "price": float(r[9]) if r[9] is not None else 0.0,
-                    "movie_title": r[10],
+                    "booking_item_id": r[1],
+                    "movie_id": r[2],
+                    "seats_booked": r[3],
+                    "price": float(r[4]) if r[4] is not None else 0.0,
+                    "movie_title": r[5],
                 }
-                bookings_by_id[booking_id]["items"].append(item)
-                bookings_by_id[booking_id]["total_amount"] += item["price"]
-                bookings_by_id[booking_id]["total_seats"] += (item["seats_booked"] or 0)
+                booking = bookings_by_id[r[0]]
+                booking["items"].append(item)
+                booking["total_amount"] += item["price"]
+                booking["total_seats"] += (item["seats_booked"] or 0)
 
-        data = list(bookings_by_id.values())
-        return jsonify(data)
+        response = jsonify(list(bookings_by_id.values()))
+        if has_more:
+            last = rows[-1]
+            response.headers['X-Next-Cursor'] = encode_cursor(last[2], last[0])
+        return response
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
     finally:
@@ -101,53 +317,71 @@ def list_all_bookings():
         conn.close()
 
 
+USER_BOOKINGS_SQL = """
+    SELECT b.booking_id, b.user_id, b.booking_date, b.status,
+           bi.booking_item_id, bi.movie_id, bi.seats_booked, bi.price,
+           m.title AS movie_title
+    FROM bookings b
+    LEFT JOIN booking_items bi ON bi.booking_id = b.booking_id
+    LEFT JOIN movies m ON m.movie_id = bi.movie_id
+    WHERE b.user_id=%s
+    ORDER BY b.booking_date DESC, b.booking_id DESC
+"""
+
+ARCHIVED_USER_BOOKINGS_SQL = """
+    SELECT b.booking_id, b.user_id, b.booking_date, b.status,
+           bi.booking_item_id, bi.movie_id, bi.seats_booked, bi.price,
+           COALESCE(m.title, ma.title) AS movie_title
+    FROM bookings_archive b
+    LEFT JOIN booking_items_archive bi ON bi.booking_id = b.booking_id
+    LEFT JOIN movies m ON m.movie_id = bi.movie_id
+    LEFT JOIN movies_archive ma ON ma.movie_id = bi.movie_id
+    WHERE b.user_id=%s
+    ORDER BY b.booking_date DESC, b.booking_id DESC
+"""
+
+
+def group_user_bookings(rows):
+    """Fold USER_BOOKINGS_SQL rows (one per item) into bookings with items and totals."""
+    by_id = {}
+    for r in rows:
+        booking_id = r[0]
+        if booking_id not in by_id:
+            by_id[booking_id] = {
+                "booking_id": booking_id,
+                "user_id": r[1],
+                "booking_date": r[2].isoformat() if hasattr(r[2], 'isoformat') else str(r[2]),
+                "status": r[3],
+                "items": [],
+                "total_amount": 0.0,
+                "total_seats": 0,
+            }
+        if r[4] is not None:
+            item = {
+                "booking_item_id": r[4],
+                "movie_id": r[5],
+                "seats_booked": r[6],
+                "price": float(r[7]) if r[7] is not None else 0.0,
+                "movie_title": r[8],
+            }
+            by_id[booking_id]["items"].append(item)
+            by_id[booking_id]["total_amount"] += item["price"]
+            by_id[booking_id]["total_seats"] += (item["seats_booked"] or 0)
+    return list(by_id.values())
+
+
 @bookings_bp.route('/user/<int:user_id>', methods=['GET'])
 def list_user_bookings(user_id: int):
-    """List bookings for a specific user with item details."""
+    """List bookings for a specific user with item details; ?include_archived=1 adds archived ones."""
     conn = get_db()
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            SELECT b.booking_id, b.user_id, b.booking_date, b.status,
-                   bi.booking_item_id, bi.movie_id, bi.seats_booked, bi.price,
-                   m.title AS movie_title
-            FROM bookings b
-            LEFT JOIN booking_items bi ON bi.booking_id = b.booking_id
-            LEFT JOIN movies m ON m.movie_id = bi.movie_id
-            WHERE b.user_id=%s
-            ORDER BY b.booking_date DESC, b.booking_id DESC
-            """,
-            (user_id,)
-        )
-
+        cursor.execute(USER_BOOKINGS_SQL, (user_id,))
         rows = cursor.fetchall()
-        by_id = {}
-        for r in rows:
-            booking_id = r[0]
-            if booking_id not in by_id:
-                by_id[booking_id] = {
-                    "booking_id": booking_id,
-                    "user_id": r[1],
-                    "booking_date": r[2].isoformat() if hasattr(r[2], 'isoformat') else str(r[2]),
-                    "status": r[3],
-                    "items": [],
-                    "total_amount": 0.0,
-                    "total_seats": 0,
-                }
-            if r[4] is not None:
-                item = {
-                    "booking_item_id": r[4],
-                    "movie_id": r[5],
-                    "seats_booked": r[6],
-                    "price": float(r[7]) if r[7] is not None else 0.0,
-                    "movie_title": r[8],
-                }
-                by_id[booking_id]["items"].append(item)
-                by_id[booking_id]["total_amount"] += item["price"]
-                by_id[booking_id]["total_seats"] += (item["seats_booked"] or 0)
-
-        return jsonify(list(by_id.values()))
+        if include_archived(request.args):
+            cursor.execute(ARCHIVED_USER_BOOKINGS_SQL, (user_id,))
+            rows = merge_newest(rows, cursor.fetchall(), _newest_first)
+        return jsonify(group_user_bookings(rows))
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
     finally:
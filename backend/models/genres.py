@@ -1,47 +1,43 @@
-from flask import Blueprint, request, jsonify
-from db import get_db
+from flask import Blueprint, Response, current_app, request, jsonify
+from db import dict_from_cursor, get_db
+from auth import admin_required
+from cache import GENRES_KEY, catalog_cache, movies_key
 
 genres_bp = Blueprint('genres', __name__)
 
-def dict_from_cursor(cursor):
-    cols = [c[0] for c in cursor.description]
-    rows = cursor.fetchall()
-    return [dict(zip(cols, r)) for r in rows]
-
 @genres_bp.route('/', methods=['GET'])
 def get_genres():
-    conn = get_db()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT * FROM genres")
-        data = dict_from_cursor(cursor)
-        return jsonify(data)
-    finally:
-        cursor.close()
-        conn.close()
+    return Response(genres_body(), mimetype='application/json')
+
+def genres_body():
+    """The serialized genre list, from the catalog cache."""
+    body = catalog_cache.get(GENRES_KEY)
+    if body is None:
+        generation = catalog_cache.generation
+        conn = get_db()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT * FROM genres")
+            body = current_app.json.dumpb(dict_from_cursor(cursor))
+        finally:
+            cursor.close()
+            conn.close()
+        catalog_cache.set(GENRES_KEY, body, generation)
+    return body
 
 @genres_bp.route('', methods=['POST'])
+@admin_required
 def add_genre():
     data = request.get_json()
-    admin_email = data.get('admin_email')
-    admin_password = data.get('admin_password')
-    
-    if not (admin_email and admin_password):
-        return jsonify({"success": False, "message": "Admin credentials required"}), 401
-    
     name = data.get("name")
 
     conn = get_db()
     cursor = conn.cursor()
     try:
-        # Verify admin credentials
-        cursor.execute("SELECT is_admin FROM users WHERE email=%s AND password=%s", (admin_email, admin_password))
-        r = cursor.fetchone()
-        if not r or r[0] != 1:
-            return jsonify({"success": False, "message": "Not authorized"}), 403
-        
         cursor.execute("INSERT INTO genres (name) VALUES (%s)", (name,))
+        version = catalog_cache.bump_version(cursor)
         conn.commit()
+        catalog_cache.invalidate(GENRES_KEY, version=version)
         return jsonify({"success": True, "message": "Genre added"})
     except Exception as e:
         conn.rollback()
@@ -51,22 +47,12 @@ def add_genre():
         conn.close()
 
 @genres_bp.route('/<int:genre_id>', methods=['PUT', 'DELETE'])
+@admin_required
 def modify_genre(genre_id):
     conn = get_db()
     cursor = conn.cursor()
     try:
         data = request.get_json() if request.method == "PUT" else request.args
-        admin_email = data.get('admin_email')
-        admin_password = data.get('admin_password')
-        
-        if not (admin_email and admin_password):
-            return jsonify({"success": False, "message": "Admin credentials required"}), 401
-        
-        # Verify admin credentials
-        cursor.execute("SELECT is_admin FROM users WHERE email=%s AND password=%s", (admin_email, admin_password))
-        r = cursor.fetchone()
-        if not r or r[0] != 1:
-            return jsonify({"success": False, "message": "Not authorized"}), 403
 
         if request.method == "PUT":
             name = data.get("name")
@@ -75,14 +61,19 @@ def modify_genre(genre_id):
             cursor.execute("UPDATE genres SET name=%s WHERE genre_id=%s", (name, genre_id))
             if cursor.rowcount == 0:
                 return jsonify({"success": False, "message": "Genre not found"}), 404
+            version = catalog_cache.bump_version(cursor)
             conn.commit()
+            # Movie listings embed the genre name
+            catalog_cache.invalidate(GENRES_KEY, prefixes=(movies_key(),), version=version)
             return jsonify({"success": True, "message": "Genre updated"})
 
         else:  # DELETE
             cursor.execute("DELETE FROM genres WHERE genre_id=%s", (genre_id,))
             if cursor.rowcount == 0:
                 return jsonify({"success": False, "message": "Genre not found"}), 404
+            version = catalog_cache.bump_version(cursor)
             conn.commit()
+            catalog_cache.invalidate(GENRES_KEY, prefixes=(movies_key(),), version=version)
             return jsonify({"success": True, "message": "Genre deleted"})
 
     except Exception as e:
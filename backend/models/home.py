@@ -0,0 +1,51 @@
+from flask import Blueprint, Response, jsonify, request
+from db import get_db
+from cache import HOME_KEY, catalog_cache
+from .genres import genres_body
+from .movies import movies_body
+from .watchlist import WATCHLIST_COUNT_SQL
+
+home_bp = Blueprint('home', __name__)
+
+
+def _catalog_part():
+    """'"movies":[...],"genres":[...]' as cached bytes, shared by every visitor."""
+    part = catalog_cache.get(HOME_KEY)
+    if part is None:
+        generation = catalog_cache.generation
+        part = b'"movies":' + movies_body() + b',"genres":' + genres_body()
+        catalog_cache.set(HOME_KEY, part, generation)
+    return part
+
+
+def _watchlist_count(user_id):
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(WATCHLIST_COUNT_SQL, (user_id,))
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+        conn.close()
+
+
+@home_bp.route('', methods=['GET'])
+def home():
+    """
+    Everything the home page loads, in one response: the GET /movies/
+    listing (with rating summaries), the GET /genres/ list, and the number
+    of items in ?user_id='s watchlist (null without a user).
+    """
+    user_id = request.args.get('user_id')
+    if user_id:
+        try:
+            user_id = int(user_id)
+        except ValueError:
+            return jsonify({"success": False, "message": "user_id must be an integer"}), 400
+    try:
+        part = _catalog_part()
+        count = _watchlist_count(user_id) if user_id else None
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    body = b'{' + part + b',"watchlist_count":' + (b'null' if count is None else str(count).encode()) + b'}'
+    return Response(body, mimetype='application/json')
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from db import get_db
+from auth import issue_token
 
 login_bp = Blueprint('login', __name__)
 
@@ -18,7 +19,7 @@ def login():
         cursor = conn.cursor()
         try:
             cursor.execute(
-                "SELECT user_id, name, email, is_admin FROM users WHERE email=%s AND password=%s",
+                "SELECT user_id, name, email, is_admin, token_version FROM users WHERE email=%s AND password=%s",
                 (email, password)
             )
             row = cursor.fetchone()
@@ -30,7 +31,8 @@ def login():
                 "customer_id": row[0],  # keep key name for existing frontend
                 "name": row[1],
                 "email": row[2],
-                "is_admin": row[3]
+                "is_admin": row[3],
+                "token": issue_token(row[0], row[3], row[4])
             })
         finally:
             cursor.close()
@@ -1,5 +1,12 @@
-from flask import Blueprint, request, jsonify
-from db import get_db
+from flask import Blueprint, Response, current_app, request, jsonify
+from db import begin, get_db, row_mapper
+from auth import admin_required
+from cache import catalog_cache, movies_key
+from ratings import RATING_SELECT, attach_rating, rating_select
+from archive import MOVIE_COLUMNS, include_archived
+import seatmap
+from importer import MovieRowValidator, import_movies, iter_csv, iter_ndjson, load_genres
+from streaming import stream_query, wants_stream
 from datetime import datetime
 
 movies_bp = Blueprint('movies', __name__)
@@ -57,44 +64,103 @@ def parse_datetime(dt_string):
     # If still can't parse, return None
     return None
 
-def dict_from_cursor(cursor):
-    """Convert MySQL cursor results to a list of dictionaries"""
-    cols = [c[0] for c in cursor.description]
-    rows = cursor.fetchall()
-    return [dict(zip(cols, r)) for r in rows]
+def invalidate_movies(version, *genre_ids):
+    """Drop cached listings touched by a committed movie write."""
+    keys = [movies_key()] + [movies_key(g) for g in genre_ids if g]
+    catalog_cache.invalidate(*keys, version=version)
+
 
 @movies_bp.route('/', methods=['GET'])
 def get_movies():
     genre_id = request.args.get('genre_id')
+    if wants_stream(request.args):
+        # Bypass the cache and stream straight from the cursor
+        return stream_query(*movies_query(genre_id), transform=movie_rows)
+    if include_archived(request.args):
+        # Rarely asked for, so not cached; archived shows are marked "archived": true
+        return jsonify(_fetch_movies(genre_id) + _fetch_archived_movies(genre_id))
+    return Response(movies_body(genre_id), mimetype='application/json')
+
+
+def movies_body(genre_id=None):
+    """The serialized listing for genre_id (all movies when None), from the catalog cache."""
+    key = movies_key(genre_id)
+    body = catalog_cache.get(key)
+    if body is None:
+        generation = catalog_cache.generation
+        body = current_app.json.dumpb(_fetch_movies(genre_id))
+        catalog_cache.set(key, body, generation)
+    return body
+
+
+def movies_query(genre_id):
+    sql = (
+        f"SELECT m.*, g.name as genre, {RATING_SELECT} FROM movies m "
+        "LEFT JOIN genres g ON m.genre_id=g.genre_id "
+        "LEFT JOIN movie_ratings mr ON mr.movie_id=m.movie_id"
+    )
+    if genre_id:
+        return sql + " WHERE m.genre_id=%s", (genre_id,)
+    return sql, ()
+
+
+def archived_movies_query(genre_id):
+    sql = (
+        f"SELECT {', '.join('m.' + c for c in MOVIE_COLUMNS)}, g.name as genre, {rating_select('m')} "
+        "FROM movies_archive m LEFT JOIN genres g ON m.genre_id=g.genre_id"
+    )
+    if genre_id:
+        return sql + " WHERE m.genre_id=%s ORDER BY m.showtime", (genre_id,)
+    return sql + " ORDER BY m.showtime", ()
+
+
+def movie_rows(rows, cols):
+    """Movie dicts with the joined summary columns folded into "rating"."""
+    to_dict = row_mapper(tuple(cols))
+    for r in rows:
+        yield attach_rating(to_dict(r))
+
+
+def _fetch_movies(genre_id):
     conn = get_db()
     cursor = conn.cursor()
     try:
-        if genre_id:
-            cursor.execute(
-                "SELECT m.*, g.name as genre FROM movies m "
-                "LEFT JOIN genres g ON m.genre_id=g.genre_id WHERE m.genre_id=%s",
-                (genre_id,)
-            )
-        else:
-            cursor.execute(
-                "SELECT m.*, g.name as genre FROM movies m "
-                "LEFT JOIN genres g ON m.genre_id=g.genre_id"
-            )
-        data = dict_from_cursor(cursor)
-        return jsonify(data)
+        cursor.execute(*movies_query(genre_id))
+        cols = [c[0] for c in cursor.description]
+        return list(movie_rows(cursor.fetchall(), cols))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _fetch_archived_movies(genre_id):
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(*archived_movies_query(genre_id))
+        cols = [c[0] for c in cursor.description]
+        return [dict(movie, archived=True) for movie in movie_rows(cursor.fetchall(), cols)]
     finally:
         cursor.close()
         conn.close()
 
+@movies_bp.route('/<int:movie_id>/seats', methods=['GET'])
+def get_seat_map(movie_id):
+    """Seat occupancy for a show as a bitset + run-length payload; supports If-None-Match."""
+    seat_map = seatmap.get_seat_map(movie_id)
+    etag = seat_map.etag()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(seat_map.payload(), mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @movies_bp.route('', methods=['POST'])
+@admin_required
 def add_movie():
     data = request.get_json()
-    admin_email = data.get('admin_email')
-    admin_password = data.get('admin_password')
-    
-    if not (admin_email and admin_password):
-        return jsonify({"success": False, "message": "Admin credentials required"}), 401
-    
     title = data.get('title')
     price = data.get('price', 0)
     available_seats = data.get('available_seats', 0)
@@ -114,17 +180,13 @@ def add_movie():
     conn = get_db()
     cursor = conn.cursor()
     try:
-        # Verify admin credentials
-        cursor.execute("SELECT is_admin FROM users WHERE email=%s AND password=%s", (admin_email, admin_password))
-        r = cursor.fetchone()
-        if not r or r[0] != 1:
-            return jsonify({"success": False, "message": "Not authorized"}), 403
-        
         cursor.execute(
             "INSERT INTO movies (genre_id, title, price, available_seats, description, duration, showtime) VALUES (%s,%s,%s,%s,%s,%s,%s)",
             (genre_id, title, price, available_seats, description, duration, showtime)
         )
+        version = catalog_cache.bump_version(cursor)
         conn.commit()
+        invalidate_movies(version, genre_id)
         return jsonify({"success": True, "message": "Movie added"})
     except Exception as e:
         conn.rollback()
@@ -133,15 +195,47 @@ def add_movie():
         cursor.close()
         conn.close()
 
+@movies_bp.route('/import', methods=['POST'])
+@admin_required
+def import_movies_bulk():
+    """
+    Bulk-create movies from a streamed CSV (header row) or NDJSON body.
+
+    The format comes from ?format=csv|ndjson or the Content-Type. Columns:
+    title, genre_id or genre (name), price, available_seats, description,
+    duration, showtime. Invalid rows are reported per line and skipped;
+    valid rows are inserted in one transaction.
+    """
+    fmt = (request.args.get('format') or request.mimetype or '').lower()
+    if 'csv' in fmt:
+        rows = iter_csv(request.stream)
+    elif 'ndjson' in fmt or 'jsonl' in fmt or 'json-seq' in fmt:
+        rows = iter_ndjson(request.stream)
+    else:
+        return jsonify({"success": False, "message": "Send text/csv or application/x-ndjson (or ?format=csv|ndjson)"}), 415
+
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        validate = MovieRowValidator(load_genres(cursor))
+        begin(conn)
+        result = import_movies(cursor, rows, validate)
+        version = catalog_cache.bump_version(cursor) if result.inserted else None
+        conn.commit()
+        if result.inserted:
+            invalidate_movies(version, *result.genre_ids)
+        return jsonify({"success": True, **result.as_dict()})
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
 @movies_bp.route('/<int:movie_id>', methods=['PUT'])
+@admin_required
 def update_movie(movie_id):
     data = request.get_json()
-    admin_email = data.get('admin_email')
-    admin_password = data.get('admin_password')
-    
-    if not (admin_email and admin_password):
-        return jsonify({"success": False, "message": "Admin credentials required"}), 401
-    
     title = data.get('title')
     price = data.get('price')
     available_seats = data.get('available_seats')
@@ -162,17 +256,16 @@ def update_movie(movie_id):
     conn = get_db()
     cursor = conn.cursor()
     try:
-        # Verify admin credentials
-        cursor.execute("SELECT is_admin FROM users WHERE email=%s AND password=%s", (admin_email, admin_password))
+        cursor.execute("SELECT genre_id FROM movies WHERE movie_id=%s", (movie_id,))
         r = cursor.fetchone()
-        if not r or r[0] != 1:
-            return jsonify({"success": False, "message": "Not authorized"}), 403
-        
+        old_genre_id = r[0] if r else None
         cursor.execute(
             "UPDATE movies SET title=%s, price=%s, available_seats=%s, genre_id=%s, duration=%s, showtime=%s, description=%s WHERE movie_id=%s",
             (title, price, available_seats, genre_id, duration, showtime, description, movie_id)
         )
+        version = catalog_cache.bump_version(cursor)
         conn.commit()
+        invalidate_movies(version, genre_id, old_genre_id)
         return jsonify({"success": True, "message": "Movie updated"})
     except Exception as e:
         conn.rollback()
@@ -182,23 +275,18 @@ def update_movie(movie_id):
         conn.close()
 
 @movies_bp.route('/<int:movie_id>', methods=['DELETE'])
+@admin_required
 def delete_movie(movie_id):
-    admin_email = request.args.get("admin_email")
-    admin_password = request.args.get("admin_password")
-
-    if not (admin_email and admin_password):
-        return jsonify({"success": False, "message": "Admin credentials required"}), 401
-
     conn = get_db()
     cursor = conn.cursor()
     try:
-        cursor.execute("SELECT is_admin FROM users WHERE email=%s AND password=%s", (admin_email, admin_password))
+        cursor.execute("SELECT genre_id FROM movies WHERE movie_id=%s", (movie_id,))
         r = cursor.fetchone()
-        if not r or r[0] != 1:
-            return jsonify({"success": False, "message": "Not authorized"}), 403
-
         cursor.execute("DELETE FROM movies WHERE movie_id=%s", (movie_id,))
+        version = catalog_cache.bump_version(cursor)
         conn.commit()
+        invalidate_movies(version, r[0] if r else None)
+        seatmap.forget(movie_id)
         return jsonify({"success": True, "message": "Movie deleted"})
     except Exception as e:
         conn.rollback()
@@ -209,13 +297,8 @@ def delete_movie(movie_id):
 
 
 @movies_bp.route('/purge', methods=['POST'])
+@admin_required
 def purge_movies():
-    data = request.get_json() or {}
-    admin_email = data.get("admin_email")
-    admin_password = data.get("admin_password")
-    if not (admin_email and admin_password):
-        return jsonify({"success": False, "message": "Admin credentials required"}), 401
-
     allowed_titles = [
         'Fast & Furious X',
         'Mission Impossible 8',
@@ -228,11 +311,6 @@ def purge_movies():
     conn = get_db()
     cursor = conn.cursor()
     try:
-        cursor.execute("SELECT is_admin FROM users WHERE email=%s AND password=%s", (admin_email, admin_password))
-        r = cursor.fetchone()
-        if not r or r[0] != 1:
-            return jsonify({"success": False, "message": "Not authorized"}), 403
-
         # Delete dependent entities first for movies to be removed
         format_strings = ",".join(["%s"] * len(allowed_titles))
         # Delete booking_items referencing movies to be deleted
@@ -245,6 +323,12 @@ def purge_movies():
             f"DELETE FROM watchlist WHERE movie_id IN (SELECT movie_id FROM movies WHERE title NOT IN ({format_strings}))",
             allowed_titles,
         )
+        # Their sales totals went with the booking_items
+        for table in ("sales_by_movie", "sales_by_day"):
+            cursor.execute(
+                f"DELETE FROM {table} WHERE movie_id IN (SELECT movie_id FROM movies WHERE title NOT IN ({format_strings}))",
+                allowed_titles,
+            )
         # Delete reviews (ON DELETE CASCADE on movies covers it; explicit ok)
         cursor.execute(
             f"DELETE FROM reviews WHERE movie_id IN (SELECT movie_id FROM movies WHERE title NOT IN ({format_strings}))",
@@ -255,7 +339,9 @@ def purge_movies():
             f"DELETE FROM movies WHERE title NOT IN ({format_strings})",
             allowed_titles,
         )
+        version = catalog_cache.bump_version(cursor)
         conn.commit()
+        catalog_cache.invalidate(prefixes=(movies_key(),), version=version)
         return jsonify({"success": True, "message": "Movies purged to allowed set"})
     except Exception as e:
         conn.rollback()
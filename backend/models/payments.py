@@ -1,9 +1,12 @@
 from flask import Blueprint, request, jsonify
 from db import get_db
+from sales import record_payment
+from idempotency import idempotent, save_response
 
 payments_bp = Blueprint('payments', __name__)
 
 @payments_bp.route('', methods=['POST'])
+@idempotent("payments")
 def add_payment():
     data = request.get_json()
     booking_id = data.get('booking_id')
@@ -19,8 +22,10 @@ def add_payment():
     try:
         cursor.execute("INSERT INTO payments (booking_id, amount, method, status) VALUES (%s,%s,%s,%s)",
                        (booking_id, amount, method, status))
+        record_payment(cursor, amount, status)
+        response = save_response(cursor, jsonify({"success": True, "message": "Payment recorded"}))
         conn.commit()
-        return jsonify({"success": True, "message": "Payment recorded"})
+        return response
     except Exception as e:
         conn.rollback()
         return jsonify({"success": False, "message": str(e)}), 500
@@ -0,0 +1,285 @@
+from flask import Blueprint, request, jsonify
+from db import get_db
+from auth import admin_required
+from pagination import page_limit
+from sales import rebuild
+from .movies import parse_datetime
+
+reports_bp = Blueprint('reports', __name__)
+
+# sales_by_movie s joined to its movie, live (m) or archived (ma)
+MOVIE_SALES_FROM = """
+    FROM sales_by_movie s
+    LEFT JOIN movies m ON m.movie_id = s.movie_id
+    LEFT JOIN movies_archive ma ON ma.movie_id = s.movie_id
+    LEFT JOIN genres g ON g.genre_id = COALESCE(m.genre_id, ma.genre_id)
+"""
+CAPACITY = "s.seats_sold + COALESCE(m.available_seats, ma.available_seats, 0)"
+MOVIE_SORTS = {
+    "revenue": "s.revenue",
+    "seats_sold": "s.seats_sold",
+    "bookings": "s.bookings",
+    "occupancy": f"s.seats_sold * 1.0 / NULLIF({CAPACITY}, 0)",
+}
+
+
+def _money(value):
+    return round(float(value), 2) if value is not None else 0.0
+
+
+def _occupancy(seats_sold, capacity):
+    return round(seats_sold / capacity, 4) if capacity else None
+
+
+def _day(args, name):
+    """?name= as YYYY-MM-DD, or None; raises ValueError when unparseable."""
+    if not args.get(name):
+        return None
+    parsed = parse_datetime(args[name])
+    if not parsed:
+        raise ValueError(f"Invalid {name}")
+    return parsed[:10]
+
+
+def _showtime_filters(args):
+    where, params = [], []
+    if args.get('genre_id'):
+        where.append("COALESCE(m.genre_id, ma.genre_id) = %s")
+        params.append(int(args['genre_id']))
+    showtime_from, showtime_to = _day(args, 'showtime_from'), _day(args, 'showtime_to')
+    if showtime_from:
+        where.append("COALESCE(m.showtime, ma.showtime) >= %s")
+        params.append(showtime_from)
+    if showtime_to:
+        where.append("COALESCE(m.showtime, ma.showtime) <= %s")
+        params.append(showtime_to + " 23:59:59")
+    return ("WHERE " + " AND ".join(where) if where else ""), params
+
+
+def _query(sql, params=()):
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+@reports_bp.route('/summary', methods=['GET'])
+@admin_required
+def sales_summary():
+    """Bookings, seats and revenue, plus payments by status; ?date_from=&date_to= limit it to booking days."""
+    try:
+        date_from, date_to = _day(request.args, 'date_from'), _day(request.args, 'date_to')
+    except (ValueError, TypeError) as e:
+        return jsonify({"success": False, "message": f"Invalid query: {e}"}), 400
+    where, params = [], []
+    if date_from:
+        where.append("day >= %s")
+        params.append(date_from)
+    if date_to:
+        where.append("day <= %s")
+        params.append(date_to)
+    clause = "WHERE " + " AND ".join(where) if where else ""
+    # Whole history from the per-movie totals; a date range needs the daily rows
+    sales_table = "sales_by_day" if where else "sales_by_movie"
+    try:
+        sales = _query(f"SELECT SUM(seats_sold), SUM(revenue) FROM {sales_table} {clause}", params)[0]
+        # The sales tables count a booking once per movie in it; this counts checkouts
+        bookings = _query(f"SELECT SUM(bookings) FROM bookings_by_day {clause}", params)[0][0]
+        payments = _query(
+            f"SELECT status, SUM(payments), SUM(amount) FROM payments_by_day {clause} GROUP BY status ORDER BY status",
+            params
+        )
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    return jsonify({
+        "success": True,
+        "date_from": date_from,
+        "date_to": date_to,
+        "bookings": int(bookings or 0),
+        "seats_sold": int(sales[0] or 0),
+        "revenue": _money(sales[1]),
+        "payments": {status: {"count": int(count), "amount": _money(amount)} for status, count, amount in payments},
+    })
+
+
+@reports_bp.route('/movies', methods=['GET'])
+@admin_required
+def movie_sales():
+    """
+    Per-showtime revenue, seats sold and occupancy, best first by ?sort=
+    (revenue, seats_sold, bookings, occupancy). Filters: genre_id,
+    showtime_from, showtime_to; ?limit= caps the rows.
+    """
+    sort = request.args.get('sort', 'revenue')
+    if sort not in MOVIE_SORTS:
+        return jsonify({"success": False, "message": f"sort must be one of {', '.join(MOVIE_SORTS)}"}), 400
+    try:
+        limit = page_limit(request.args)
+        clause, params = _showtime_filters(request.args)
+    except (ValueError, TypeError) as e:
+        return jsonify({"success": False, "message": f"Invalid query: {e}"}), 400
+    try:
+        rows = _query(
+            f"""
+            SELECT s.movie_id, COALESCE(m.title, ma.title), g.genre_id, g.name,
+                   COALESCE(m.showtime, ma.showtime), s.bookings, s.seats_sold, s.revenue, {CAPACITY},
+                   ma.movie_id IS NOT NULL
+            {MOVIE_SALES_FROM}
+            {clause}
+            ORDER BY {MOVIE_SORTS[sort]} DESC, s.movie_id
+            LIMIT %s
+            """,
+            params + [limit]
+        )
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    return jsonify([{
+        "movie_id": r[0],
+        "title": r[1],
+        "genre_id": r[2],
+        "genre": r[3],
+        "showtime": r[4].isoformat() if hasattr(r[4], 'isoformat') else r[4],
+        "bookings": r[5],
+        "seats_sold": r[6],
+        "revenue": _money(r[7]),
+        "capacity": r[8],
+        "occupancy": _occupancy(r[6], r[8]),
+        "archived": bool(r[9]),
+    } for r in rows])
+
+
+@reports_bp.route('/genres', methods=['GET'])
+@admin_required
+def genre_sales():
+    """Revenue, seats sold and occupancy per genre; accepts the /reports/movies showtime filters."""
+    try:
+        clause, params = _showtime_filters(request.args)
+    except (ValueError, TypeError) as e:
+        return jsonify({"success": False, "message": f"Invalid query: {e}"}), 400
+    try:
+        rows = _query(
+            f"""
+            SELECT g.genre_id, g.name, COUNT(*), SUM(s.bookings), SUM(s.seats_sold), SUM(s.revenue), SUM({CAPACITY})
+            {MOVIE_SALES_FROM}
+            {clause}
+            GROUP BY g.genre_id, g.name
+            ORDER BY SUM(s.revenue) DESC
+            """,
+            params
+        )
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    return jsonify([{
+        "genre_id": r[0],
+        "genre": r[1],
+        "movies": r[2],
+        "bookings": int(r[3] or 0),
+        "seats_sold": int(r[4] or 0),
+        "revenue": _money(r[5]),
+        "capacity": int(r[6] or 0),
+        "occupancy": _occupancy(int(r[4] or 0), int(r[6] or 0)),
+    } for r in rows])
+
+
+@reports_bp.route('/showtimes', methods=['GET'])
+@admin_required
+def showtime_sales():
+    """Revenue, seats sold and occupancy per showtime date; accepts the /reports/movies filters."""
+    try:
+        clause, params = _showtime_filters(request.args)
+    except (ValueError, TypeError) as e:
+        return jsonify({"success": False, "message": f"Invalid query: {e}"}), 400
+    try:
+        rows = _query(
+            f"""
+            SELECT DATE(COALESCE(m.showtime, ma.showtime)) AS show_date, COUNT(*),
+                   SUM(s.bookings), SUM(s.seats_sold), SUM(s.revenue), SUM({CAPACITY})
+            {MOVIE_SALES_FROM}
+            {clause}
+            GROUP BY DATE(COALESCE(m.showtime, ma.showtime))
+            ORDER BY show_date
+            """,
+            params
+        )
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    return jsonify([{
+        "date": r[0].isoformat() if hasattr(r[0], 'isoformat') else r[0],
+        "shows": r[1],
+        "bookings": int(r[2] or 0),
+        "seats_sold": int(r[3] or 0),
+        "revenue": _money(r[4]),
+        "capacity": int(r[5] or 0),
+        "occupancy": _occupancy(int(r[3] or 0), int(r[5] or 0)),
+    } for r in rows])
+
+
+@reports_bp.route('/daily', methods=['GET'])
+@admin_required
+def daily_sales():
+    """
+    Sales and successful payments per booking day, newest first. Filters:
+    date_from, date_to, movie_id (sales only); ?limit= caps the days.
+    "bookings" counts checkouts, or with movie_id the bookings of that movie.
+    """
+    try:
+        limit = page_limit(request.args, maximum=1000)
+        date_from, date_to = _day(request.args, 'date_from'), _day(request.args, 'date_to')
+        movie_id = int(request.args['movie_id']) if request.args.get('movie_id') else None
+    except (ValueError, TypeError) as e:
+        return jsonify({"success": False, "message": f"Invalid query: {e}"}), 400
+    where, params = [], []
+    if date_from:
+        where.append("day >= %s")
+        params.append(date_from)
+    if date_to:
+        where.append("day <= %s")
+        params.append(date_to)
+    sales_where = where + (["movie_id = %s"] if movie_id else [])
+    sales_params = params + ([movie_id] if movie_id else [])
+    try:
+        sales = _query(
+            f"""
+            SELECT day, SUM(bookings), SUM(seats_sold), SUM(revenue) FROM sales_by_day
+            {"WHERE " + " AND ".join(sales_where) if sales_where else ""}
+            GROUP BY day ORDER BY day DESC LIMIT %s
+            """,
+            sales_params + [limit]
+        )
+        payments, checkouts = {}, {}
+        if sales and not movie_id:
+            # A booking covering several movies is one checkout (sales_by_day counts it per movie)
+            rows = _query("SELECT day, bookings FROM bookings_by_day WHERE day BETWEEN %s AND %s",
+                          (sales[-1][0], sales[0][0]))
+            checkouts = dict(rows)
+        if sales:
+            rows = _query(
+                "SELECT day, payments, amount FROM payments_by_day WHERE status = 'success' AND day BETWEEN %s AND %s",
+                (sales[-1][0], sales[0][0])
+            )
+            payments = {day: (count, amount) for day, count, amount in rows}
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    return jsonify([{
+        "date": day.isoformat() if hasattr(day, 'isoformat') else day,
+        "bookings": int((bookings if movie_id else checkouts.get(day)) or 0),
+        "seats_sold": int(seats or 0),
+        "revenue": _money(revenue),
+        "payments": payments.get(day, (0, 0))[0],
+        "paid_amount": _money(payments.get(day, (0, 0))[1]),
+    } for day, bookings, seats, revenue in sales])
+
+
+@reports_bp.route('/rebuild', methods=['POST'])
+@admin_required
+def rebuild_reports():
+    """Recompute the aggregates from the booking and payment history."""
+    try:
+        result = rebuild()
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    return jsonify({"success": True, **result})
@@ -1,23 +1,48 @@
 from flask import Blueprint, jsonify, request
-from db import get_db
+from db import column_names, get_db, row_mapper
+from cache import catalog_cache, movies_key
+from pagination import PAGINATION_ERRORS, after_cursor, encode_cursor, page_limit
+from ratings import parse_rating, record_rating
+from archive import include_archived, merge_newest
 
 reviews_bp = Blueprint('reviews', __name__)
 
 
 @reviews_bp.route('/<int:movie_id>', methods=['GET'])
 def get_reviews(movie_id):
+    """
+    One page of a movie's reviews, newest first.
+
+    Keyset-paginated on (review_date, review_id) via ?limit= and ?cursor=;
+    the cursor for the next page is returned in X-Next-Cursor. Reviews of
+    an archived show are only read with ?include_archived=1.
+    """
+    try:
+        limit = page_limit(request.args)
+        clause, cursor_params = after_cursor(request.args, "r.review_date", "r.review_id")
+    except PAGINATION_ERRORS as e:
+        return jsonify({"success": False, "message": f"Invalid query: {e}"}), 400
+
     conn = get_db()
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            "SELECT r.review_id, r.rating, r.comment, r.review_date, u.name FROM reviews r "
-            "LEFT JOIN users u ON r.user_id=u.user_id WHERE r.movie_id=%s",
-            (movie_id,)
-        )
-        cols = [c[0] for c in cursor.description]
-        rows = cursor.fetchall()
-        data = [dict(zip(cols, r)) for r in rows]
-        return jsonify(data)
+        tables = ("reviews", "reviews_archive") if include_archived(request.args) else ("reviews",)
+        rows = []
+        for table in tables:
+            cursor.execute(
+                f"SELECT r.review_id, r.rating, r.comment, r.review_date, u.name FROM {table} r "
+                "LEFT JOIN users u ON r.user_id=u.user_id WHERE r.movie_id=%s"
+                + (f" AND {clause}" if clause else "")
+                + " ORDER BY r.review_date DESC, r.review_id DESC LIMIT %s",
+                (movie_id, *cursor_params, limit + 1)
+            )
+            rows = merge_newest(rows, cursor.fetchall(), lambda r: (r[3], r[0]), limit + 1)
+        data = list(map(row_mapper(column_names(cursor)), rows[:limit]))
+        response = jsonify(data)
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            response.headers['X-Next-Cursor'] = encode_cursor(last[3], last[0])
+        return response
     finally:
         cursor.close()
         conn.close()
@@ -33,15 +58,28 @@ def add_review():
 
     if not all([user_id, movie_id, rating is not None]):
         return jsonify({"success": False, "message": "user_id, movie_id, and rating required"}), 400
+    try:
+        rating = parse_rating(rating)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
 
     conn = get_db()
     cursor = conn.cursor()
     try:
+        cursor.execute("SELECT genre_id FROM movies WHERE movie_id=%s", (movie_id,))
+        movie = cursor.fetchone()
+        if not movie:
+            return jsonify({"success": False, "message": "Movie not found"}), 404
         cursor.execute(
             "INSERT INTO reviews (user_id, movie_id, rating, comment) VALUES (%s,%s,%s,%s)",
             (user_id, movie_id, rating, comment)
         )
+        # Summary row changes in the same transaction as the review
+        record_rating(cursor, movie_id, rating)
         conn.commit()
+        # Listings embed the rating summary. Only this worker's listings of the movie are
+        # dropped; other workers show the new rating within CACHE_CONFIG["catalog_max_age"]
+        catalog_cache.invalidate(movies_key(), movies_key(movie[0]))
         return jsonify({"success": True, "message": "Review submitted"})
     except Exception as e:
         conn.rollback()
@@ -49,5 +87,3 @@ def add_review():
     finally:
         cursor.close()
         conn.close()
-
-
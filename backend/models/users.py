@@ -1,35 +1,19 @@
 from flask import Blueprint, request, jsonify
 from db import get_db
+from auth import admin_required, revoke_user_sessions
+from streaming import stream_query
 
 users_bp = Blueprint('users', __name__)
 
 
-def dict_from_cursor(cursor):
-    cols = [c[0] for c in cursor.description]
-    rows = cursor.fetchall()
-    return [dict(zip(cols, r)) for r in rows]
-
-
 @users_bp.route('', methods=['POST'])
+@admin_required
 def add_user():
     data = request.get_json()
-    admin_email = data.get("admin_email")
-    admin_password = data.get("admin_password")
-
-    if not (admin_email and admin_password):
-        return jsonify({"success": False, "message": "Admin credentials required"}), 401
 
     conn = get_db()
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            "SELECT is_admin FROM users WHERE email=%s AND password=%s",
-            (admin_email, admin_password)
-        )
-        row = cursor.fetchone()
-        if not row or row[0] != 1:
-            return jsonify({"success": False, "message": "Not authorized"}), 403
-
         name = data.get("name")
         email = data.get("email")
         password = data.get("password")
@@ -57,50 +41,24 @@ def add_user():
 
 
 @users_bp.route('/', methods=['GET'])
+@admin_required
 def get_users():
-    admin_email = request.args.get('admin_email')
-    admin_password = request.args.get('admin_password')
-    if not (admin_email and admin_password):
-        return jsonify({"success": False, "message": "Admin credentials required"}), 401
-
-    conn = get_db()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT is_admin FROM users WHERE email=%s AND password=%s", (admin_email, admin_password))
-        r = cursor.fetchone()
-        if not r or r[0] != 1:
-            return jsonify({"success": False, "message": "Not authorized"}), 403
-
-        cursor.execute("SELECT user_id, name, email, is_admin FROM users")
-        data = dict_from_cursor(cursor)
-        return jsonify(data)
-    finally:
-        cursor.close()
-        conn.close()
+    # Streamed in batches so memory stays flat however many users exist
+    return stream_query("SELECT user_id, name, email, is_admin FROM users")
 
 
 @users_bp.route('/<int:user_id>', methods=['DELETE'])
+@admin_required
 def delete_user(user_id):
-    admin_email = request.args.get("admin_email")
-    admin_password = request.args.get("admin_password")
-    if not (admin_email and admin_password):
-        return jsonify({"success": False, "message": "Admin credentials required"}), 401
-
     conn = get_db()
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            "SELECT is_admin FROM users WHERE email=%s AND password=%s",
-            (admin_email, admin_password)
-        )
-        row = cursor.fetchone()
-        if not row or row[0] != 1:
-            return jsonify({"success": False, "message": "Not authorized"}), 403
-
         cursor.execute("DELETE FROM users WHERE user_id=%s", (user_id,))
         if cursor.rowcount == 0:
             return jsonify({"success": False, "message": "User not found"}), 404
 
+        # No row left to check tokens against; this only drops the local cache entries
+        revoke_user_sessions(cursor, user_id)
         conn.commit()
         return jsonify({"success": True, "message": "User deleted"})
     except Exception as e:
@@ -112,12 +70,9 @@ def delete_user(user_id):
 
 
 @users_bp.route('/<int:user_id>', methods=['PUT'])
+@admin_required
 def update_user(user_id):
     data = request.get_json()
-    admin_email = data.get("admin_email")
-    admin_password = data.get("admin_password")
-    if not (admin_email and admin_password):
-        return jsonify({"success": False, "message": "Admin credentials required"}), 401
 
     name = data.get('name')
     email = data.get('email')
@@ -130,14 +85,6 @@ def update_user(user_id):
     conn = get_db()
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            "SELECT is_admin FROM users WHERE email=%s AND password=%s",
-            (admin_email, admin_password)
-        )
-        row = cursor.fetchone()
-        if not row or row[0] != 1:
-            return jsonify({"success": False, "message": "Not authorized"}), 403
-
         cursor.execute("SELECT user_id FROM users WHERE user_id=%s", (user_id,))
         if not cursor.fetchone():
             return jsonify({"success": False, "message": "User not found"}), 404
@@ -160,6 +107,7 @@ def update_user(user_id):
         values.append(user_id)
         query = f"UPDATE users SET {', '.join(updates)} WHERE user_id=%s"
         cursor.execute(query, values)
+        revoke_user_sessions(cursor, user_id)
         conn.commit()
         return jsonify({"success": True, "message": "User updated"})
     except Exception as e:
@@ -1,13 +1,17 @@
 from flask import Blueprint, request, jsonify
-from db import get_db
+from db import dict_from_cursor, get_db
+from seats import SeatConflict, hold_seats, parse_seat_ids, release_seats
+import seatmap
 
 watchlist_bp = Blueprint('watchlist', __name__)
 
 
-def dict_from_cursor(cursor):
-    cols = [c[0] for c in cursor.description]
-    rows = cursor.fetchall()
-    return [dict(zip(cols, r)) for r in rows]
+WATCHLIST_SQL = (
+    "SELECT w.watchlist_id AS cart_id, w.movie_id, w.seats_selected AS quantity, w.selected_seats, m.title AS name, m.price "
+    "FROM watchlist w JOIN movies m ON w.movie_id=m.movie_id WHERE w.user_id=%s"
+)
+# Index-only on idx_watchlist_user_movie; also the watchlist_count of GET /home
+WATCHLIST_COUNT_SQL = "SELECT COUNT(*) FROM watchlist WHERE user_id=%s"
 
 
 @watchlist_bp.route('/<int:user_id>', methods=['GET'])
@@ -15,11 +19,7 @@ def get_watchlist(user_id):
     conn = get_db()
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            "SELECT w.watchlist_id AS cart_id, w.movie_id, w.seats_selected AS quantity, w.selected_seats, m.title AS name, m.price "
-            "FROM watchlist w JOIN movies m ON w.movie_id=m.movie_id WHERE w.user_id=%s",
-            (user_id,)
-        )
+        cursor.execute(WATCHLIST_SQL, (user_id,))
         data = dict_from_cursor(cursor)
         return jsonify(data)
     finally:
@@ -39,29 +39,52 @@ def add_to_watchlist():
     if not (user_id and movie_id):
         return jsonify({"success": False, "message": "user_id/customer_id and movie_id/product_id required"}), 400
 
+    try:
+        seat_ids = parse_seat_ids(selected_seats)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    selected_seats = ','.join(seat_ids)
+
     conn = get_db()
     cursor = conn.cursor()
     try:
+        # Hold the chosen seats first; the seat inventory's primary key
+        # rejects seats another user already holds or booked
+        held_until = hold_seats(cursor, movie_id, user_id, seat_ids)
+
         # Check if this movie is already in watchlist
         cursor.execute("SELECT watchlist_id, seats_selected, selected_seats FROM watchlist WHERE user_id=%s AND movie_id=%s", (user_id, movie_id))
         r = cursor.fetchone()
         
         if r:
             # Update existing entry
-            new_seats = r[1] + seats_selected
             # Combine selected seats (append new ones)
             existing_seats = r[2] or ''
-            combined_seats = ','.join(filter(None, [existing_seats, selected_seats])) if selected_seats else existing_seats
+            combined = parse_seat_ids(','.join(filter(None, [existing_seats, selected_seats])))
+            combined_seats = ','.join(combined)
+            # With seat ids the quantity is the number of distinct seats, so re-adding a seat doesn't count it twice
+            new_seats = len(combined) if seat_ids else r[1] + seats_selected
             
-            cursor.execute("UPDATE watchlist SET seats_selected=%s, selected_seats=%s WHERE watchlist_id=%s", 
-                         (new_seats, combined_seats, r[0]))
+            # Refreshing added_at keeps an active cart clear of the reaper (reaper.py)
+            cursor.execute("UPDATE watchlist SET seats_selected=%s, selected_seats=%s, added_at=CURRENT_TIMESTAMP "
+                           "WHERE watchlist_id=%s", (new_seats, combined_seats, r[0]))
         else:
             # Insert new entry
+            if seat_ids:
+                seats_selected = len(seat_ids)
             cursor.execute("INSERT INTO watchlist (user_id, movie_id, seats_selected, selected_seats) VALUES (%s,%s,%s,%s)", 
                          (user_id, movie_id, seats_selected, selected_seats))
-        
+        # Returned so the home page can update its cart count without reloading /home
+        cursor.execute(WATCHLIST_COUNT_SQL, (user_id,))
+        watchlist_count = cursor.fetchone()[0]
+
         conn.commit()
-        return jsonify({"success": True, "message": "Added to watchlist"})
+        if seat_ids:
+            seatmap.mark_held(int(movie_id), user_id, seat_ids, held_until)
+        return jsonify({"success": True, "message": "Added to watchlist", "watchlist_count": watchlist_count})
+    except SeatConflict as e:
+        conn.rollback()
+        return jsonify({"success": False, "message": str(e), "seats": e.seats}), 409
     except Exception as e:
         conn.rollback()
         error_msg = str(e)
@@ -90,8 +113,14 @@ def remove_from_watchlist(watchlist_id):
     conn = get_db()
     cursor = conn.cursor()
     try:
+        cursor.execute("SELECT user_id, movie_id FROM watchlist WHERE watchlist_id=%s", (watchlist_id,))
+        r = cursor.fetchone()
+        if r:
+            release_seats(cursor, r[1], r[0])
         cursor.execute("DELETE FROM watchlist WHERE watchlist_id=%s", (watchlist_id,))
         conn.commit()
+        if r:
+            seatmap.mark_released(r[1], r[0])
         return jsonify({"success": True, "message": "Removed from watchlist"})
     except Exception as e:
         conn.rollback()
@@ -0,0 +1,43 @@
+"""
+Keyset pagination helpers.
+
+Listings ordered by (timestamp DESC, id DESC) hand out an opaque cursor
+encoding the last row's sort key; the next page continues strictly after
+it, so deep pages cost the same as the first and concurrent inserts do
+not shift rows between pages. The cursor is returned in X-Next-Cursor.
+"""
+
+import base64
+import binascii
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Errors a malformed ?limit= / ?cursor= can raise
+PAGINATION_ERRORS = (ValueError, TypeError, binascii.Error)
+
+
+def encode_cursor(sort_value, row_id):
+    return base64.urlsafe_b64encode(f"{sort_value}|{row_id}".encode()).decode()
+
+
+def decode_cursor(value):
+    sort_value, row_id = base64.urlsafe_b64decode(value.encode()).decode().rsplit("|", 1)
+    return sort_value, int(row_id)
+
+
+def page_limit(args, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """?limit= clamped to `maximum`; raises ValueError when not a positive integer."""
+    limit = min(int(args.get('limit', default)), maximum)
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return limit
+
+
+def after_cursor(args, sort_column, id_column):
+    """(where clause, params) continuing a descending keyset page, or (None, []) for page one."""
+    if not args.get('cursor'):
+        return None, []
+    sort_value, row_id = decode_cursor(args['cursor'])
+    return (f"({sort_column} < %s OR ({sort_column} = %s AND {id_column} < %s))",
+            [sort_value, sort_value, row_id])
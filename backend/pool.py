@@ -0,0 +1,218 @@
+"""
+Thread-safe database connection pool used behind db.get_db().
+
+Connections are borrowed with acquire() and handed back by calling close()
+on the returned PooledConnection, so existing handlers that do
+`conn.close()` in their `finally` blocks return connections to the pool
+instead of tearing down the socket.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from forking import on_fork
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the checkout timeout."""
+
+
+class PooledConnection:
+    """Proxy around a raw DB-API connection that returns it to the pool on close()."""
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise AttributeError(f"connection already returned to pool: {name}")
+        return getattr(raw, name)
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def invalidate(self):
+        """Close the underlying connection instead of returning it to the pool."""
+        if self._raw is not None:
+            self._pool._release(self._raw, self._created_at, discard=True)
+            self._raw = None
+
+    def close(self):
+        if self._raw is not None:
+            self._pool._release(self._raw, self._created_at)
+            self._raw = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool with bounded overflow.
+
+    - size: connections kept open while idle
+    - max_overflow: extra connections opened under load and closed on return
+    - timeout: seconds to wait for a connection before raising PoolTimeout
+    - recycle: close connections older than this many seconds (0 disables)
+    - pre_ping: check liveness on borrow for connections idle longer than ping_after
+    """
+
+    def __init__(self, connect, size=10, max_overflow=10, timeout=30.0,
+                 recycle=3600, pre_ping=True, ping_after=5.0, ping=None):
+        self._connect = connect
+        self._ping = ping or _default_ping
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.ping_after = ping_after
+        self._init_state()
+        on_fork(self._after_fork)
+
+    def _init_state(self):
+        self._pid = os.getpid()
+        self._cond = threading.Condition(threading.Lock())
+        self._idle = deque()  # (raw, created_at, returned_at)
+        self._opened = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._ping_failures = 0
+
+    def _after_fork(self):
+        # Sockets inherited from the parent belong to the parent's sessions;
+        # drop them without closing (closing would send COM_QUIT on its behalf).
+        self._init_state()
+
+    def acquire(self):
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    if self._idle:
+                        raw, created_at, returned_at = self._idle.pop()
+                        break
+                    if self._opened < self.size + self.max_overflow:
+                        self._opened += 1
+                        raw = None
+                        break
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"no database connection available within {self.timeout}s "
+                            f"({self._in_use} in use)"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+            self._in_use += 1
+            waited = time.perf_counter() - start
+            self._checkouts += 1
+            self._wait_total += waited
+            if waited > self._wait_max:
+                self._wait_max = waited
+
+        try:
+            if raw is not None:
+                raw, created_at = self._validate(raw, created_at, returned_at)
+            if raw is None:
+                raw = self._connect()
+                created_at = time.monotonic()
+        except Exception:
+            with self._cond:
+                self._opened -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, raw, created_at)
+
+    def _validate(self, raw, created_at, returned_at):
+        """Return (raw, created_at) if reusable, else (None, None) after closing it."""
+        now = time.monotonic()
+        stale = self.recycle and now - created_at > self.recycle
+        if not stale and self.pre_ping and now - returned_at > self.ping_after:
+            try:
+                self._ping(raw)
+            except Exception:
+                with self._cond:
+                    self._ping_failures += 1
+                stale = True
+        if stale:
+            _close_quietly(raw)
+            return None, None
+        return raw, created_at
+
+    def _release(self, raw, created_at, discard=False):
+        if self._pid != os.getpid():
+            return
+        if not discard:
+            try:
+                if getattr(raw, 'in_transaction', True):
+                    raw.rollback()
+            except Exception:
+                discard = True
+        with self._cond:
+            self._in_use -= 1
+            if not discard and len(self._idle) < self.size:
+                self._idle.append((raw, created_at, time.monotonic()))
+                raw = None
+            else:
+                self._opened -= 1
+            self._cond.notify()
+        if raw is not None:
+            _close_quietly(raw)
+
+    def dispose(self):
+        """Close all idle connections; checked-out ones are closed when returned."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._opened -= len(idle)
+        for raw, _, _ in idle:
+            _close_quietly(raw)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "opened": self._opened,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "ping_failures": self._ping_failures,
+                "wait_seconds_total": round(self._wait_total, 6),
+                "wait_seconds_max": round(self._wait_max, 6),
+                "wait_seconds_avg": round(self._wait_total / self._checkouts, 6) if self._checkouts else 0.0,
+            }
+
+
+def _default_ping(raw):
+    ping = getattr(raw, 'ping', None)
+    if ping is not None:
+        ping(reconnect=False)
+
+
+def _close_quietly(raw):
+    try:
+        raw.close()
+    except Exception:
+        pass
@@ -0,0 +1,65 @@
+"""
+Per-movie rating summaries.
+
+`movie_ratings` keeps a review count, the rating sum and a 1-5 histogram
+per movie. record_rating() runs in the same transaction as the review
+insert, so the summary never drifts from `reviews`; listings read it with
+a single LEFT JOIN instead of aggregating reviews per movie.
+"""
+
+from db import on_conflict_update
+
+MIN_RATING = 1
+MAX_RATING = 5
+
+
+def rating_select(alias):
+    """Summary columns of the table aliased `alias`, named for attach_rating()."""
+    return ", ".join(
+        [f"{alias}.review_count AS rating_count", f"{alias}.rating_sum AS rating_sum"]
+        + [f"{alias}.r{n} AS rating_r{n}" for n in range(MIN_RATING, MAX_RATING + 1)]
+    )
+
+
+# Columns for a LEFT JOIN movie_ratings mr; attach_rating() folds them into "rating"
+RATING_SELECT = rating_select("mr")
+_RATING_KEYS = ["rating_count", "rating_sum"] + [f"rating_r{n}" for n in range(MIN_RATING, MAX_RATING + 1)]
+
+
+def parse_rating(value):
+    """Validate a 1-5 star rating (int or digit string); raises ValueError otherwise."""
+    if isinstance(value, bool) or not str(value).strip().isdigit():
+        raise ValueError("rating must be an integer from 1 to 5")
+    rating = int(value)
+    if not MIN_RATING <= rating <= MAX_RATING:
+        raise ValueError("rating must be an integer from 1 to 5")
+    return rating
+
+
+def record_rating(cursor, movie_id, rating):
+    """Add one validated rating to the movie's summary row."""
+    column = f"r{rating}"
+    cursor.execute(
+        f"INSERT INTO movie_ratings (movie_id, review_count, rating_sum, {column}) VALUES (%s, 1, %s, 1)"
+        + on_conflict_update(
+            ["movie_id"],
+            f"review_count = review_count + 1, rating_sum = rating_sum + {rating}, {column} = {column} + 1"
+        ),
+        (movie_id, rating)
+    )
+
+
+def rating_summary(count, total, histogram):
+    count = count or 0
+    return {
+        "count": count,
+        "average": round(float(total) / count, 2) if count else None,
+        "histogram": [h or 0 for h in histogram],
+    }
+
+
+def attach_rating(row):
+    """Replace the RATING_SELECT columns of a row dict with a "rating" summary."""
+    values = [row.pop(key, None) for key in _RATING_KEYS]
+    row["rating"] = rating_summary(values[0], values[1] or 0, values[2:])
+    return row
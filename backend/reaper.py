@@ -0,0 +1,86 @@
+"""
+Expires abandoned watchlist entries and the seats they hold.
+
+add_to_watchlist refreshes watchlist.added_at on every change, so an
+entry older than REAPER_CONFIG["watchlist_ttl"] is a cart nobody has
+touched for that long. The reaper walks such entries oldest first on
+idx_watchlist_added. It deletes batch_size rows per short transaction,
+so it never holds locks for long, and releases each entry's seat holds.
+A second pass removes expired holds left in show_seats with no cart.
+It runs every `interval` seconds from the scheduler; `python reaper.py`
+runs it once.
+"""
+
+import logging
+
+import seatmap
+from config import REAPER_CONFIG
+from db import begin, for_update, get_db, seconds_ago
+from scheduler import job
+from seats import expire_holds, release_seats
+
+log = logging.getLogger(__name__)
+
+
+def _reap_batch(conn, cursor, ttl, batch_size):
+    """Delete up to batch_size expired carts in one transaction; returns [(user_id, movie_id)], seats released."""
+    begin(conn)
+    cursor.execute(
+        f"SELECT watchlist_id, user_id, movie_id FROM watchlist WHERE added_at < {seconds_ago()} "
+        "ORDER BY added_at, watchlist_id LIMIT %s" + for_update(),
+        (ttl, batch_size)
+    )
+    rows = cursor.fetchall()
+    seats = 0
+    if rows:
+        seats = sum(release_seats(cursor, movie_id, user_id) for _, user_id, movie_id in rows)
+        cursor.execute(
+            f"DELETE FROM watchlist WHERE watchlist_id IN ({','.join(['%s'] * len(rows))})",
+            [r[0] for r in rows]
+        )
+    conn.commit()
+    return [(user_id, movie_id) for _, user_id, movie_id in rows], seats
+
+
+@job("watchlist_reaper", REAPER_CONFIG["interval"])
+def reap_watchlist(ttl=None, batch_size=None, max_batches=None):
+    """Remove carts idle longer than `ttl` seconds; returns counts for this run."""
+    ttl = ttl or REAPER_CONFIG["watchlist_ttl"]
+    batch_size = batch_size or REAPER_CONFIG["batch_size"]
+    max_batches = max_batches or REAPER_CONFIG["max_batches"]
+    totals = {"carts": 0, "seats_released": 0, "expired_holds": 0, "batches": 0}
+
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        for _ in range(max_batches):
+            carts, seats = _reap_batch(conn, cursor, ttl, batch_size)
+            totals["batches"] += 1
+            totals["carts"] += len(carts)
+            totals["seats_released"] += seats
+            for user_id, movie_id in carts:
+                seatmap.mark_released(movie_id, user_id)
+            if len(carts) < batch_size:
+                break
+        for _ in range(max_batches):
+            begin(conn)
+            expired = expire_holds(cursor, batch_size)
+            conn.commit()
+            totals["expired_holds"] += len(expired)
+            if len(expired) < batch_size:
+                break
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    if totals["carts"] or totals["expired_holds"]:
+        log.info("watchlist reaper: %(carts)d carts, %(seats_released)d seats released, "
+                 "%(expired_holds)d expired holds", totals)
+    return totals
+
+
+if __name__ == "__main__":
+    print(reap_watchlist())
@@ -0,0 +1,155 @@
+"""
+Pre-aggregated sales for admin reports.
+
+  sales_by_movie    bookings, seats sold and revenue per movie (one row
+                    per showtime; genre and capacity come from the movie)
+  sales_by_day      the same per booking day and movie
+  bookings_by_day   checkouts per booking day; sales_by_* count a booking
+                    once per movie in it, so their bookings columns do not
+                    add up to this
+  payments_by_day   payment count and amount per day and payment status
+
+record_booking_items() and record_payment() run in the transactions that
+write booking_items and payments, so the totals never drift from them.
+Cancelled bookings are not counted. rebuild_sales() recomputes all four
+tables from the live and archived history, e.g. after bulk loads or
+manual fixes. Run this: py sales.py
+"""
+
+import time
+
+from db import get_db, on_conflict_update
+
+# (bookings table, booking_items table, payments table), live and archived
+HISTORY = [
+    ("bookings", "booking_items", "payments"),
+    ("bookings_archive", "booking_items_archive", "payments_archive"),
+]
+
+AGGREGATES = ("sales_by_movie", "sales_by_day", "bookings_by_day", "payments_by_day")
+
+_ADD_SALES = "bookings = bookings + 1, seats_sold = seats_sold + %s, revenue = revenue + %s"
+
+
+def record_booking_items(cursor, items):
+    """Add checkout's [(booking_id, movie_id, seats_booked, price)] booking_items rows to the totals."""
+    cursor.executemany(
+        "INSERT INTO sales_by_movie (movie_id, bookings, seats_sold, revenue) VALUES (%s, 1, %s, %s)"
+        + on_conflict_update(["movie_id"], _ADD_SALES),
+        [(movie_id, seats, price, seats, price) for _, movie_id, seats, price in items]
+    )
+    cursor.executemany(
+        "INSERT INTO sales_by_day (day, movie_id, bookings, seats_sold, revenue) VALUES (CURRENT_DATE, %s, 1, %s, %s)"
+        + on_conflict_update(["day", "movie_id"], _ADD_SALES),
+        [(movie_id, seats, price, seats, price) for _, movie_id, seats, price in items]
+    )
+    if items:
+        # One checkout, however many movies it covers
+        cursor.execute(
+            "INSERT INTO bookings_by_day (day, bookings) VALUES (CURRENT_DATE, 1)"
+            + on_conflict_update(["day"], "bookings = bookings + 1")
+        )
+
+
+def record_payment(cursor, amount, status):
+    """Add one payment recorded today to payments_by_day."""
+    amount = amount or 0
+    status = status or ''
+    cursor.execute(
+        "INSERT INTO payments_by_day (day, status, payments, amount) VALUES (CURRENT_DATE, %s, 1, %s)"
+        + on_conflict_update(["day", "status"], "payments = payments + 1, amount = amount + %s"),
+        (status, amount, amount)
+    )
+
+
+def _sales_history_sql():
+    parts = [
+        f"""
+        SELECT DATE(b.booking_date) AS day, bi.movie_id AS movie_id, COUNT(*) AS bookings,
+               SUM(COALESCE(bi.seats_booked, 0)) AS seats_sold, SUM(COALESCE(bi.price, 0)) AS revenue
+        FROM {bookings} b JOIN {items} bi ON bi.booking_id = b.booking_id
+        WHERE b.status <> 'cancelled'
+        GROUP BY DATE(b.booking_date), bi.movie_id
+        """
+        for bookings, items, _ in HISTORY
+    ]
+    return f"""
+        SELECT day, movie_id, SUM(bookings), SUM(seats_sold), SUM(revenue)
+        FROM ({" UNION ALL ".join(parts)}) s
+        GROUP BY day, movie_id
+    """
+
+
+def _bookings_history_sql():
+    parts = [
+        f"""
+        SELECT DATE(b.booking_date) AS day, COUNT(*) AS bookings
+        FROM {bookings} b
+        WHERE b.status <> 'cancelled' AND EXISTS (SELECT 1 FROM {items} bi WHERE bi.booking_id = b.booking_id)
+        GROUP BY DATE(b.booking_date)
+        """
+        for bookings, items, _ in HISTORY
+    ]
+    return f"""
+        SELECT day, SUM(bookings)
+        FROM ({" UNION ALL ".join(parts)}) b
+        GROUP BY day
+    """
+
+
+def _payments_history_sql():
+    parts = [
+        f"""
+        SELECT DATE(payment_date) AS day, COALESCE(status, '') AS status, COUNT(*) AS payments,
+               SUM(COALESCE(amount, 0)) AS amount
+        FROM {payments}
+        GROUP BY DATE(payment_date), COALESCE(status, '')
+        """
+        for _, _, payments in HISTORY
+    ]
+    return f"""
+        SELECT day, status, SUM(payments), SUM(amount)
+        FROM ({" UNION ALL ".join(parts)}) p
+        GROUP BY day, status
+    """
+
+
+def rebuild_sales(cursor):
+    """Recompute every aggregate from bookings and payments; returns row counts per table."""
+    for table in AGGREGATES:
+        cursor.execute(f"DELETE FROM {table}")
+    cursor.execute(
+        "INSERT INTO sales_by_day (day, movie_id, bookings, seats_sold, revenue) " + _sales_history_sql()
+    )
+    cursor.execute(
+        "INSERT INTO sales_by_movie (movie_id, bookings, seats_sold, revenue) "
+        "SELECT movie_id, SUM(bookings), SUM(seats_sold), SUM(revenue) FROM sales_by_day GROUP BY movie_id"
+    )
+    cursor.execute("INSERT INTO bookings_by_day (day, bookings) " + _bookings_history_sql())
+    cursor.execute("INSERT INTO payments_by_day (day, status, payments, amount) " + _payments_history_sql())
+    counts = {}
+    for table in AGGREGATES:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        counts[table] = cursor.fetchone()[0]
+    return counts
+
+
+def rebuild():
+    """rebuild_sales() in one transaction on a connection of its own."""
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        started = time.perf_counter()
+        counts = rebuild_sales(cursor)
+        conn.commit()
+        return {**counts, "seconds": round(time.perf_counter() - started, 3)}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    print(rebuild())
@@ -0,0 +1,173 @@
+"""
+In-process scheduler for periodic maintenance jobs.
+
+Modules register jobs with @job(name, interval). Each worker process runs
+one daemon thread, started on the process's first request, so it also
+starts in workers forked from a preloaded app. Only the worker holding a
+job's lease in `job_leases` runs that job. With N workers, each job still
+runs once per interval. When the lease holder dies, the lease expires and
+another worker takes over.
+
+GET /admin/jobs shows the jobs, and POST /admin/jobs/<name>/run runs one
+immediately.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+import metrics
+from config import SCHEDULER_CONFIG
+from db import IntegrityError, get_db
+from forking import on_fork
+
+log = logging.getLogger(__name__)
+
+
+class Job:
+    def __init__(self, name, interval, fn, enabled=True):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.enabled = enabled     # False: only runs when triggered by hand
+        self.next_run = 0.0        # time.monotonic() deadline in this process
+        self.runs = 0
+        self.last_run = None       # epoch seconds
+        self.last_duration = None
+        self.last_result = None
+        self.last_error = None
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "interval": self.interval,
+            "enabled": self.enabled,
+            "runs": self.runs,
+            "last_run": self.last_run,
+            "last_duration_ms": round(self.last_duration * 1000, 3) if self.last_duration is not None else None,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+
+JOBS = {}
+
+
+def job(name, interval, enabled=True):
+    """Register fn() to run every `interval` seconds; its return value is kept as last_result."""
+    def register(fn):
+        JOBS[name] = Job(name, interval, fn, enabled)
+        return fn
+    return register
+
+
+def _owner():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def acquire_lease(cursor, name, owner, seconds):
+    """Claim `name` for `seconds` unless another owner holds an unexpired lease."""
+    now = int(time.time())
+    cursor.execute(
+        "UPDATE job_leases SET owner=%s, expires_at=%s WHERE name=%s AND (expires_at < %s OR owner=%s)",
+        (owner, now + seconds, name, now, owner)
+    )
+    if cursor.rowcount:
+        return True
+    try:
+        cursor.execute("INSERT INTO job_leases (name, owner, expires_at) VALUES (%s, %s, %s)",
+                       (name, owner, now + seconds))
+        return True
+    except IntegrityError:
+        return False
+
+
+def run_job(job):
+    """Run `job` now, recording its timing and result; returns the result (raises on failure)."""
+    start = time.perf_counter()
+    job.last_run = round(time.time(), 3)
+    try:
+        result = job.fn()
+    except Exception as e:
+        job.last_duration = time.perf_counter() - start
+        job.last_error = str(e)
+        metrics.JOB_SECONDS.observe(job.last_duration, job.name, "error")
+        raise
+    job.runs += 1
+    job.last_duration = time.perf_counter() - start
+    job.last_result, job.last_error = result, None
+    metrics.JOB_SECONDS.observe(job.last_duration, job.name, "ok")
+    if isinstance(result, dict):
+        for kind, rows in result.items():
+            if isinstance(rows, int):
+                metrics.JOB_ROWS.observe(rows, job.name, kind)
+    return result
+
+
+class Scheduler:
+    def __init__(self, jobs, tick):
+        self.jobs = jobs
+        self.tick = tick
+        self._init_state()
+        on_fork(self._init_state)
+
+    def _init_state(self):
+        # Threads don't survive a fork; each child starts its own
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._owner = _owner()
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._loop, name="scheduler", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.tick):
+            now = time.monotonic()
+            for job in list(self.jobs.values()):
+                if job.enabled and now >= job.next_run:
+                    job.next_run = now + job.interval
+                    self._run_if_leased(job)
+
+    def _run_if_leased(self, job):
+        try:
+            conn = get_db()
+            cursor = conn.cursor()
+            try:
+                leased = acquire_lease(cursor, job.name, self._owner, job.interval)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+                conn.close()
+        except Exception as e:
+            log.warning("lease check for job %s failed: %s", job.name, e)
+            return
+        if not leased:
+            return
+        try:
+            run_job(job)
+        except Exception:
+            log.exception("job %s failed", job.name)
+
+
+SCHEDULER = Scheduler(JOBS, SCHEDULER_CONFIG["tick"])
+
+
+def init_app(app):
+    """Start this process's scheduler thread with its first request."""
+    if SCHEDULER_CONFIG["enabled"]:
+        app.before_request(SCHEDULER.ensure_started)
@@ -0,0 +1,223 @@
+"""
+In-memory seat maps served by GET /movies/<id>/seats.
+
+Each show keeps a bitset of taken seats (held or booked) plus the owner
+and deadline of every hold, so expiries and per-user releases can be
+applied without touching the database. Writers call mark_held /
+mark_released / mark_booked after committing; a map is also reloaded from
+show_seats every `refresh_interval` seconds to pick up changes made by
+other worker processes. The encoded payload is cached per version and
+the version doubles as the ETag. Versions come from one process-wide
+counter, so a map rebuilt after forget() never reuses an earlier ETag.
+"available" is capped by the show's
+movies.available_seats minus its active holds, matching what hold_seats
+allows.
+"""
+
+import base64
+import itertools
+import json
+import os
+import threading
+import time
+
+from config import SEAT_CONFIG
+from db import get_db
+from forking import on_fork
+from seats import ROW_LABELS, SEATS_PER_ROW, seat_index, taken_seats
+
+TOTAL_SEATS = len(ROW_LABELS) * SEATS_PER_ROW
+
+
+def _new_epoch():
+    """Distinguishes ETags issued by different processes/restarts."""
+    return f"{os.getpid():x}{int(time.time()) & 0xffffff:x}"
+
+
+_EPOCH = _new_epoch()
+_versions = itertools.count(1)
+
+
+class SeatMap:
+    def __init__(self, movie_id):
+        self.movie_id = movie_id
+        self.bits = bytearray((TOTAL_SEATS + 7) // 8)
+        self.holds = {}          # seat index -> (user_id, held_until)
+        self.seats_left = None   # movies.available_seats at the last load
+        self.version = 0
+        self.loaded_at = 0.0
+        self._payload = None     # (version, bytes)
+
+    def bump(self):
+        self.version = next(_versions)
+
+    def _set(self, idx, taken):
+        byte, mask = idx >> 3, 0x80 >> (idx & 7)
+        if taken:
+            self.bits[byte] |= mask
+        else:
+            self.bits[byte] &= ~mask & 0xff
+
+    def is_taken(self, idx):
+        return bool(self.bits[idx >> 3] & (0x80 >> (idx & 7)))
+
+    def load(self, rows, seats_left=None):
+        """Replace contents from [(seat_id, status, user_id, held_until)]; bump version if changed."""
+        bits = bytearray(len(self.bits))
+        holds = {}
+        for seat_id, status, user_id, held_until in rows:
+            idx = seat_index(seat_id)
+            bits[idx >> 3] |= 0x80 >> (idx & 7)
+            if status == 'held':
+                holds[idx] = (user_id, held_until or 0)
+        if bits != self.bits or seats_left != self.seats_left:
+            self.bump()
+        self.bits, self.holds, self.seats_left = bits, holds, seats_left
+        self.loaded_at = time.monotonic()
+
+    def expire(self, now):
+        expired = [idx for idx, (_, until) in self.holds.items() if until < now]
+        for idx in expired:
+            del self.holds[idx]
+            self._set(idx, False)
+        if expired:
+            self.bump()
+
+    def available(self, taken):
+        free = TOTAL_SEATS - taken
+        if self.seats_left is None:
+            return free
+        return max(min(free, self.seats_left - len(self.holds)), 0)
+
+    def runs(self):
+        """Run lengths of alternating free/taken seats, starting with free."""
+        runs, current, length = [], False, 0
+        for idx in range(TOTAL_SEATS):
+            taken = self.is_taken(idx)
+            if taken != current:
+                runs.append(length)
+                current, length = taken, 0
+            length += 1
+        runs.append(length)
+        return runs
+
+    def etag(self):
+        return f"{self.movie_id}-{_EPOCH}-{self.version}"
+
+    def payload(self):
+        if self._payload is None or self._payload[0] != self.version:
+            taken = sum(bin(b).count("1") for b in self.bits)
+            body = json.dumps({
+                "movie_id": self.movie_id,
+                "version": self.version,
+                "rows": len(ROW_LABELS),
+                "seats_per_row": SEATS_PER_ROW,
+                "row_labels": ROW_LABELS,
+                "taken": taken,
+                "available": self.available(taken),
+                "encoding": "bitset-msb0",
+                "bitset": base64.b64encode(bytes(self.bits)).decode(),
+                "runs": self.runs(),
+            }, separators=(",", ":")).encode()
+            self._payload = (self.version, body)
+        return self._payload[1]
+
+
+_maps = {}
+_lock = threading.Lock()
+
+
+@on_fork
+def _after_fork():
+    global _lock, _EPOCH
+    _lock = threading.Lock()
+    _maps.clear()
+    # Children of a preloaded app would otherwise share the parent's epoch and continue
+    # the same version counter, issuing equal ETags for different seat maps
+    _EPOCH = _new_epoch()
+
+
+def _load_rows(movie_id):
+    """(taken seat rows, movies.available_seats or None) for a show."""
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        rows = taken_seats(cursor, movie_id)
+        cursor.execute("SELECT available_seats FROM movies WHERE movie_id=%s", (movie_id,))
+        movie = cursor.fetchone()
+        return rows, movie[0] if movie else None
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_seat_map(movie_id):
+    """Current map for a show, reloading it when missing or older than refresh_interval."""
+    with _lock:
+        seat_map = _maps.get(movie_id)
+    now = time.monotonic()
+    if seat_map is None or now - seat_map.loaded_at > SEAT_CONFIG["map_refresh_interval"]:
+        rows, seats_left = _load_rows(movie_id)
+        with _lock:
+            seat_map = _maps.get(movie_id)
+            if seat_map is None:
+                seat_map = _maps[movie_id] = SeatMap(movie_id)
+            seat_map.load(rows, seats_left)
+    with _lock:
+        seat_map.expire(int(time.time()))
+    return seat_map
+
+
+def _update(movie_id, fn):
+    with _lock:
+        seat_map = _maps.get(movie_id)
+        if seat_map is not None:
+            fn(seat_map)
+
+
+def mark_held(movie_id, user_id, seat_ids, held_until):
+    def apply(seat_map):
+        for seat_id in seat_ids:
+            idx = seat_index(seat_id)
+            seat_map._set(idx, True)
+            seat_map.holds[idx] = (int(user_id), held_until)
+        seat_map.bump()
+    _update(movie_id, apply)
+
+
+def mark_released(movie_id, user_id, seat_ids=None):
+    """Clear the user's holds on a show (all of them when seat_ids is None)."""
+    def apply(seat_map):
+        wanted = None if seat_ids is None else {seat_index(s) for s in seat_ids}
+        released = [idx for idx, (owner, _) in seat_map.holds.items()
+                    if owner == int(user_id) and (wanted is None or idx in wanted)]
+        for idx in released:
+            del seat_map.holds[idx]
+            seat_map._set(idx, False)
+        if released:
+            seat_map.bump()
+    _update(movie_id, apply)
+
+
+def mark_booked(movie_id, seat_ids):
+    def apply(seat_map):
+        for seat_id in seat_ids:
+            idx = seat_index(seat_id)
+            seat_map.holds.pop(idx, None)
+            seat_map._set(idx, True)
+        if seat_map.seats_left is not None:
+            # The checkout took len(seat_ids) off available_seats
+            seat_map.seats_left -= len(seat_ids)
+        seat_map.bump()
+    _update(movie_id, apply)
+
+
+def forget(movie_id):
+    with _lock:
+        _maps.pop(movie_id, None)
+
+
+def forget_all():
+    """Drop every map, e.g. after a rolled-back transaction whose marks were already applied."""
+    with _lock:
+        _maps.clear()
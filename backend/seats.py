@@ -0,0 +1,238 @@
+"""
+Seat inventory per show (one show per movies row).
+
+Each taken seat is a row in `show_seats` keyed by (movie_id, seat_id), so
+the primary key is what makes double-booking impossible: two concurrent
+holds on the same seat cannot both insert. Rows are either 'held' (with a
+held_until epoch deadline) or 'booked' (tied to a booking). The grid is
+SEAT_CONFIG's rows x seats_per_row for every show, while movies.available_seats
+is the show's remaining capacity, so holds are also capped at available_seats.
+
+All functions take a cursor and leave commit/rollback to the caller, so a
+hold can share a transaction with the watchlist write and a confirm with
+the checkout.
+"""
+
+import time
+
+from config import SEAT_CONFIG
+from db import IntegrityError, for_update
+
+ROW_LABELS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"[:SEAT_CONFIG["rows"]]
+SEATS_PER_ROW = SEAT_CONFIG["seats_per_row"]
+
+
+class SeatConflict(Exception):
+    """Raised when requested seats are held or booked by someone else."""
+
+    def __init__(self, seats):
+        self.seats = sorted(seats, key=seat_index)
+        super().__init__(f"Seats already taken: {', '.join(self.seats)}")
+
+
+class NotEnoughSeats(SeatConflict):
+    """Raised when holding more seats would exceed the show's available_seats."""
+
+    def __init__(self, seats, available):
+        self.seats = sorted(seats, key=seat_index)
+        self.available = available
+        Exception.__init__(self, f"Only {available} seat(s) left for this show")
+
+
+def seat_index(seat_id):
+    """Position of a seat like 'C7' in row-major order (0-based)."""
+    return ROW_LABELS.index(seat_id[0]) * SEATS_PER_ROW + int(seat_id[1:]) - 1
+
+
+def parse_seat_ids(value):
+    """
+    Normalize 'a1, A2' / ['A1', 'A2'] into validated, de-duplicated seat ids.
+
+    The older seat picker sends '<row>-<seat>' (e.g. '3-7'); that form is
+    converted to the row-letter id ('C7').
+    """
+    if not value:
+        return []
+    parts = value.split(',') if isinstance(value, str) else value
+    seats = []
+    for part in parts:
+        seat = str(part).strip().upper()
+        if not seat:
+            continue
+        row, sep, num = seat.partition('-')
+        if sep and row.isdigit() and 1 <= int(row) <= len(ROW_LABELS):
+            seat = f"{ROW_LABELS[int(row) - 1]}{num}"
+        if (seat[0] not in ROW_LABELS or not seat[1:].isdigit()
+                or not 1 <= int(seat[1:]) <= SEATS_PER_ROW):
+            raise ValueError(f"Invalid seat: {seat}")
+        if seat not in seats:
+            seats.append(seat)
+    return seats
+
+
+def _in_clause(values):
+    return ",".join(["%s"] * len(values))
+
+
+def hold_seats(cursor, movie_id, user_id, seat_ids, ttl=None, check_capacity=True):
+    """
+    Hold seat_ids for user_id until now + ttl.
+
+    Seats the user already holds are extended, expired holds by others are
+    reclaimed, and anything held or booked by someone else raises
+    SeatConflict. The caller must roll back on SeatConflict. Returns the
+    new held_until deadline (epoch seconds). With check_capacity, holding
+    more new seats than available_seats minus the show's active holds
+    raises NotEnoughSeats.
+    """
+    if not seat_ids:
+        return None
+    now = int(time.time())
+    held_until = now + (ttl or SEAT_CONFIG["hold_ttl"])
+    placeholders = _in_clause(seat_ids)
+
+    cursor.execute(
+        f"DELETE FROM show_seats WHERE movie_id=%s AND status='held' AND held_until < %s "
+        f"AND seat_id IN ({placeholders})",
+        (movie_id, now, *seat_ids)
+    )
+    cursor.execute(
+        f"SELECT seat_id, user_id, status FROM show_seats WHERE movie_id=%s AND seat_id IN ({placeholders})",
+        (movie_id, *seat_ids)
+    )
+    taken, own = [], []
+    for seat_id, owner, status in cursor.fetchall():
+        if owner == int(user_id) and status == 'held':
+            own.append(seat_id)
+        else:
+            taken.append(seat_id)
+    if taken:
+        raise SeatConflict(taken)
+
+    if own:
+        cursor.execute(
+            f"UPDATE show_seats SET held_until=%s WHERE movie_id=%s AND user_id=%s AND status='held' "
+            f"AND seat_id IN ({_in_clause(own)})",
+            (held_until, movie_id, user_id, *own)
+        )
+    new = [s for s in seat_ids if s not in own]
+    if new and check_capacity:
+        # The movie row lock serializes concurrent holds on this show, so the count stays exact
+        cursor.execute("SELECT available_seats FROM movies WHERE movie_id=%s" + for_update(), (movie_id,))
+        row = cursor.fetchone()
+        cursor.execute(
+            "SELECT COUNT(*) FROM show_seats WHERE movie_id=%s AND status='held' AND held_until >= %s",
+            (movie_id, now)
+        )
+        available = max((row[0] or 0) - cursor.fetchone()[0], 0) if row else 0
+        if len(new) > available:
+            raise NotEnoughSeats(new, available)
+    if new:
+        try:
+            cursor.executemany(
+                "INSERT INTO show_seats (movie_id, seat_id, user_id, status, held_until) "
+                "VALUES (%s, %s, %s, 'held', %s)",
+                [(movie_id, s, user_id, held_until) for s in new]
+            )
+        except IntegrityError:
+            # Lost a race with a concurrent hold on one of these seats
+            raise SeatConflict(new)
+    return held_until
+
+
+def release_seats(cursor, movie_id, user_id, seat_ids=None):
+    """Drop the user's holds on a show (all of them, or just seat_ids). Returns rows released."""
+    if seat_ids:
+        cursor.execute(
+            f"DELETE FROM show_seats WHERE movie_id=%s AND user_id=%s AND status='held' "
+            f"AND seat_id IN ({_in_clause(seat_ids)})",
+            (movie_id, user_id, *seat_ids)
+        )
+    else:
+        cursor.execute(
+            "DELETE FROM show_seats WHERE movie_id=%s AND user_id=%s AND status='held'",
+            (movie_id, user_id)
+        )
+    return cursor.rowcount
+
+
+def confirm_seats(cursor, movie_id, user_id, seat_ids, booking_id):
+    """
+    Turn the user's holds on seat_ids into bookings for booking_id.
+
+    Holds are (re)claimed first, so an expired hold still succeeds if nobody
+    else took the seat meanwhile; otherwise SeatConflict is raised.
+    """
+    if not seat_ids:
+        return 0
+    # The checkout's guarded available_seats decrement already reserved these seats
+    hold_seats(cursor, movie_id, user_id, seat_ids, check_capacity=False)
+    cursor.execute(
+        f"UPDATE show_seats SET status='booked', booking_id=%s, held_until=NULL "
+        f"WHERE movie_id=%s AND user_id=%s AND status='held' AND seat_id IN ({_in_clause(seat_ids)})",
+        (booking_id, movie_id, user_id, *seat_ids)
+    )
+    if cursor.rowcount != len(seat_ids):
+        raise SeatConflict(seat_ids)
+    return cursor.rowcount
+
+
+def confirm_booking_seats(cursor, user_id, booking_id, seats_by_movie):
+    """
+    Confirm the user's holds across several shows for one booking.
+
+    One UPDATE covers the whole cart when every hold is still the user's;
+    otherwise each show falls back to confirm_seats(), which re-claims
+    expired holds or raises SeatConflict.
+    """
+    seats_by_movie = {m: s for m, s in seats_by_movie.items() if s}
+    if not seats_by_movie:
+        return 0
+    conditions, params = [], [booking_id, user_id]
+    for movie_id, seat_ids in seats_by_movie.items():
+        conditions.append(f"(movie_id=%s AND seat_id IN ({_in_clause(seat_ids)}))")
+        params.extend([movie_id, *seat_ids])
+    cursor.execute(
+        "UPDATE show_seats SET status='booked', booking_id=%s, held_until=NULL "
+        f"WHERE user_id=%s AND status='held' AND ({' OR '.join(conditions)})",
+        params
+    )
+    confirmed = cursor.rowcount
+    expected = sum(len(s) for s in seats_by_movie.values())
+    if confirmed != expected:
+        for movie_id, seat_ids in seats_by_movie.items():
+            cursor.execute(
+                f"SELECT seat_id FROM show_seats WHERE movie_id=%s AND user_id=%s AND booking_id=%s "
+                f"AND status='booked' AND seat_id IN ({_in_clause(seat_ids)})",
+                (movie_id, user_id, booking_id, *seat_ids)
+            )
+            done = {r[0] for r in cursor.fetchall()}
+            missing = [s for s in seat_ids if s not in done]
+            if missing:
+                confirmed += confirm_seats(cursor, movie_id, user_id, missing, booking_id)
+    return confirmed
+
+
+def expire_holds(cursor, limit=500):
+    """Delete up to `limit` expired holds; returns [(movie_id, seat_id), ...] released."""
+    now = int(time.time())
+    cursor.execute(
+        "SELECT movie_id, seat_id FROM show_seats WHERE status='held' AND held_until < %s LIMIT %s",
+        (now, limit)
+    )
+    expired = cursor.fetchall()
+    if expired:
+        cursor.executemany(
+            "DELETE FROM show_seats WHERE movie_id=%s AND seat_id=%s AND status='held' AND held_until < %s",
+            [(movie_id, seat_id, now) for movie_id, seat_id in expired]
+        )
+    return expired
+
+
+def taken_seats(cursor, movie_id):
+    """[(seat_id, status, user_id, held_until)] for seats currently held (unexpired) or booked."""
+    cursor.execute(
+        "SELECT seat_id, status, user_id, held_until FROM show_seats WHERE movie_id=%s AND (status='booked' OR held_until >= %s)",
+        (movie_id, int(time.time()))
+    )
+    return cursor.fetchall()
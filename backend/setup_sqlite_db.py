@@ -1,124 +1,56 @@
 #!/usr/bin/env python3
 """
 Setup script for SQLite database
-Converts MySQL schema to SQLite compatible format
+Applies the schema migrations, then the SQLite triggers and seed data
 """
 
-import sqlite3
 import os
-from config import DB_CONFIG
+from config import SQLITE_CONFIG
+from db import SQLiteConnection, sqlite_connect
+from migrations import migrate
 
-def setup_database():
+# SQLite equivalents of the MySQL SIGNAL triggers (see apply_triggers_simple.py).
+# RAISE() only accepts a literal message, so the seat counts are not included.
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS check_watchlist_seats_before_insert
+    BEFORE INSERT ON watchlist
+    FOR EACH ROW
+    WHEN NEW.seats_selected > (SELECT available_seats FROM movies WHERE movie_id = NEW.movie_id)
+    BEGIN
+        SELECT RAISE(ABORT, 'Cannot select more seats than are available for this movie.');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS check_watchlist_seats_before_update
+    BEFORE UPDATE ON watchlist
+    FOR EACH ROW
+    WHEN NEW.seats_selected > (SELECT available_seats FROM movies WHERE movie_id = NEW.movie_id)
+    BEGIN
+        SELECT RAISE(ABORT, 'Cannot select more seats than are available for this movie.');
+    END
+    """,
+]
+
+
+def setup_database(db_path=None):
     """Create SQLite database and tables"""
     
     # Ensure the database directory exists
-    db_path = DB_CONFIG["database"]
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    db_path = db_path or SQLITE_CONFIG["path"]
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
     
-    # Connect to SQLite database
-    conn = sqlite3.connect(db_path)
+    # Connect to SQLite database (WAL journal and tuned pragmas)
+    conn = sqlite_connect(db_path)
     cursor = conn.cursor()
     
     try:
-        # Create tables (SQLite compatible version)
+        # Tables and indexes come from the versioned migrations
+        migrate(SQLiteConnection(conn))
         
-        # Users table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name VARCHAR(100),
-                email VARCHAR(100) UNIQUE,
-                password VARCHAR(255),
-                is_admin INTEGER DEFAULT 0
-            )
-        """)
-        
-        # Genres table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS genres (
-                genre_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name VARCHAR(100) UNIQUE
-            )
-        """)
-        
-        # Movies table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS movies (
-                movie_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                genre_id INTEGER,
-                title VARCHAR(150),
-                price DECIMAL(10,2),
-                available_seats INTEGER,
-                description TEXT,
-                duration INTEGER,
-                showtime DATETIME,
-                FOREIGN KEY (genre_id) REFERENCES genres(genre_id)
-            )
-        """)
-        
-        # Watchlist table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS watchlist (
-                watchlist_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                movie_id INTEGER,
-                seats_selected INTEGER,
-                added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id),
-                FOREIGN KEY (movie_id) REFERENCES movies(movie_id)
-            )
-        """)
-        
-        # Bookings table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS bookings (
-                booking_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                booking_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                status VARCHAR(30) DEFAULT 'confirmed',
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        """)
-        
-        # Booking Items table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS booking_items (
-                booking_item_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                booking_id INTEGER,
-                movie_id INTEGER,
-                seats_booked INTEGER,
-                price DECIMAL(10,2),
-                FOREIGN KEY (booking_id) REFERENCES bookings(booking_id),
-                FOREIGN KEY (movie_id) REFERENCES movies(movie_id)
-            )
-        """)
-        
-        # Payments table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS payments (
-                payment_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                booking_id INTEGER,
-                payment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                amount DECIMAL(10,2),
-                method VARCHAR(30),
-                status VARCHAR(30),
-                FOREIGN KEY (booking_id) REFERENCES bookings(booking_id)
-            )
-        """)
-        
-        # Reviews table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS reviews (
-                review_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                movie_id INTEGER,
-                rating INTEGER,
-                comment TEXT,
-                review_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id),
-                FOREIGN KEY (movie_id) REFERENCES movies(movie_id)
-            )
-        """)
+        # Seat availability triggers
+        for trigger_sql in SQLITE_TRIGGERS:
+            cursor.execute(trigger_sql)
         
         # Insert default admin user
         cursor.execute("""
@@ -0,0 +1,230 @@
+"""
+Per-statement totals, a slow-query log and EXPLAIN capture.
+
+db.TimedCursor reports every statement here once its rows are known. The
+SQL is normalised (literals and placeholders become ?, IN lists collapse
+to (...)), so each query shape is a single entry. Every entry tracks its
+calls, total and max time, rows and calling routes. A statement slower
+than SLOW_QUERY_CONFIG["threshold_ms"] is logged with redacted parameters
+and kept in a short in-memory list. Its first few slow occurrences are
+also EXPLAINed on a background thread, using the real parameters, so the
+plan matches what ran. GET /admin/queries (models/admin.py) lists the
+entries, and like metrics.py the numbers are per process.
+"""
+
+import logging
+import queue
+import re
+import threading
+import time
+from collections import deque
+from decimal import Decimal
+from functools import lru_cache
+
+from config import SLOW_QUERY_CONFIG
+from forking import on_fork
+
+log = logging.getLogger(__name__)
+
+_LITERALS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\b\d+(?:\.\d+)?\b|%s|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+# Statements worth a plan; EXPLAIN never executes them
+EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "WITH")
+SORT_KEYS = ("total", "mean", "max", "calls", "rows")
+MAX_ENDPOINTS = 8    # calling routes remembered per statement
+OTHER = "(other statements)"
+
+
+@lru_cache(maxsize=4096)
+def normalize(sql):
+    """SQL with literals and placeholders replaced by ?, e.g. "... WHERE user_id = ? AND movie_id = ?"."""
+    text = _LITERALS.sub("?", sql)
+    text = _IN_LIST.sub("(...)", text)
+    return _SPACE.sub(" ", text).strip()
+
+
+def redact(params, many=False):
+    """Loggable form of statement parameters: numbers and NULLs kept, strings reduced to their length."""
+    if params is None:
+        return None
+    if many:
+        return f"<{len(params)} rows>" if hasattr(params, "__len__") else "<rows>"
+    if isinstance(params, dict):
+        return {k: _redact_value(v) for k, v in params.items()}
+    return [_redact_value(v) for v in params]
+
+
+def _redact_value(value):
+    if value is None or isinstance(value, (bool, int, float, Decimal)):
+        return value
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+class StatementStats:
+    __slots__ = ("sql", "operation", "table", "calls", "total", "max", "rows",
+                 "slow", "endpoints", "samples")
+
+    def __init__(self, sql, operation, table):
+        self.sql, self.operation, self.table = sql, operation, table
+        self.calls = self.slow = self.rows = 0
+        self.total = self.max = 0.0
+        self.endpoints = {}
+        self.samples = []   # slow occurrences with their EXPLAIN output
+
+    def as_dict(self):
+        return {
+            "sql": self.sql,
+            "operation": self.operation,
+            "table": self.table,
+            "calls": self.calls,
+            "slow_calls": self.slow,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total * 1000 / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+            "rows": self.rows,
+            "endpoints": dict(sorted(self.endpoints.items(), key=lambda kv: -kv[1])),
+            "explain": [dict(s) for s in self.samples],
+        }
+
+
+_SORT = {
+    "total": lambda s: s.total,
+    "mean": lambda s: s.total / s.calls if s.calls else 0.0,
+    "max": lambda s: s.max,
+    "calls": lambda s: s.calls,
+    "rows": lambda s: s.rows,
+}
+
+
+class QueryLog:
+    def __init__(self, threshold_ms, explain_samples, max_statements, recent):
+        self.threshold = threshold_ms / 1000.0
+        self.explain_samples = explain_samples
+        self.max_statements = max_statements
+        self._init_state(recent)
+        on_fork(lambda: self._init_state(recent))
+
+    def _init_state(self, recent):
+        # Also run in forked children: the EXPLAIN thread does not survive a fork
+        self._stats = {}
+        self._recent = deque(maxlen=recent)
+        self._lock = threading.Lock()
+        self._explain_queue = queue.Queue(maxsize=64)
+        self._worker = None
+
+    def record(self, sql, params, seconds, rows, operation, table, endpoint, many=False):
+        if operation == "EXPLAIN":
+            return
+        text = normalize(sql)
+        slow = seconds >= self.threshold
+        with self._lock:
+            stats = self._stats.get(text)
+            if stats is None:
+                if len(self._stats) >= self.max_statements:
+                    text = OTHER
+                    stats = self._stats.get(OTHER)
+                if stats is None:
+                    stats = self._stats[text] = StatementStats(text, operation, table)
+            stats.calls += 1
+            stats.total += seconds
+            stats.rows += rows
+            if seconds > stats.max:
+                stats.max = seconds
+            if endpoint in stats.endpoints or len(stats.endpoints) < MAX_ENDPOINTS:
+                stats.endpoints[endpoint] = stats.endpoints.get(endpoint, 0) + 1
+            sample = None
+            if slow:
+                stats.slow += 1
+                entry = {
+                    "at": round(time.time(), 3),
+                    "sql": text,
+                    "params": redact(params, many),
+                    "duration_ms": round(seconds * 1000, 3),
+                    "rows": rows,
+                    "endpoint": endpoint,
+                }
+                self._recent.append(entry)
+                if (text != OTHER and not many and operation in EXPLAINABLE
+                        and len(stats.samples) < self.explain_samples):
+                    sample = {**entry, "plan": None}
+                    stats.samples.append(sample)
+        if slow:
+            log.warning("slow query %.1fms rows=%d endpoint=%s: %s params=%s",
+                        seconds * 1000, rows, endpoint, text, entry["params"])
+        if sample is not None:
+            self._queue_explain(sample, sql, params)
+
+    def _queue_explain(self, sample, sql, params):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._explain_loop, name="slowlog-explain", daemon=True)
+                    self._worker.start()
+        try:
+            self._explain_queue.put_nowait((sample, sql, params))
+        except queue.Full:
+            sample["plan_error"] = "EXPLAIN queue full"
+
+    def _explain_loop(self):
+        while True:
+            sample, sql, params = self._explain_queue.get()
+            try:
+                sample["plan"] = explain(sql, params)
+            except Exception as e:
+                sample["plan_error"] = str(e)
+
+    def top(self, sort="total", limit=20):
+        with self._lock:
+            stats = sorted(self._stats.values(), key=_SORT[sort], reverse=True)[:limit]
+            return [s.as_dict() for s in stats]
+
+    def recent(self, limit=50):
+        with self._lock:
+            return list(self._recent)[-limit:][::-1]
+
+    def summary(self):
+        with self._lock:
+            return {
+                "threshold_ms": self.threshold * 1000,
+                "statements": len(self._stats),
+                "calls": sum(s.calls for s in self._stats.values()),
+                "slow_calls": sum(s.slow for s in self._stats.values()),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._recent.clear()
+
+
+def explain(sql, params):
+    """Plan rows for a statement, read on a connection of its own."""
+    from db import get_db, is_sqlite
+
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        prefix = "EXPLAIN QUERY PLAN " if is_sqlite() else "EXPLAIN "
+        cursor.execute(prefix + sql, params or ())
+        cols = [c[0] for c in cursor.description]
+        return [dict(zip(cols, row)) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.rollback()
+        conn.close()
+
+
+QUERY_LOG = QueryLog(
+    SLOW_QUERY_CONFIG["threshold_ms"],
+    SLOW_QUERY_CONFIG["explain_samples"],
+    SLOW_QUERY_CONFIG["max_statements"],
+    SLOW_QUERY_CONFIG["recent"],
+)
+
+
+def enabled():
+    return SLOW_QUERY_CONFIG["enabled"]
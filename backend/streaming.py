@@ -0,0 +1,92 @@
+"""
+Streaming JSON array responses for large listings.
+
+stream_query() executes the query up front (so SQL errors still produce a
+normal error response), then returns a Response whose body is produced
+from an unbuffered cursor in fetchmany() batches. Only one batch is in
+memory at a time; the connection is held until the last chunk is sent
+and released when the stream ends or the client disconnects.
+"""
+
+import logging
+
+from flask import Response, current_app
+
+from config import STREAM_CONFIG
+from db import get_db, row_mapper
+
+log = logging.getLogger(__name__)
+
+
+def rows_as_dicts(rows, cols):
+    return map(row_mapper(tuple(cols)), rows)
+
+
+def _iter_rows(cursor, batch_size):
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            return
+        yield from batch
+
+
+def stream_query(sql, params=(), transform=rows_as_dicts, batch_size=None):
+    """
+    Stream `sql` as a JSON array.
+
+    transform(rows, cols) turns the row iterator into JSON-serializable
+    objects; the default yields one dict per row. It must consume rows
+    lazily (e.g. group consecutive rows) to keep memory flat.
+    """
+    batch_size = batch_size or STREAM_CONFIG["batch_size"]
+    dumpb = current_app.json.dumpb
+    conn = get_db()
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(sql, params)
+        cols = [c[0] for c in cursor.description]
+    except Exception:
+        cursor.close()
+        conn.close()
+        raise
+
+    def generate():
+        finished = False
+        try:
+            yield b"["
+            first = True
+            chunk = []
+            size = 0
+            for obj in transform(_iter_rows(cursor, batch_size), cols):
+                piece = dumpb(obj)
+                if first:
+                    first = False
+                else:
+                    piece = b"," + piece
+                chunk.append(piece)
+                size += len(piece)
+                if size >= STREAM_CONFIG["chunk_bytes"]:
+                    yield b"".join(chunk)
+                    chunk, size = [], 0
+            chunk.append(b"]")
+            yield b"".join(chunk)
+            finished = True
+        except Exception:
+            log.exception("streaming response aborted")
+            raise
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+            if not finished and hasattr(conn, 'invalidate'):
+                # Unread rows are still pending on a MySQL connection
+                conn.invalidate()
+            else:
+                conn.close()
+
+    return Response(generate(), mimetype='application/json')
+
+
+def wants_stream(args):
+    return args.get('stream', '').lower() in ('1', 'true', 'yes')
@@ -0,0 +1,107 @@
+"""
+Shared fixtures: every test runs the Flask app against a fresh, seeded
+SQLite database (setup_sqlite_db.py), so no MySQL server is needed.
+
+Run this from backend/: py -m pytest -q tests
+"""
+
+import os
+import sys
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+# config.py reads these at import time
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="tests-"), "unused.db")
+os.environ["SCHEDULER_ENABLED"] = "0"
+os.environ.setdefault("SECRET_KEY", "tests")
+
+import pytest  # noqa: E402
+
+import auth  # noqa: E402
+import db  # noqa: E402
+import idempotency  # noqa: E402
+import seatmap  # noqa: E402
+from cache import catalog_cache  # noqa: E402
+from config import SQLITE_CONFIG  # noqa: E402
+from setup_sqlite_db import setup_database  # noqa: E402
+
+
+def _drop_thread_connection():
+    raw = getattr(db._local, "conn", None)
+    if raw is not None:
+        raw.close()
+        db._local.conn = None
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """A seeded database file that get_db() uses for this test only."""
+    path = str(tmp_path / "test.db")
+    monkeypatch.setitem(SQLITE_CONFIG, "path", path)
+    _drop_thread_connection()
+    setup_database(path)
+    catalog_cache.clear()
+    seatmap.forget_all()
+    idempotency.STORE._done.clear()
+    auth._cache.clear()
+    yield path
+    _drop_thread_connection()
+
+
+@pytest.fixture
+def app(db_path):
+    from app import app
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_headers(query):
+    """Authorization header for the seeded admin user."""
+    user_id, token_version = query("SELECT user_id, token_version FROM users WHERE is_admin=1")[0]
+    return {"Authorization": f"Bearer {auth.issue_token(user_id, 1, token_version)}"}
+
+
+@pytest.fixture
+def query(db_path):
+    """query(sql, params) -> all rows, on a connection of its own."""
+    def run(sql, params=()):
+        conn = db.get_db()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.commit()
+            conn.close()
+    return run
+
+
+# (booking_id, user_id, booking_date, status, movie_id); 3 and 4 share a timestamp
+BOOKINGS = [
+    (1, 1, "2025-01-01 10:00:00", "confirmed", 1),
+    (2, 2, "2025-01-02 10:00:00", "cancelled", 2),
+    (3, 1, "2025-01-03 10:00:00", "confirmed", 2),
+    (4, 2, "2025-01-03 10:00:00", "confirmed", 1),
+    (5, 1, "2025-01-05 10:00:00", "confirmed", 3),
+]
+
+
+@pytest.fixture
+def bookings(query):
+    """Five bookings of users 1 and 2, one item each, seeded directly."""
+    query("INSERT INTO users (user_id, name, email, password) VALUES (2, 'Second', 'second@example.com', 'pw')")
+    for booking_id, user_id, date, status, movie_id in BOOKINGS:
+        query("INSERT INTO bookings (booking_id, user_id, booking_date, status) VALUES (%s, %s, %s, %s)",
+              (booking_id, user_id, date, status))
+        query("INSERT INTO booking_items (booking_id, movie_id, seats_booked, price) VALUES (%s, %s, 1, 10)",
+              (booking_id, movie_id))
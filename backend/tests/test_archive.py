@@ -0,0 +1,72 @@
+"""The archiver: finished bookings and past shows move to the *_archive tables."""
+
+import pytest
+
+from archive import merge_newest, run_archive
+
+OLD, FUTURE = "2020-01-01 18:00:00", "2099-01-01 18:00:00"
+
+
+@pytest.fixture
+def past_shows(query, bookings):
+    """Movies 1 and 2 showed long ago; everything else is still to come."""
+    query("UPDATE movies SET showtime=%s", (FUTURE,))
+    query("UPDATE movies SET showtime=%s WHERE movie_id IN (1, 2)", (OLD,))
+
+
+def live_and_archived(query, table, key):
+    return ([r[0] for r in query(f"SELECT {key} FROM {table} ORDER BY {key}")],
+            [r[0] for r in query(f"SELECT {key} FROM {table}_archive ORDER BY {key}")])
+
+
+def test_finished_bookings_and_past_movies_are_moved(client, query, past_shows):
+    client.post("/reviews", json={"user_id": 1, "movie_id": 1, "rating": 4, "comment": "ok"})
+
+    totals = run_archive(after_days=30)
+
+    assert (totals["bookings"], totals["movies"]) == (4, 2)
+    assert live_and_archived(query, "bookings", "booking_id") == ([5], [1, 2, 3, 4])
+    assert live_and_archived(query, "booking_items", "booking_id") == ([5], [1, 2, 3, 4])
+    assert live_and_archived(query, "movies", "movie_id") == ([3, 4, 5, 6], [1, 2])
+    assert query("SELECT movie_id, review_count, r4 FROM movies_archive WHERE movie_id=1") == [(1, 1, 1)]
+    assert query("SELECT COUNT(*) FROM reviews_archive") == [(1,)]
+
+
+def test_a_booking_with_a_newer_show_keeps_its_old_movie_live(query, past_shows):
+    query("INSERT INTO booking_items (booking_id, movie_id, seats_booked, price) VALUES (4, 3, 1, 10)")
+
+    run_archive(after_days=30)
+
+    assert live_and_archived(query, "bookings", "booking_id") == ([4, 5], [1, 2, 3])
+    assert live_and_archived(query, "movies", "movie_id") == ([1, 3, 4, 5, 6], [2])
+
+
+def test_archived_movies_leave_the_cached_listing(client, past_shows):
+    assert len(client.get("/movies/").get_json()) == 6
+
+    run_archive(after_days=30)
+
+    assert [m["movie_id"] for m in client.get("/movies/").get_json()] == [3, 4, 5, 6]
+
+
+def test_history_includes_the_archive_only_when_asked(client, past_shows):
+    run_archive(after_days=30)
+
+    live = client.get("/bookings/user/1").get_json()
+    everything = client.get("/bookings/user/1?include_archived=1").get_json()
+
+    assert [b["booking_id"] for b in live] == [5]
+    assert [b["booking_id"] for b in everything] == [5, 3, 1]
+
+
+def test_bookings_move_in_batches(query, past_shows):
+    totals = run_archive(after_days=30, batch_size=3, max_batches=1)
+
+    assert totals["bookings"] == 3
+    assert query("SELECT COUNT(*) FROM bookings") == [(2,)]
+    # Movie 1 is still referenced by booking 4, which waits for the next run
+    assert live_and_archived(query, "movies", "movie_id")[1] == [2]
+
+
+def test_merge_newest():
+    assert merge_newest([5, 3], [4, 1], key=lambda r: r, limit=3) == [5, 4, 3]
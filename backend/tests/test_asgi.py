@@ -0,0 +1,85 @@
+"""The async serving mode (asgi.py): native routes must answer like the Flask views."""
+
+import asyncio
+import gzip
+
+import pytest
+
+pytest.importorskip("a2wsgi")
+pytest.importorskip("aiosqlite")
+
+import aiodb  # noqa: E402
+from asgi import app as asgi_app  # noqa: E402
+from pool import PoolTimeout  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool(db_path, monkeypatch):
+    # Each test runs its own event loop, so the pool and its lock are made per test
+    monkeypatch.setattr(aiodb, "_pool", None)
+    monkeypatch.setattr(aiodb, "_pool_lock", None)
+
+
+async def _request(path, headers):
+    path, _, query = path.partition("?")
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+             "query_string": query.encode(), "server": ("testserver", 80), "client": ("127.0.0.1", 1234),
+             "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()]}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    try:
+        await asgi_app(scope, receive, send)
+    finally:
+        await aiodb.close_pool()
+    start = messages[0]
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return start["status"], {k.decode(): v.decode() for k, v in start["headers"]}, body
+
+
+def get(path, **headers):
+    return asyncio.run(_request(path, headers))
+
+
+@pytest.mark.parametrize("path", ["/movies/", "/movies/?genre_id=2", "/watchlist/1", "/bookings/user/1"])
+def test_native_routes_match_the_flask_views(client, bookings, path):
+    client.post("/watchlist/", json={"user_id": 1, "movie_id": 1, "selected_seats": "A1"})
+
+    status, headers, body = get(path)
+
+    assert status == 200
+    assert headers["content-type"] == "application/json"
+    assert body == client.get(path).get_data()
+
+
+def test_other_routes_go_through_flask(client):
+    status, _, body = get("/genres/")
+
+    assert status == 200
+    assert body == client.get("/genres/").get_data()
+
+
+def test_native_responses_are_compressed_like_sync_ones(client):
+    status, headers, body = get("/movies/", **{"Accept-Encoding": "gzip"})
+
+    assert headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in headers["vary"]
+    assert gzip.decompress(body) == client.get("/movies/").get_data()
+
+
+def test_pool_timeout_is_a_503(monkeypatch):
+    async def busy(*args, **kwargs):
+        raise PoolTimeout("busy")
+
+    monkeypatch.setattr(aiodb, "fetch_all", busy)
+
+    status, _, body = get("/watchlist/1")
+
+    assert status == 503
+    assert b"Database busy" in body
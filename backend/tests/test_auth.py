@@ -0,0 +1,85 @@
+"""Session tokens from /auth/login and the admin_required check."""
+
+from config import AUTH_CONFIG
+
+ADMIN = {"email": "admin@moviebooking.com", "password": "admin123"}
+ADMIN_ONLY = "/admin/jobs"
+
+
+def login(client, credentials=ADMIN):
+    return client.post("/auth/login", json=credentials)
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def add_user(client, admin_headers, email="viewer@example.com", is_admin=0):
+    client.post("/users", headers=admin_headers,
+                json={"name": "Viewer", "email": email, "password": "pw", "is_admin": is_admin})
+    return login(client, {"email": email, "password": "pw"}).get_json()
+
+
+def test_login_token_opens_admin_endpoints(client):
+    response = login(client)
+
+    assert response.status_code == 200
+    token = response.get_json()["token"]
+    assert client.get(ADMIN_ONLY, headers=bearer(token)).status_code == 200
+
+
+def test_wrong_password_gets_no_token(client):
+    response = login(client, {**ADMIN, "password": "nope"})
+
+    assert response.status_code == 401
+    assert "token" not in response.get_json()
+
+
+def test_credentials_on_the_admin_call_itself_are_refused(client):
+    # Only /auth/login takes an email and password
+    assert client.get(ADMIN_ONLY, query_string={"admin_email": ADMIN["email"],
+                                                "admin_password": ADMIN["password"]}).status_code == 401
+    assert client.post("/admin/jobs/reaper/run", json={"admin_email": ADMIN["email"],
+                                                        "admin_password": ADMIN["password"]}).status_code == 401
+
+
+def test_tampered_token_is_refused(client):
+    token = login(client).get_json()["token"]
+
+    assert client.get(ADMIN_ONLY, headers=bearer(token[:-2] + "xx")).status_code == 401
+
+
+def test_non_admin_token_is_forbidden(client, admin_headers):
+    viewer = add_user(client, admin_headers)
+
+    assert client.get(ADMIN_ONLY, headers=bearer(viewer["token"])).status_code == 403
+
+
+def test_updating_a_user_revokes_their_tokens(client, admin_headers):
+    promoted = add_user(client, admin_headers, is_admin=1)
+    headers = bearer(promoted["token"])
+    assert client.get(ADMIN_ONLY, headers=headers).status_code == 200
+
+    client.put(f"/users/{promoted['customer_id']}", headers=admin_headers, json={"name": "Renamed"})
+
+    assert client.get(ADMIN_ONLY, headers=headers).status_code == 401
+    fresh = login(client, {"email": "viewer@example.com", "password": "pw"}).get_json()["token"]
+    assert client.get(ADMIN_ONLY, headers=bearer(fresh)).status_code == 200
+
+
+def test_revocation_by_another_worker_applies_after_cache_ttl(client, query, monkeypatch):
+    monkeypatch.setitem(AUTH_CONFIG, "cache_ttl", 0)
+    token = login(client).get_json()["token"]
+    assert client.get(ADMIN_ONLY, headers=bearer(token)).status_code == 200
+    # Another worker bumps token_version; this one re-reads it once its cache entry expires
+    query("UPDATE users SET token_version = token_version + 1 WHERE is_admin=1")
+
+    assert client.get(ADMIN_ONLY, headers=bearer(token)).status_code == 401
+
+
+def test_deleted_user_loses_access(client, admin_headers):
+    other = add_user(client, admin_headers, email="second@example.com", is_admin=1)
+
+    client.delete(f"/users/{other['customer_id']}", headers=admin_headers)
+
+    assert client.get(ADMIN_ONLY, headers=bearer(other["token"])).status_code == 401
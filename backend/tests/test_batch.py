@@ -0,0 +1,79 @@
+"""POST /batch, with and without "transaction"."""
+
+from cache import catalog_cache
+
+PAYMENT = {"method": "POST", "path": "/payments", "body": {"booking_id": 1, "amount": 10}}
+# Fails with 400: user 1's watchlist is empty
+EMPTY_CHECKOUT = {"method": "POST", "path": "/bookings", "body": {"customer_id": 1}}
+
+
+def test_results_come_back_in_order(client):
+    response = client.post("/batch", json={"requests": [
+        {"method": "GET", "path": "/genres/"},
+        {"method": "GET", "path": "/movies/?genre_id=2"},
+    ]})
+
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [r["status"] for r in results] == [200, 200]
+    assert len(results[0]["body"]) == 5
+    assert {m["genre_id"] for m in results[1]["body"]} == {2}
+
+
+def test_transaction_rolls_back_every_step_when_one_fails(client, query):
+    response = client.post("/batch", json={"transaction": True, "requests": [PAYMENT, PAYMENT, EMPTY_CHECKOUT]})
+
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body["failed"] == 2
+    assert [r["status"] for r in body["results"]] == [200, 200, 400]
+    assert query("SELECT COUNT(*) FROM payments") == [(0,)]
+    assert query("SELECT COUNT(*) FROM payments_by_day") == [(0,)]
+
+
+def test_transaction_commits_when_every_step_succeeds(client, query):
+    response = client.post("/batch", json={"transaction": True, "requests": [PAYMENT, PAYMENT]})
+
+    assert response.status_code == 200
+    assert query("SELECT COUNT(*) FROM payments") == [(2,)]
+
+
+def test_without_a_transaction_earlier_steps_stay_committed(client, query):
+    response = client.post("/batch", json={"requests": [PAYMENT, EMPTY_CHECKOUT, PAYMENT]})
+
+    assert response.status_code == 200
+    assert [r["status"] for r in response.get_json()["results"]] == [200, 400, 200]
+    assert query("SELECT COUNT(*) FROM payments") == [(2,)]
+
+
+def test_idempotency_keys_belong_on_a_transactional_batch(client):
+    step = {**PAYMENT, "headers": {"Idempotency-Key": "inner"}}
+
+    response = client.post("/batch", json={"transaction": True, "requests": [step]})
+
+    assert response.status_code == 400
+
+
+def test_nested_batches_are_rejected(client):
+    response = client.post("/batch", json={"requests": [{"method": "POST", "path": "/batch", "body": {}}]})
+
+    assert response.status_code == 400
+
+
+def test_rolled_back_catalog_write_leaves_the_cache_version_alone(client, query, admin_headers, monkeypatch):
+    monkeypatch.setattr(catalog_cache, "version_check_interval", 0)
+    rename = {"method": "PUT", "path": "/movies/1", "body": {"title": "Renamed", "genre_id": 1, "price": 299}}
+    client.get("/movies/")
+
+    response = client.post("/batch", headers=admin_headers,
+                           json={"transaction": True, "requests": [rename, EMPTY_CHECKOUT]})
+
+    assert response.status_code == 400
+    assert catalog_cache.stats()["version"] is None
+    # Another worker commits the catalog version the rolled-back batch had taken
+    client.get("/movies/")
+    query("INSERT INTO cache_versions (name, version) VALUES ('catalog', 1)")
+    query("UPDATE movies SET title='Elsewhere' WHERE movie_id=1")
+
+    titles = {m["movie_id"]: m["title"] for m in client.get("/movies/").get_json()}
+    assert titles[1] == "Elsewhere"
@@ -0,0 +1,89 @@
+"""LRUCache, VersionedCache and the cached GET /movies and /genres bodies."""
+
+import time
+
+from cache import LRUCache, VersionedCache, catalog_cache, movies_key
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_fill_started_before_an_invalidation_is_dropped():
+    cache = LRUCache()
+    generation = cache.generation
+    cache.delete("movies:")
+
+    cache.set("movies:", b"stale", generation)
+
+    assert cache.get("movies:") is None
+
+
+def test_entries_expire_after_max_age(monkeypatch):
+    cache = LRUCache(max_age=30)
+    cache.set("a", 1)
+    now = time.monotonic()
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_changed_shared_version_drops_local_entries():
+    cache = VersionedCache("catalog")
+    cache.apply_version(3)
+    cache.set("a", 1)
+
+    cache.apply_version(3)
+    assert cache.get_local("a") == 1
+    cache.apply_version(4)
+    assert cache.get_local("a") is None
+    assert cache.version_reloads == 1
+
+
+def test_invalidate_clears_everything_when_another_worker_bumped_in_between():
+    cache = VersionedCache("catalog", derived=("home",))
+    cache.apply_version(3)
+    for key in ("movies:", "movies:2", "genres", "home"):
+        cache.set(key, key)
+
+    cache.invalidate("movies:", version=4)
+    assert [cache.get_local(k) for k in ("movies:", "movies:2", "genres", "home")] == [None, "movies:2", "genres", None]
+
+    cache.invalidate("movies:2", version=6)
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["version"] == 6
+
+
+def test_listing_is_served_from_cache_until_a_write(client, query, admin_headers):
+    first = client.get("/movies/").get_json()
+    query("UPDATE movies SET title='Changed behind the cache' WHERE movie_id=1")
+    assert client.get("/movies/").get_json() == first
+
+    client.put("/movies/1", headers=admin_headers, json={"title": "Renamed", "genre_id": 1, "price": 299})
+
+    titles = {m["movie_id"]: m["title"] for m in client.get("/movies/").get_json()}
+    assert titles[1] == "Renamed"
+    assert query("SELECT version FROM cache_versions WHERE name='catalog'") == [(1,)]
+
+
+def test_other_workers_see_a_write_through_the_version_row(client, query, admin_headers, monkeypatch):
+    monkeypatch.setattr(catalog_cache, "version_check_interval", 0)
+    client.get("/genres/")
+    other_worker = VersionedCache("catalog", version_check_interval=0)
+    other_worker.get(movies_key())
+    other_worker.set(movies_key(), b"[]")
+
+    client.post("/genres", headers=admin_headers, json={"name": "Documentary"})
+
+    assert other_worker.get(movies_key()) is None
+    assert "Documentary" in [g["name"] for g in client.get("/genres/").get_json()]
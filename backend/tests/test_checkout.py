@@ -0,0 +1,109 @@
+"""POST /bookings: the guarded seat decrement and seat confirmation paths."""
+
+import time
+
+# Seed data (setup_sqlite_db.py): movie 1 costs 299.00 and has 50 seats
+MOVIE = 1
+
+
+def add_to_cart(client, user_id, seats):
+    return client.post("/watchlist/", json={"user_id": user_id, "movie_id": MOVIE, "selected_seats": seats})
+
+
+def seats_left(query):
+    return query("SELECT available_seats FROM movies WHERE movie_id=%s", (MOVIE,))[0][0]
+
+
+def test_checkout_books_held_seats(client, query):
+    assert add_to_cart(client, 1, "A1,A2").status_code == 200
+
+    response = client.post("/bookings", json={"customer_id": 1})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["total_seats"] == 2
+    assert body["total_amount"] == 598.0
+    assert seats_left(query) == 48
+    assert query("SELECT seat_id, status, booking_id FROM show_seats ORDER BY seat_id") == [
+        ("A1", "booked", body["order_id"]), ("A2", "booked", body["order_id"])]
+    assert query("SELECT COUNT(*) FROM watchlist") == [(0,)]
+
+
+def test_re_adding_seats_does_not_double_the_quantity(client, query):
+    add_to_cart(client, 1, "A1,A2")
+    add_to_cart(client, 1, "A2,A1")
+
+    assert query("SELECT seats_selected, selected_seats FROM watchlist") == [(2, "A1,A2")]
+    assert client.post("/bookings", json={"customer_id": 1}).get_json()["total_seats"] == 2
+
+
+def test_guarded_decrement_rolls_the_checkout_back(client, query):
+    # Two cart rows for one show each fit the seats left, but not together:
+    # the per-row check passes and the guarded UPDATE matches only one row
+    query("INSERT INTO watchlist (user_id, movie_id, seats_selected) VALUES (1, %s, 30)", (MOVIE,))
+    query("INSERT INTO watchlist (user_id, movie_id, seats_selected) VALUES (1, %s, 30)", (MOVIE,))
+
+    response = client.post("/bookings", json={"customer_id": 1})
+
+    assert response.status_code == 409
+    assert seats_left(query) == 50
+    assert query("SELECT COUNT(*) FROM bookings") == [(0,)]
+    assert query("SELECT COUNT(*) FROM sales_by_movie") == [(0,)]
+    assert query("SELECT COUNT(*) FROM watchlist") == [(2,)]
+
+
+def test_not_enough_seats_is_refused_before_writing(client, query):
+    query("UPDATE movies SET available_seats=1 WHERE movie_id=%s", (MOVIE,))
+    query("INSERT INTO watchlist (user_id, movie_id, seats_selected) VALUES (1, %s, 1)", (MOVIE,))
+    query("UPDATE movies SET available_seats=0 WHERE movie_id=%s", (MOVIE,))
+
+    response = client.post("/bookings", json={"customer_id": 1})
+
+    assert response.status_code == 409
+    assert query("SELECT COUNT(*) FROM bookings") == [(0,)]
+
+
+def test_expired_hold_is_reclaimed_at_checkout(client, query):
+    add_to_cart(client, 1, "B3")
+    query("UPDATE show_seats SET held_until=%s", (int(time.time()) - 10,))
+
+    response = client.post("/bookings", json={"customer_id": 1})
+
+    # The one-statement confirm matches no row; the per-show fallback re-holds and books the seat
+    assert response.status_code == 200
+    assert query("SELECT seat_id, status FROM show_seats") == [("B3", "booked")]
+
+
+def test_seat_taken_after_hold_expired_fails_the_checkout(client, query):
+    add_to_cart(client, 1, "C7")
+    query("UPDATE show_seats SET held_until=%s", (int(time.time()) - 10,))
+    assert add_to_cart(client, 2, "C7").status_code == 200
+
+    response = client.post("/bookings", json={"customer_id": 1})
+
+    assert response.status_code == 409
+    assert response.get_json()["seats"] == ["C7"]
+    assert seats_left(query) == 50
+    assert query("SELECT COUNT(*) FROM bookings") == [(0,)]
+    assert query("SELECT user_id, status FROM show_seats") == [(2, "held")]
+
+
+def test_holds_are_capped_at_available_seats(client, query):
+    query("UPDATE movies SET available_seats=3 WHERE movie_id=%s", (MOVIE,))
+    assert add_to_cart(client, 1, "A1,A2").status_code == 200
+
+    response = add_to_cart(client, 2, "B1,B2")
+
+    assert response.status_code == 409
+    assert client.get(f"/movies/{MOVIE}/seats").get_json()["available"] == 1
+
+
+def test_checkout_refreshes_listings_without_a_catalog_bump(client, query):
+    assert client.get("/movies/").get_json()[0]["available_seats"] == 50
+    add_to_cart(client, 1, "A1,A2")
+
+    client.post("/bookings", json={"customer_id": 1})
+
+    listed = {m["movie_id"]: m["available_seats"] for m in client.get("/movies/").get_json()}
+    assert listed[MOVIE] == 48
+    assert query("SELECT COUNT(*) FROM cache_versions WHERE name='catalog'") == [(0,)]
@@ -0,0 +1,69 @@
+"""gzip / brotli response compression (compression.py)."""
+
+import gzip
+import json
+
+import pytest
+
+import compression
+from config import COMPRESS_CONFIG, STREAM_CONFIG
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate", "gzip"),
+    ("deflate", None),
+    ("gzip;q=0, *", "gzip"),
+    ("gzip;q=0", None),
+    ("*", "gzip"),
+    ("br", None),
+    ("", None),
+])
+def test_choose_encoding_without_brotli(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, "brotli", None)
+
+    assert compression.choose_encoding(header) == expected
+
+
+def test_brotli_is_preferred_when_installed():
+    pytest.importorskip("brotli")
+
+    assert compression.choose_encoding("gzip, br") == "br"
+
+
+def test_large_json_is_gzipped(client):
+    plain = client.get("/movies/")
+    response = client.get("/movies/", headers=GZIP)
+
+    assert len(plain.get_data()) >= COMPRESS_CONFIG["min_size"]
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.get_data()) == plain.get_data()
+    assert "Content-Encoding" not in plain.headers
+
+
+def test_small_bodies_are_sent_as_is(client):
+    response = client.get("/healthz", headers=GZIP)
+
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json()["status"] == "ok"
+
+
+def test_cached_listing_reuses_the_compressed_body(client, monkeypatch):
+    client.get("/movies/", headers=GZIP)
+    monkeypatch.setattr(gzip, "compress", lambda *a, **k: pytest.fail("compressed twice"))
+
+    assert client.get("/movies/", headers=GZIP).headers["Content-Encoding"] == "gzip"
+
+
+def test_streamed_exports_are_compressed_chunk_by_chunk(client, admin_headers, bookings, monkeypatch):
+    monkeypatch.setitem(STREAM_CONFIG, "batch_size", 2)
+    response = client.get("/bookings/all?stream=1", headers={**admin_headers, **GZIP})
+
+    body = b"".join(response.response)
+    response.close()
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert [b["booking_id"] for b in json.loads(gzip.decompress(body))] == [5, 4, 3, 2, 1]
@@ -0,0 +1,46 @@
+"""forking.on_fork: per-process state is rebuilt in forked children."""
+
+import os
+
+import pytest
+
+import seatmap
+from cache import catalog_cache
+from forking import on_fork
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+
+
+def in_child(fn):
+    """Run fn() in a forked child and return what it wrote."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.write(write_fd, repr(fn()).encode())
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        output = pipe.read()
+    os.waitpid(pid, 0)
+    return output
+
+
+def test_callbacks_run_in_the_child_only():
+    calls = []
+    on_fork(lambda: calls.append(os.getpid()))
+
+    assert in_child(lambda: len(calls)) == "1"
+    assert calls == []
+
+
+def test_caches_start_empty_in_the_child(client):
+    client.get("/movies/")
+    client.get("/movies/1/seats")
+    epoch = seatmap._EPOCH
+
+    child = in_child(lambda: (catalog_cache.stats()["size"], len(seatmap._maps), seatmap._EPOCH != epoch))
+
+    assert child == "(0, 0, True)"
+    assert catalog_cache.stats()["size"] > 0
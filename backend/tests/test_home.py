@@ -0,0 +1,40 @@
+"""GET /home and the watchlist count returned by POST /watchlist/."""
+
+from cache import HOME_KEY, catalog_cache
+
+
+def add(client, movie_id, seats="", user_id=1):
+    return client.post("/watchlist/", json={"user_id": user_id, "movie_id": movie_id, "selected_seats": seats})
+
+
+def test_home_matches_the_listings(client):
+    body = client.get("/home?user_id=1").get_json()
+
+    assert body["movies"] == client.get("/movies/").get_json()
+    assert body["genres"] == client.get("/genres/").get_json()
+    assert body["watchlist_count"] == 0
+
+
+def test_count_is_null_without_a_user(client):
+    assert client.get("/home").get_json()["watchlist_count"] is None
+    assert client.get("/home?user_id=abc").status_code == 400
+
+
+def test_adding_returns_the_new_count(client):
+    assert add(client, 1, "A1").get_json()["watchlist_count"] == 1
+    assert add(client, 2).get_json()["watchlist_count"] == 2
+    # Same show again: one more seat on the existing row, not another item
+    assert add(client, 1, "A2").get_json()["watchlist_count"] == 2
+
+    assert client.get("/home?user_id=1").get_json()["watchlist_count"] == 2
+    assert add(client, 1, user_id=2).get_json()["watchlist_count"] == 1
+
+
+def test_catalog_part_is_cached_and_dropped_on_catalog_writes(client, admin_headers):
+    client.get("/home")
+    assert catalog_cache.get_local(HOME_KEY) is not None
+
+    client.put("/genres/1", headers=admin_headers, json={"name": "Thrillers"})
+
+    assert catalog_cache.get_local(HOME_KEY) is None
+    assert {"genre_id": 1, "name": "Thrillers"} in client.get("/home").get_json()["genres"]
@@ -0,0 +1,156 @@
+"""Idempotency-Key handling on POST /payments and POST /bookings."""
+
+import threading
+import time
+
+import idempotency
+
+PAYMENT = {"booking_id": 1, "amount": 10, "method": "card"}
+
+
+def pay(client, body=PAYMENT, key="pay-1"):
+    return client.post("/payments", json=body, headers={"Idempotency-Key": key})
+
+
+def test_retry_replays_the_first_response(client, query):
+    first = pay(client)
+    retry = pay(client)
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.get_json() == first.get_json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert query("SELECT COUNT(*) FROM payments") == [(1,)]
+    assert query("SELECT payments FROM payments_by_day") == [(1,)]
+
+
+def test_reusing_a_key_with_another_body_is_rejected(client, query):
+    pay(client)
+
+    response = pay(client, {**PAYMENT, "amount": 99})
+
+    assert response.status_code == 422
+    assert query("SELECT COUNT(*) FROM payments") == [(1,)]
+
+
+def test_requests_without_a_key_are_not_deduplicated(client, query):
+    client.post("/payments", json=PAYMENT)
+    client.post("/payments", json=PAYMENT)
+
+    assert query("SELECT COUNT(*) FROM payments") == [(2,)]
+
+
+def test_response_is_stored_with_the_payment(client, query, monkeypatch):
+    # The worker dies after the view returns, before the store's own bookkeeping
+    monkeypatch.setattr(idempotency.IdempotencyStore, "_finish", lambda self, claim, response: None)
+    pay(client)
+    monkeypatch.undo()
+    idempotency.STORE._done.clear()
+    # Old enough for a retry to take over an abandoned claim
+    query("UPDATE idempotency_keys SET created_at = created_at - 3600")
+
+    retry = pay(client)
+
+    assert retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert query("SELECT COUNT(*) FROM payments") == [(1,)]
+
+
+def test_client_errors_are_replayed(client, query):
+    client.post("/watchlist/", json={"user_id": 1, "movie_id": 1, "selected_seats": "A1"})
+    query("UPDATE show_seats SET user_id=2")  # someone else holds the seat now
+
+    headers = {"Idempotency-Key": "checkout-1"}
+    assert client.post("/bookings", json={"customer_id": 1}, headers=headers).status_code == 409
+    # A 4xx answer is final: the retry gets it back without running the checkout again
+    replay = client.post("/bookings", json={"customer_id": 1}, headers=headers)
+    assert replay.status_code == 409
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert query("SELECT COUNT(*) FROM bookings") == [(0,)]
+
+
+def test_concurrent_duplicate_waits_for_the_first_request(app):
+    started, release, calls, responses = threading.Event(), threading.Event(), [], {}
+
+    def view():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"success": True, "call": len(calls)}
+
+    def run(name):
+        with app.test_request_context():
+            responses[name] = idempotency.STORE.run("test:same", "fp", view)
+
+    first = threading.Thread(target=run, args=("first",))
+    first.start()
+    assert started.wait(5)
+    second = threading.Thread(target=run, args=("second",))
+    second.start()
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert calls == [1]
+    assert responses["second"].get_json() == responses["first"].get_json()
+    assert responses["second"].headers["Idempotent-Replayed"] == "true"
+
+
+def test_claim_held_by_another_worker(client, query, monkeypatch):
+    monkeypatch.setattr(idempotency.STORE, "wait_timeout", 0.2)
+    # Another worker's claim: inserted, no response yet
+    query("INSERT INTO idempotency_keys (idempotency_key, fingerprint, created_at) VALUES ('payments:pay-1', 'x', %s)",
+          (int(time.time()),))
+
+    busy = pay(client)
+    assert busy.status_code == 409
+    assert busy.headers["Retry-After"] == "1"
+
+    # That worker died; once lock_timeout has passed, the retry takes the key over
+    query("UPDATE idempotency_keys SET created_at = created_at - %s", (idempotency.STORE.lock_timeout + 1,))
+    assert pay(client).status_code == 200
+    assert query("SELECT COUNT(*) FROM payments") == [(1,)]
+
+
+def test_lost_claim_rolls_the_write_back(client, query, monkeypatch):
+    from models import payments
+
+    def taken_over(cursor, response):
+        # Another request took the key over while this one was running
+        cursor.execute("UPDATE idempotency_keys SET created_at = created_at + 1")
+        return idempotency.save_response(cursor, response)
+
+    monkeypatch.setattr(payments, "save_response", taken_over)
+
+    assert pay(client).status_code == 500
+    assert query("SELECT COUNT(*) FROM payments") == [(0,)]
+    assert query("SELECT COUNT(*) FROM payments_by_day") == [(0,)]
+
+
+def test_server_errors_are_not_stored(app):
+    calls = []
+
+    def view():
+        calls.append(1)
+        return {"success": False}, (500 if len(calls) == 1 else 200)
+
+    with app.test_request_context():
+        assert idempotency.STORE.run("test:retry", "fp", view).status_code == 500
+        assert idempotency.STORE.run("test:retry", "fp", view).status_code == 200
+
+    assert calls == [1, 1]
+
+
+def test_invalid_keys_are_a_400(client):
+    assert pay(client, key=" ").status_code == 400
+    assert pay(client, key="k" * 129).status_code == 400
+
+
+def test_cleanup_job_drops_expired_keys(client, query):
+    pay(client, key="old")
+    pay(client, key="new")
+    query("UPDATE idempotency_keys SET created_at = created_at - %s WHERE idempotency_key='payments:old'",
+          (idempotency.IDEMPOTENCY_CONFIG["ttl"] + 1,))
+
+    assert idempotency.expire_keys() == {"keys": 1}
+    assert query("SELECT idempotency_key FROM idempotency_keys") == [("payments:new",)]
@@ -0,0 +1,56 @@
+"""FastJSONProvider encoding and the row shaping helpers in db.py."""
+
+import datetime
+import decimal
+
+import pytest
+
+import jsonio
+from db import dict_from_cursor, get_db, row_mapper
+
+VALUES = {"price": decimal.Decimal("12.50"), "showtime": datetime.datetime(2026, 3, 1, 18, 0),
+          "day": datetime.date(2026, 3, 1), "title": "Amélie", "z": 1, "a": None}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(jsonio, "orjson", None)
+    return jsonio.dumpb
+
+
+def test_decimals_dates_and_key_order(encoder):
+    assert encoder(VALUES) == ('{"price":12.5,"showtime":"2026-03-01T18:00:00","day":"2026-03-01",'
+                               '"title":"Amélie","z":1,"a":null}').encode()
+
+
+def test_sort_keys_and_unknown_types(encoder):
+    assert encoder({"b": 1, "a": 2}, sort_keys=True) == b'{"a":2,"b":1}'
+    with pytest.raises(TypeError):
+        encoder({"x": object()})
+
+
+def test_responses_are_compact_with_a_trailing_newline(client):
+    body = client.get("/healthz").get_data()
+
+    assert body.startswith(b'{"status":"ok",')
+    assert body.endswith(b"}\n")
+
+
+def test_row_mapper_and_dict_from_cursor(db_path):
+    to_dict = row_mapper(["movie_id", "title"])
+    assert to_dict((1, "Up")) == {"movie_id": 1, "title": "Up"}
+    # Column names are data, never code
+    assert row_mapper(["a'); import os; ('"])((1,)) == {"a'); import os; ('": 1}
+
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT genre_id, name FROM genres ORDER BY genre_id LIMIT 2")
+        rows = dict_from_cursor(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+    assert rows == [{"genre_id": 1, "name": "Action"}, {"genre_id": 2, "name": "Comedy"}]
@@ -0,0 +1,71 @@
+"""GET /metrics and the in-process Counter / Histogram types."""
+
+import re
+
+from config import METRICS_CONFIG
+from metrics import Counter, Histogram, Registry
+
+
+def scrape(client, **environ):
+    response = client.get("/metrics", environ_base=environ)
+    return response.status_code, response.get_data(as_text=True)
+
+
+def sample(text, name):
+    """Value of the first sample line starting with `name` (labels included)."""
+    for line in text.splitlines():
+        if line.startswith(name):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    histogram = Histogram("t_seconds", "Test.", ("route",), buckets=(0.1, 1.0), registry=registry)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "a")
+
+    text = registry.render()
+
+    assert "# TYPE t_seconds histogram" in text
+    assert 't_seconds_bucket{route="a",le="0.1"} 2' in text
+    assert 't_seconds_bucket{route="a",le="1.0"} 3' in text
+    assert 't_seconds_bucket{route="a",le="+Inf"} 4' in text
+    assert 't_seconds_sum{route="a"} 3.65' in text
+    assert 't_seconds_count{route="a"} 4' in text
+
+
+def test_counter_labels_are_escaped():
+    registry = Registry()
+    counter = Counter("t_total", "Test.", ("table",), registry=registry)
+    counter.inc('we"ird')
+    counter.inc('we"ird', amount=2)
+
+    assert 't_total{table="we\\"ird"} 3' in registry.render()
+
+
+def test_requests_and_queries_are_timed(client):
+    assert client.get("/movies/").status_code == 200
+
+    status, text = scrape(client)
+
+    assert status == 200
+    assert sample(text, 'http_request_duration_seconds_count{method="GET",blueprint="movies",'
+                        'endpoint="movies.get_movies",status="200"}') >= 1
+    assert re.search(r'db_query_duration_seconds_count\{operation="SELECT",table="movies",'
+                     r'endpoint="movies.get_movies"\} \d+', text)
+    assert "db_connection_acquire_seconds_count" in text
+
+
+def test_responses_carry_server_timing(client):
+    timing = client.get("/genres/").headers["Server-Timing"]
+
+    assert re.fullmatch(r"db;dur=\d+\.\d\d, app;dur=-?\d+\.\d\d", timing)
+
+
+def test_remote_scrapes_are_refused_unless_allowed(client, monkeypatch):
+    assert scrape(client, REMOTE_ADDR="203.0.113.9")[0] == 403
+
+    monkeypatch.setitem(METRICS_CONFIG, "allow_remote", True)
+
+    assert scrape(client, REMOTE_ADDR="203.0.113.9")[0] == 200
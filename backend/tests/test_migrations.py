@@ -0,0 +1,115 @@
+"""The versioned migration runner on SQLite."""
+
+import pytest
+
+from db import SQLiteConnection, sqlite_connect
+from migrations import MIGRATIONS, Schema, latest_version, migrate, schema_version
+from sales import AGGREGATES, rebuild_sales
+
+
+@pytest.fixture
+def conn(tmp_path):
+    raw = sqlite_connect(str(tmp_path / "migrations.db"))
+    yield SQLiteConnection(raw)
+    raw.close()
+
+
+def tables(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT name, sql FROM sqlite_master WHERE type IN ('table', 'index') ORDER BY name")
+    return cursor.fetchall()
+
+
+def query_all(cursor, table):
+    cursor.execute(f"SELECT * FROM {table}")
+    return [tuple(r) for r in cursor.fetchall()]
+
+
+def test_migrate_applies_every_version_once(conn):
+    applied = migrate(conn, verbose=False)
+
+    assert applied == [version for version, _, _ in MIGRATIONS]
+    assert schema_version(conn.cursor()) == latest_version()
+    assert migrate(conn, verbose=False) == []
+
+
+def test_migrate_stops_at_target(conn):
+    assert migrate(conn, target=3, verbose=False) == [1, 2, 3]
+
+    assert migrate(conn, verbose=False) == [version for version, _, _ in MIGRATIONS if version > 3]
+
+
+def test_every_step_can_run_again(conn):
+    # A step interrupted after some of its DDL is simply re-run
+    migrate(conn, verbose=False)
+    schema_before = tables(conn)
+    schema = Schema(conn.cursor(), True)
+
+    for _, _, up in MIGRATIONS:
+        up(schema)
+    conn.commit()
+
+    assert tables(conn) == schema_before
+
+
+def test_backfills_match_the_existing_rows(conn):
+    migrate(conn, target=1, verbose=False)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO genres (genre_id, name) VALUES (1, 'Action')")
+    cursor.execute("INSERT INTO movies (movie_id, genre_id, title, price, available_seats) VALUES (1, 1, 'A', 10, 50)")
+    cursor.execute("INSERT INTO movies (movie_id, genre_id, title, price, available_seats) VALUES (2, 1, 'B', 10, 50)")
+    cursor.execute("INSERT INTO bookings (booking_id, user_id) VALUES (1, 1)")
+    cursor.execute("INSERT INTO booking_items (booking_id, movie_id, seats_booked, price) VALUES (1, 1, 2, 20)")
+    cursor.execute("INSERT INTO booking_items (booking_id, movie_id, seats_booked, price) VALUES (1, 2, 1, 10)")
+    cursor.execute("INSERT INTO reviews (user_id, movie_id, rating) VALUES (1, 1, 4)")
+    conn.commit()
+
+    migrate(conn, verbose=False)
+
+    cursor.execute("SELECT movie_id, bookings, seats_sold, revenue FROM sales_by_movie ORDER BY movie_id")
+    assert cursor.fetchall() == [(1, 1, 2, 20), (2, 1, 1, 10)]
+    cursor.execute("SELECT bookings FROM bookings_by_day")
+    assert cursor.fetchall() == [(1,)]
+    cursor.execute("SELECT review_count, rating_sum FROM movie_ratings")
+    assert cursor.fetchall() == [(1, 4)]
+
+
+
+def test_hot_path_indexes_are_used(conn):
+    migrate(conn, verbose=False)
+    cursor = conn.cursor()
+
+    def plan(sql, params=()):
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return " ".join(str(r[-1]) for r in cursor.fetchall())
+
+    assert "idx_bookings_date" in plan(
+        "SELECT booking_id FROM bookings ORDER BY booking_date DESC, booking_id DESC LIMIT 51")
+    assert "idx_watchlist_user_movie" in plan("SELECT COUNT(*) FROM watchlist WHERE user_id=%s", (1,))
+    assert "idx_reviews_movie_date" in plan(
+        "SELECT review_id FROM reviews WHERE movie_id=%s ORDER BY review_date DESC, review_id DESC LIMIT 51", (1,))
+
+
+def test_sales_backfill_matches_a_rebuild(conn):
+    migrate(conn, target=8, verbose=False)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO genres (genre_id, name) VALUES (1, 'Action')")
+    for movie_id in (1, 2):
+        cursor.execute("INSERT INTO movies (movie_id, genre_id, title, price, available_seats) "
+                       "VALUES (%s, 1, 'M', 10, 50)", (movie_id,))
+    for booking_id, day, items in [(1, "2025-01-01 09:00:00", [(1, 2)]), (2, "2025-01-01 18:00:00", [(1, 1), (2, 3)]),
+                                   (3, "2025-01-02 12:00:00", [(2, 1)])]:
+        cursor.execute("INSERT INTO bookings (booking_id, user_id, booking_date) VALUES (%s, 1, %s)", (booking_id, day))
+        for movie_id, seats in items:
+            cursor.execute("INSERT INTO booking_items (booking_id, movie_id, seats_booked, price) VALUES (%s, %s, %s, %s)",
+                           (booking_id, movie_id, seats, seats * 10))
+        cursor.execute("INSERT INTO payments (booking_id, amount, status, payment_date) VALUES (%s, 10, 'completed', %s)",
+                       (booking_id, day))
+    conn.commit()
+
+    migrate(conn, verbose=False)
+    backfilled = {table: sorted(query_all(cursor, table)) for table in AGGREGATES}
+    rebuild_sales(cursor)
+
+    assert {table: sorted(query_all(cursor, table)) for table in AGGREGATES} == backfilled
+    assert backfilled["bookings_by_day"] == [("2025-01-01", 2), ("2025-01-02", 1)]
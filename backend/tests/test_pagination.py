@@ -0,0 +1,56 @@
+"""Keyset pagination and filters on GET /bookings/all."""
+
+import pytest
+
+from pagination import decode_cursor, encode_cursor
+
+
+def page(client, headers, **params):
+    response = client.get("/bookings/all", headers=headers, query_string=params)
+    assert response.status_code == 200
+    return [b["booking_id"] for b in response.get_json()], response.headers.get("X-Next-Cursor")
+
+
+def test_pages_walk_every_booking_newest_first(client, admin_headers, bookings):
+    seen, cursor = [], None
+    while True:
+        ids, cursor = page(client, admin_headers, limit=2, **({"cursor": cursor} if cursor else {}))
+        seen.extend(ids)
+        if not cursor:
+            break
+
+    assert seen == [5, 4, 3, 2, 1]
+
+
+def test_rows_inserted_meanwhile_do_not_shift_later_pages(client, admin_headers, bookings, query):
+    first, cursor = page(client, admin_headers, limit=2)
+    query("INSERT INTO bookings (booking_id, user_id, booking_date, status) VALUES (6, 1, '2025-02-01 10:00:00', 'confirmed')")
+
+    second, _ = page(client, admin_headers, limit=2, cursor=cursor)
+
+    assert first + second == [5, 4, 3, 2]
+
+
+def test_filters(client, admin_headers, bookings):
+    assert page(client, admin_headers, status="cancelled")[0] == [2]
+    assert page(client, admin_headers, user_id=1)[0] == [5, 3, 1]
+    assert page(client, admin_headers, movie_id=2)[0] == [3, 2]
+    assert page(client, admin_headers, date_from="2025-01-02", date_to="2025-01-03")[0] == [4, 3, 2]
+
+
+def test_items_and_totals_come_with_each_booking(client, admin_headers, bookings):
+    body = client.get("/bookings/all", headers=admin_headers, query_string={"limit": 1}).get_json()
+
+    assert body[0]["items"] == [{"booking_item_id": 5, "movie_id": 3, "seats_booked": 1, "price": 10.0,
+                                 "movie_title": body[0]["items"][0]["movie_title"]}]
+    assert body[0]["total_amount"] == 10.0
+
+
+@pytest.mark.parametrize("params", [{"limit": 0}, {"limit": "x"}, {"cursor": "not-a-cursor"},
+                                    {"date_from": "yesterday"}])
+def test_bad_parameters_are_a_400(client, admin_headers, params):
+    assert client.get("/bookings/all", headers=admin_headers, query_string=params).status_code == 400
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor("2025-01-03 10:00:00", 4)) == ("2025-01-03 10:00:00", 4)
@@ -0,0 +1,110 @@
+"""ConnectionPool checkout, reuse, overflow and liveness checks."""
+
+import threading
+
+import pytest
+
+from pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.rollbacks = 0
+        self.in_transaction = True
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    kwargs.setdefault("pre_ping", False)
+    return ConnectionPool(connect, **kwargs), opened
+
+
+def test_returned_connections_are_reused():
+    pool, opened = make_pool(size=2, max_overflow=0)
+
+    first = pool.acquire()
+    raw = first.raw
+    first.close()
+    second = pool.acquire()
+
+    assert second.raw is raw
+    assert len(opened) == 1
+    assert raw.rollbacks == 1
+    assert pool.stats()["checkouts"] == 2
+
+
+def test_overflow_connections_are_closed_on_return():
+    pool, opened = make_pool(size=1, max_overflow=1)
+
+    first, second = pool.acquire(), pool.acquire()
+    first.close()
+    second.close()
+
+    assert [conn.closed for conn in opened] == [False, True]
+    assert pool.stats()["opened"] == 1
+    assert pool.stats()["idle"] == 1
+
+
+def test_checkout_times_out_when_exhausted():
+    pool, _ = make_pool(size=1, max_overflow=0, timeout=0.05)
+    held = pool.acquire()
+
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+    assert pool.stats()["timeouts"] == 1
+    held.close()
+    assert pool.acquire().raw is not None
+
+
+def test_waiter_gets_the_connection_when_it_is_returned():
+    pool, opened = make_pool(size=1, max_overflow=0, timeout=5)
+    held = pool.acquire()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire().raw))
+    waiter.start()
+
+    held.close()
+    waiter.join(5)
+
+    assert got == opened
+
+
+def test_failed_ping_replaces_the_connection():
+    def ping(raw):
+        raise OSError("gone away")
+
+    pool, opened = make_pool(size=1, max_overflow=0, pre_ping=True, ping_after=0, ping=ping)
+    pool.acquire().close()
+
+    conn = pool.acquire()
+
+    assert len(opened) == 2
+    assert opened[0].closed
+    assert conn.raw is opened[1]
+    assert pool.stats()["ping_failures"] == 1
+    assert pool.stats()["opened"] == 1
+
+
+def test_invalidate_discards_the_connection():
+    pool, opened = make_pool(size=1, max_overflow=0)
+    conn = pool.acquire()
+
+    conn.invalidate()
+
+    assert opened[0].closed
+    assert pool.stats()["opened"] == 0
+    with pytest.raises(AttributeError):
+        conn.cursor()
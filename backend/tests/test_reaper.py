@@ -0,0 +1,66 @@
+"""The watchlist reaper: idle carts and expired seat holds."""
+
+import time
+
+from reaper import reap_watchlist
+
+MOVIE = 1
+
+
+def hold(client, user_id, seats, movie_id=MOVIE):
+    assert client.post("/watchlist/", json={"user_id": user_id, "movie_id": movie_id,
+                                            "selected_seats": seats}).status_code == 200
+
+
+def age_carts(query, user_id, seconds=7200):
+    query(f"UPDATE watchlist SET added_at = datetime('now', '-{seconds} seconds') WHERE user_id=%s", (user_id,))
+
+
+def test_idle_carts_and_their_holds_are_removed(client, query):
+    hold(client, 1, "A1,A2")
+    hold(client, 2, "B1")
+    age_carts(query, 1)
+    assert client.get(f"/movies/{MOVIE}/seats").get_json()["taken"] == 3
+
+    totals = reap_watchlist(ttl=3600)
+
+    assert (totals["carts"], totals["seats_released"]) == (1, 2)
+    assert query("SELECT user_id FROM watchlist") == [(2,)]
+    assert query("SELECT seat_id FROM show_seats") == [("B1",)]
+    # The seat map this worker serves sees the release without a reload
+    assert client.get(f"/movies/{MOVIE}/seats").get_json()["taken"] == 1
+
+
+def test_carts_are_deleted_in_batches(client, query):
+    for movie_id in (1, 2, 3):
+        hold(client, 1, "A1", movie_id)
+    age_carts(query, 1)
+
+    assert reap_watchlist(ttl=3600, batch_size=1, max_batches=2)["carts"] == 2
+    assert query("SELECT COUNT(*) FROM watchlist") == [(1,)]
+
+    totals = reap_watchlist(ttl=3600, batch_size=2)
+    assert (totals["carts"], totals["batches"]) == (1, 1)
+    assert query("SELECT COUNT(*) FROM watchlist") == [(0,)]
+
+
+def test_expired_holds_without_a_cart_are_removed(client, query):
+    hold(client, 1, "A1")
+    hold(client, 2, "A2")
+    query("DELETE FROM watchlist WHERE user_id=1")
+    query("UPDATE show_seats SET held_until=%s WHERE seat_id='A1'", (int(time.time()) - 1,))
+
+    totals = reap_watchlist(ttl=3600)
+
+    assert (totals["carts"], totals["expired_holds"]) == (0, 1)
+    assert query("SELECT seat_id FROM show_seats") == [("A2",)]
+
+
+def test_reaper_runs_from_the_admin_jobs_endpoint(client, admin_headers, query):
+    hold(client, 1, "A1")
+    age_carts(query, 1, seconds=10 ** 6)
+
+    response = client.post("/admin/jobs/watchlist_reaper/run", headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.get_json()["result"]["carts"] == 1
@@ -0,0 +1,85 @@
+"""/reports/*: admin sales reports read from the sales aggregates."""
+
+import pytest
+
+PAYMENTS = [
+    (1, "2025-01-01 10:05:00", 10, "card", "success"),
+    (3, "2025-01-03 10:05:00", 10, "card", "success"),
+    (4, "2025-01-03 10:06:00", 10, "card", "failed"),
+]
+
+
+@pytest.fixture
+def sales(client, admin_headers, query, bookings):
+    """The conftest bookings plus three payments, aggregated by POST /reports/rebuild."""
+    for payment in PAYMENTS:
+        query("INSERT INTO payments (booking_id, payment_date, amount, method, status) VALUES (%s, %s, %s, %s, %s)",
+              payment)
+    response = client.post("/reports/rebuild", headers=admin_headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def report(client, headers, name, **params):
+    response = client.get(f"/reports/{name}", headers=headers, query_string=params)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_rebuild_counts_rows_per_aggregate(sales):
+    assert {k: sales[k] for k in ("sales_by_movie", "bookings_by_day", "payments_by_day")} == {
+        "sales_by_movie": 3, "bookings_by_day": 3, "payments_by_day": 3}
+
+
+def test_summary_leaves_out_cancelled_bookings(client, admin_headers, sales):
+    summary = report(client, admin_headers, "summary")
+
+    assert (summary["bookings"], summary["seats_sold"], summary["revenue"]) == (4, 4, 40.0)
+    assert summary["payments"] == {"failed": {"count": 1, "amount": 10.0}, "success": {"count": 2, "amount": 20.0}}
+    assert report(client, admin_headers, "summary", date_from="2025-01-03", date_to="2025-01-03")["bookings"] == 2
+
+
+def test_movies_are_ranked_with_occupancy(client, admin_headers, sales):
+    movies = report(client, admin_headers, "movies")
+
+    assert [(m["movie_id"], m["bookings"], m["revenue"]) for m in movies] == [(1, 2, 20.0), (2, 1, 10.0), (3, 1, 10.0)]
+    assert (movies[0]["capacity"], movies[0]["occupancy"]) == (52, round(2 / 52, 4))
+    assert [m["movie_id"] for m in report(client, admin_headers, "movies", sort="occupancy", genre_id=2)] == [3]
+
+
+def test_genres_and_showtimes(client, admin_headers, sales):
+    genres = report(client, admin_headers, "genres")
+    showtimes = report(client, admin_headers, "showtimes")
+
+    assert [(g["genre"], g["movies"], g["revenue"]) for g in genres] == [("Action", 2, 30.0), ("Comedy", 1, 10.0)]
+    assert [(s["date"], s["shows"], s["seats_sold"]) for s in showtimes] == [("2025-10-05", 2, 3), ("2025-10-06", 1, 1)]
+
+
+def test_daily_counts_checkouts_and_paid_amounts(client, admin_headers, sales):
+    days = report(client, admin_headers, "daily")
+
+    assert [(d["date"], d["bookings"], d["revenue"], d["payments"], d["paid_amount"]) for d in days] == [
+        ("2025-01-05", 1, 10.0, 0, 0.0),
+        ("2025-01-03", 2, 20.0, 1, 10.0),
+        ("2025-01-01", 1, 10.0, 1, 10.0),
+    ]
+    assert [d["date"] for d in report(client, admin_headers, "daily", movie_id=2)] == ["2025-01-03"]
+
+
+def test_checkout_updates_the_aggregates_in_place(client, admin_headers, sales):
+    client.post("/watchlist/", json={"user_id": 1, "movie_id": 1, "selected_seats": "A1,A2"})
+    client.post("/bookings", json={"customer_id": 1})
+
+    summary = report(client, admin_headers, "summary")
+
+    assert (summary["bookings"], summary["seats_sold"], summary["revenue"]) == (5, 6, 638.0)
+
+
+@pytest.mark.parametrize("name, params", [("movies", {"sort": "title"}), ("daily", {"date_from": "soon"}),
+                                          ("genres", {"showtime_from": "x"}), ("daily", {"limit": 0})])
+def test_bad_parameters_are_a_400(client, admin_headers, name, params):
+    assert client.get(f"/reports/{name}", headers=admin_headers, query_string=params).status_code == 400
+
+
+def test_reports_need_an_admin(client):
+    assert client.get("/reports/summary").status_code == 401
@@ -0,0 +1,47 @@
+"""POST /reviews and the rating summaries embedded in listings."""
+
+from cache import catalog_cache, movies_key
+
+MOVIE = 1
+
+
+def review(client, rating, user_id=1, movie_id=MOVIE):
+    return client.post("/reviews", json={"user_id": user_id, "movie_id": movie_id, "rating": rating})
+
+
+def listed_rating(client, path="/movies/"):
+    return {m["movie_id"]: m["rating"] for m in client.get(path).get_json()}[MOVIE]
+
+
+def test_review_updates_the_cached_listing(client, query):
+    assert listed_rating(client)["count"] == 0
+
+    assert review(client, 4).status_code == 200
+    assert review(client, 5, user_id=2).status_code == 200
+
+    rating = listed_rating(client)
+    assert rating["count"] == 2
+    assert rating["average"] == 4.5
+    assert rating["histogram"] == [0, 0, 0, 1, 1]
+    assert query("SELECT review_count, rating_sum FROM movie_ratings WHERE movie_id=%s", (MOVIE,)) == [(2, 9)]
+
+
+def test_review_keeps_other_listings_and_the_catalog_version(client, query):
+    genre_id = query("SELECT genre_id FROM movies WHERE movie_id=%s", (MOVIE,))[0][0]
+    other = next(g for g in range(1, 6) if g != genre_id)
+    client.get(f"/movies/?genre_id={genre_id}")
+    client.get(f"/movies/?genre_id={other}")
+
+    review(client, 3)
+
+    assert catalog_cache.get_local(movies_key(genre_id)) is None
+    assert catalog_cache.get_local(movies_key(other)) is not None
+    assert query("SELECT COUNT(*) FROM cache_versions") == [(0,)]
+    assert listed_rating(client, f"/movies/?genre_id={genre_id}")["count"] == 1
+
+
+def test_invalid_reviews_are_rejected(client, query):
+    assert review(client, 6).status_code == 400
+    assert review(client, "x").status_code == 400
+    assert review(client, 4, movie_id=99999).status_code == 404
+    assert query("SELECT COUNT(*) FROM reviews") == [(0,)]
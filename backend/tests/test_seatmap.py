@@ -0,0 +1,77 @@
+"""GET /movies/<id>/seats: the in-memory seat map and its ETag."""
+
+import base64
+
+import seatmap
+
+MOVIE = 1
+
+
+def seats(client, etag=None):
+    headers = {"If-None-Match": etag} if etag else {}
+    return client.get(f"/movies/{MOVIE}/seats", headers=headers)
+
+
+def hold(client, user_id, seat_ids):
+    return client.post("/watchlist/", json={"user_id": user_id, "movie_id": MOVIE, "selected_seats": seat_ids})
+
+
+def test_unchanged_map_answers_304(client):
+    first = seats(client)
+
+    again = seats(client, first.headers["ETag"])
+
+    assert first.status_code == 200
+    assert again.status_code == 304
+
+
+def test_hold_changes_the_etag_and_the_bitset(client):
+    before = seats(client)
+    hold(client, 1, "A1")
+
+    after = seats(client, before.headers["ETag"])
+
+    assert after.status_code == 200
+    assert after.headers["ETag"] != before.headers["ETag"]
+    body = after.get_json()
+    assert body["taken"] == 1
+    assert body["available"] == 49
+    assert base64.b64decode(body["bitset"])[0] == 0x80
+
+
+def test_rebuilt_map_never_reuses_an_etag(client, query):
+    before = seats(client)
+    hold(client, 1, "A1")
+    held = seats(client)
+    seatmap.forget(MOVIE)
+    # Same contents as the first response, rebuilt from scratch
+    query("DELETE FROM show_seats")
+    query("DELETE FROM watchlist")
+
+    rebuilt = seats(client, before.headers["ETag"])
+
+    assert rebuilt.status_code == 200
+    assert rebuilt.headers["ETag"] not in (before.headers["ETag"], held.headers["ETag"])
+    assert rebuilt.get_json()["taken"] == 0
+
+    seatmap.forget_all()
+    assert seats(client, rebuilt.headers["ETag"]).headers["ETag"] != rebuilt.headers["ETag"]
+
+
+def test_expired_holds_are_dropped_from_the_map(client):
+    hold(client, 1, "A1")
+    seat_map = seatmap.get_seat_map(MOVIE)
+    version = seat_map.version
+
+    seat_map.expire(2**31)
+
+    assert not seat_map.is_taken(0)
+    assert seat_map.version > version
+
+
+def test_runs_alternate_free_and_taken():
+    seat_map = seatmap.SeatMap(MOVIE)
+    seat_map.load([("A2", "booked", 1, None), ("A3", "held", 2, 2**31)])
+
+    assert seat_map.runs() == [1, 2, seatmap.TOTAL_SEATS - 3]
+    assert seat_map.available(2) == seatmap.TOTAL_SEATS - 2
@@ -0,0 +1,83 @@
+"""Seat holds through POST/DELETE /watchlist/ and the seats.py helpers."""
+
+import time
+
+import pytest
+
+from db import run_transaction
+from seats import expire_holds, parse_seat_ids, seat_index
+
+MOVIE = 1
+
+
+def hold(client, user_id, seats):
+    return client.post("/watchlist/", json={"user_id": user_id, "movie_id": MOVIE, "selected_seats": seats})
+
+
+def test_parse_seat_ids_normalizes_and_dedupes():
+    assert parse_seat_ids("a1, A2,a1") == ["A1", "A2"]
+    assert parse_seat_ids(["3-7", "J15"]) == ["C7", "J15"]
+    assert parse_seat_ids("") == []
+    assert seat_index("B1") == 15
+
+
+@pytest.mark.parametrize("value", ["K1", "A0", "A16", "1A", "Z-3"])
+def test_parse_seat_ids_rejects_seats_off_the_grid(value):
+    with pytest.raises(ValueError):
+        parse_seat_ids(value)
+
+
+def test_invalid_seat_is_a_400(client, query):
+    assert hold(client, 1, "A99").status_code == 400
+    assert query("SELECT COUNT(*) FROM show_seats") == [(0,)]
+
+
+def test_seat_held_by_someone_else_conflicts(client, query):
+    assert hold(client, 1, "A1,A2").status_code == 200
+
+    response = hold(client, 2, "A2,A3")
+
+    assert response.status_code == 409
+    assert response.get_json()["seats"] == ["A2"]
+    # All or nothing: A3 was not held either
+    assert query("SELECT seat_id, user_id FROM show_seats ORDER BY seat_id") == [("A1", 1), ("A2", 1)]
+
+
+def test_holding_own_seats_again_extends_the_hold(client, query):
+    hold(client, 1, "A1")
+    query("UPDATE show_seats SET held_until=%s", (int(time.time()) + 5,))
+
+    assert hold(client, 1, "A1").status_code == 200
+
+    assert query("SELECT held_until FROM show_seats")[0][0] > int(time.time()) + 60
+
+
+def test_expired_hold_can_be_taken_over(client, query):
+    hold(client, 1, "A1")
+    query("UPDATE show_seats SET held_until=%s", (int(time.time()) - 1,))
+
+    assert hold(client, 2, "A1").status_code == 200
+    assert query("SELECT user_id FROM show_seats") == [(2,)]
+
+
+def test_removing_the_cart_row_releases_its_holds(client, query):
+    hold(client, 1, "A1,A2")
+    hold(client, 2, "B1")
+    watchlist_id = query("SELECT watchlist_id FROM watchlist WHERE user_id=1")[0][0]
+
+    assert client.delete(f"/watchlist/{watchlist_id}").status_code == 200
+
+    assert query("SELECT seat_id FROM show_seats") == [("B1",)]
+    assert client.get(f"/movies/{MOVIE}/seats").get_json()["taken"] == 1
+
+
+def test_expire_holds_deletes_only_expired_ones(client, query):
+    hold(client, 1, "A1")
+    hold(client, 2, "A2")
+    query("UPDATE show_seats SET held_until=%s WHERE seat_id='A1'", (int(time.time()) - 1,))
+
+    expired = run_transaction(expire_holds)
+
+    assert [tuple(r) for r in expired] == [(MOVIE, "A1")]
+    assert query("SELECT seat_id FROM show_seats") == [("A2",)]
+
@@ -0,0 +1,82 @@
+"""Statement totals and the slow-query log behind GET /admin/queries."""
+
+import time
+
+import pytest
+
+from slowlog import OTHER, QUERY_LOG, QueryLog, explain, normalize, redact
+
+
+@pytest.fixture
+def query_log():
+    QUERY_LOG.reset()
+    yield QUERY_LOG
+    QUERY_LOG.reset()
+
+
+def statements(client, headers, **params):
+    response = client.get("/admin/queries", headers=headers, query_string=params)
+    assert response.status_code == 200
+    return response.get_json()["statements"]
+
+
+def test_normalize_folds_literals_and_in_lists():
+    assert normalize("SELECT * FROM movies WHERE genre_id = 3 AND title = 'It''s'") == \
+        "SELECT * FROM movies WHERE genre_id = ? AND title = ?"
+    assert normalize("DELETE FROM show_seats\n WHERE seat_id IN (%s, %s, %s)") == \
+        "DELETE FROM show_seats WHERE seat_id IN (...)"
+
+
+def test_redact_keeps_numbers_and_hides_strings():
+    assert redact((1, 2.5, None, "secret@example.com")) == [1, 2.5, None, "<str:18>"]
+    assert redact([(1,), (2,)], many=True) == "<2 rows>"
+
+
+def test_statements_over_the_limit_share_one_entry():
+    log = QueryLog(threshold_ms=1000, explain_samples=0, max_statements=1, recent=5)
+    for table in ("a", "b", "c"):
+        log.record(f"SELECT * FROM {table}", None, 0.001, 1, "SELECT", table, "-")
+
+    assert [(s["sql"], s["calls"]) for s in log.top(sort="calls")] == [(OTHER, 2), ("SELECT * FROM a", 1)]
+
+
+def test_listing_queries_are_counted_per_route(client, admin_headers, query_log):
+    client.get("/movies/")
+    client.get("/movies/?genre_id=2")
+
+    listing = [s for s in statements(client, admin_headers, sort="calls") if s["table"] == "movies"]
+
+    assert len(listing) == 2
+    assert all(s["endpoints"] == {"movies.get_movies": 1} for s in listing)
+    assert all(s["slow_calls"] == 0 for s in listing)
+
+
+def test_slow_statements_are_logged_and_explained(client, admin_headers, query_log, monkeypatch):
+    monkeypatch.setattr(query_log, "threshold", 0.0)
+    client.post("/auth/login", json={"email": "admin@moviebooking.com", "password": "wrong"})
+
+    slow = client.get("/admin/queries/slow", headers=admin_headers).get_json()["queries"]
+    login = next(q for q in slow if "email" in q["sql"])
+    assert login["params"] == ["<str:22>", "<str:5>"]
+    assert login["endpoint"] == "login.login"
+
+    sample = next(s for s in statements(client, admin_headers, limit=100) if s["sql"] == login["sql"])
+    deadline = time.monotonic() + 5
+    while sample["explain"][0]["plan"] is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+        sample = next(s for s in statements(client, admin_headers, limit=100) if s["sql"] == login["sql"])
+    assert sample["explain"][0]["plan"]
+
+
+def test_explain_uses_the_real_parameters(db_path):
+    plan = explain("SELECT * FROM bookings WHERE user_id = ?", (1,))
+
+    assert any("idx_bookings" in row["detail"] for row in plan)
+
+
+def test_reset_and_bad_sort(client, admin_headers, query_log):
+    client.get("/movies/")
+
+    assert client.get("/admin/queries?sort=slowest", headers=admin_headers).status_code == 400
+    assert client.delete("/admin/queries", headers=admin_headers).status_code == 200
+    assert query_log.summary()["statements"] <= 1
@@ -0,0 +1,65 @@
+"""?stream=1 listings: chunked JSON arrays read from unbuffered cursors."""
+
+import json
+
+import pytest
+
+from config import STREAM_CONFIG
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setitem(STREAM_CONFIG, "batch_size", 2)
+    monkeypatch.setitem(STREAM_CONFIG, "chunk_bytes", 64)
+
+
+def read_stream(response):
+    chunks = list(response.response)
+    response.close()
+    return chunks, json.loads(b"".join(chunks))
+
+
+def test_streamed_bookings_match_the_paged_listing(client, admin_headers, bookings, small_chunks):
+    paged = client.get("/bookings/all", headers=admin_headers).get_json()
+
+    chunks, streamed = read_stream(client.get("/bookings/all?stream=1", headers=admin_headers))
+
+    assert len(chunks) > 2
+    assert streamed == paged
+
+
+def test_streamed_export_applies_filters(client, admin_headers, bookings):
+    _, streamed = read_stream(client.get("/bookings/all?stream=1&user_id=2", headers=admin_headers))
+
+    assert [b["booking_id"] for b in streamed] == [4, 2]
+
+
+def test_streamed_movies_match_the_cached_listing(client, small_chunks):
+    _, streamed = read_stream(client.get("/movies/?stream=1"))
+
+    assert streamed == client.get("/movies/").get_json()
+
+
+def test_empty_result_is_an_empty_array(client, admin_headers):
+    _, streamed = read_stream(client.get("/bookings/all?stream=1", headers=admin_headers))
+
+    assert streamed == []
+
+
+def test_abandoned_stream_releases_its_connection(client, admin_headers, bookings, small_chunks):
+    response = client.get("/bookings/all?stream=1", headers=admin_headers)
+    chunks = iter(response.response)
+    assert next(chunks) == b"["
+
+    response.close()
+
+    # The next request gets a usable connection
+    _, streamed = read_stream(client.get("/bookings/all?stream=1", headers=admin_headers))
+    assert len(streamed) == 5
+
+
+def test_bad_filter_fails_before_streaming(client, admin_headers):
+    response = client.get("/bookings/all?stream=1&date_from=soon", headers=admin_headers)
+
+    assert response.status_code == 400
+    assert "date_from" in response.get_json()["message"]
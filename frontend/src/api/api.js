@@ -11,6 +11,37 @@ async function handleResponse(response) {
   return data;
 }
 
+// Admin endpoints take the session token issued by /auth/login. Admin pages that ask for
+// an email/password exchange them for a token through the same login call, once.
+let exchanged = null; // { key, token }
+
+async function adminToken({ admin_email, admin_password } = {}) {
+  if (admin_email && admin_password) {
+    const key = `${admin_email}\n${admin_password}`;
+    if (!exchanged || exchanged.key !== key) {
+      const data = await handleResponse(await fetch(endpoints.auth.login, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify({ email: admin_email, password: admin_password }) }));
+      exchanged = { key, token: data.token };
+    }
+    return exchanged.token;
+  }
+  const user = JSON.parse(localStorage.getItem("user") || "null");
+  return user && user.token;
+}
+
+// Only admin calls carry Authorization: on the public endpoints the header would make
+// the browser send a CORS preflight before every cross-origin request.
+async function adminFetch(url, options = {}, credentials) {
+  const token = await adminToken(credentials);
+  if (!token) return fetch(url, options);
+  const headers = { ...(options.headers || {}), Authorization: `Bearer ${token}` };
+  return fetch(url, { ...options, headers });
+}
+
+// Splits admin_email/admin_password off a request body
+function withoutCredentials({ admin_email, admin_password, ...body }) {
+  return [{ admin_email, admin_password }, body];
+}
+
 export const api = {
   login: async ({ email, password }) => handleResponse(await fetch(endpoints.auth.login, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify({ email, password }) })),
   signup: async ({ name, email, password }) => handleResponse(await fetch(endpoints.auth.signup, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify({ name, email, password }) })),
@@ -19,59 +50,81 @@ export const api = {
     if (genre_id) url.searchParams.set("genre_id", genre_id);
     return handleResponse(await fetch(url.toString()));
   },
-  createMovie: async (payload) => handleResponse(await fetch(endpoints.movies.create, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify(payload) })),
-  updateMovie: async (id, payload) => handleResponse(await fetch(endpoints.movies.update(id), { method: "PUT", headers: { "Content-Type": "application/json" }, body: JSON.stringify(payload) })),
-  deleteMovie: async (id, admin_email, admin_password) => {
-    const url = new URL(endpoints.movies.delete(id));
-    if (admin_email) url.searchParams.set("admin_email", admin_email);
-    if (admin_password) url.searchParams.set("admin_password", admin_password);
-    return handleResponse(await fetch(url.toString(), { method: "DELETE" }));
+  createMovie: async (payload) => {
+    const [credentials, body] = withoutCredentials(payload);
+    return handleResponse(await adminFetch(endpoints.movies.create, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify(body) }, credentials));
+  },
+  updateMovie: async (id, payload) => {
+    const [credentials, body] = withoutCredentials(payload);
+    return handleResponse(await adminFetch(endpoints.movies.update(id), { method: "PUT", headers: { "Content-Type": "application/json" }, body: JSON.stringify(body) }, credentials));
   },
+  deleteMovie: async (id, admin_email, admin_password) => handleResponse(await adminFetch(endpoints.movies.delete(id), { method: "DELETE" }, { admin_email, admin_password })),
   purgeMoviesToSix: async ({ admin_email, admin_password }) => {
-    const res = await fetch(`${endpoints.movies.create}/purge`.replace('/movies', '/movies/purge'), {
+    const res = await adminFetch(`${endpoints.movies.create}/purge`.replace('/movies', '/movies/purge'), {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ admin_email, admin_password })
-    });
+      body: JSON.stringify({})
+    }, { admin_email, admin_password });
     return handleResponse(res);
   },
+  // Returns null when the seat map is unchanged since `etag` (HTTP 304)
+  getSeatMap: async (movieId, etag) => {
+    const res = await fetch(endpoints.movies.seats(movieId), { headers: etag ? { "If-None-Match": etag } : {} });
+    if (res.status === 304) return null;
+    const data = await handleResponse(res);
+    return { ...data, etag: res.headers.get("ETag") };
+  },
+  // Movies, genres and the user's watchlist count for the home page in one call
+  getHome: async ({ user_id } = {}) => {
+    const url = new URL(endpoints.home);
+    if (user_id) url.searchParams.set("user_id", user_id);
+    return handleResponse(await fetch(url.toString()));
+  },
   getGenres: async () => handleResponse(await fetch(endpoints.genres.list)),
-  createGenre: async (payload) => handleResponse(await fetch(endpoints.genres.create, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify(payload) })),
-  updateGenre: async (id, payload) => handleResponse(await fetch(endpoints.genres.update(id), { method: "PUT", headers: { "Content-Type": "application/json" }, body: JSON.stringify(payload) })),
-  deleteGenre: async (id, admin_email, admin_password) => {
-    const url = new URL(endpoints.genres.delete(id));
-    if (admin_email) url.searchParams.set("admin_email", admin_email);
-    if (admin_password) url.searchParams.set("admin_password", admin_password);
-    return handleResponse(await fetch(url.toString(), { method: "DELETE" }));
+  createGenre: async (payload) => {
+    const [credentials, body] = withoutCredentials(payload);
+    return handleResponse(await adminFetch(endpoints.genres.create, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify(body) }, credentials));
+  },
+  updateGenre: async (id, payload) => {
+    const [credentials, body] = withoutCredentials(payload);
+    return handleResponse(await adminFetch(endpoints.genres.update(id), { method: "PUT", headers: { "Content-Type": "application/json" }, body: JSON.stringify(body) }, credentials));
   },
+  deleteGenre: async (id, admin_email, admin_password) => handleResponse(await adminFetch(endpoints.genres.delete(id), { method: "DELETE" }, { admin_email, admin_password })),
   getWatchlist: async (userId) => handleResponse(await fetch(endpoints.watchlist.get(userId))),
   addToWatchlist: async ({ user_id, movie_id, seats_selected = 1, selected_seats = '' }) => handleResponse(await fetch(endpoints.watchlist.add, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify({ user_id, movie_id, seats_selected, selected_seats }) })),
   removeFromWatchlist: async (watchlistId) => handleResponse(await fetch(endpoints.watchlist.remove(watchlistId), { method: "DELETE" })),
   createBooking: async ({ customer_id }) => handleResponse(await fetch(endpoints.bookings.create, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify({ customer_id }) })),
-  listAllBookings: async ({ admin_email, admin_password }) => {
+  // One page of bookings; pass the returned nextCursor to fetch the next page
+  listAllBookings: async ({ cursor, limit, status, movie_id, user_id, date_from, date_to } = {}) => {
     const url = new URL(endpoints.bookings.listAll);
-    if (admin_email) url.searchParams.set("admin_email", admin_email);
-    if (admin_password) url.searchParams.set("admin_password", admin_password);
-    return handleResponse(await fetch(url.toString()));
+    Object.entries({ cursor, limit, status, movie_id, user_id, date_from, date_to }).forEach(([k, v]) => {
+      if (v !== undefined && v !== null && v !== "") url.searchParams.set(k, v);
+    });
+    const res = await adminFetch(url.toString());
+    const items = await handleResponse(res);
+    return { items, nextCursor: res.headers.get("X-Next-Cursor") };
   },
   listUserBookings: async (userId) => handleResponse(await fetch(endpoints.bookings.listByUser(userId))),
   createPayment: async ({ booking_id, amount, method, status }) => handleResponse(await fetch(endpoints.payments.create, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify({ booking_id, amount, method, status }) })),
   getReviews: async (movieId) => handleResponse(await fetch(endpoints.reviews.listForMovie(movieId))),
   createReview: async ({ user_id, movie_id, rating, comment }) => handleResponse(await fetch(endpoints.reviews.create, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify({ user_id, movie_id, rating, comment }) })),
-  listUsers: async ({ admin_email, admin_password }) => {
-    const url = new URL(endpoints.users.list);
-    if (admin_email) url.searchParams.set("admin_email", admin_email);
-    if (admin_password) url.searchParams.set("admin_password", admin_password);
-    return handleResponse(await fetch(url.toString()));
+  // Several calls in one round trip: [{ method, path, body }] -> [{ status, headers, body }] in order.
+  // With transaction, a failed step rolls back the others and the batch throws. The token is
+  // sent along since sub-requests may be admin calls.
+  batch: async (requests, { transaction = false } = {}) => {
+    const data = await handleResponse(await adminFetch(endpoints.batch, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify({ requests, transaction }) }));
+    return data.results;
+  },
+  listUsers: async ({ admin_email, admin_password } = {}) => handleResponse(await adminFetch(endpoints.users.list, {}, { admin_email, admin_password })),
+  createUser: async (payload) => {
+    const [credentials, body] = withoutCredentials(payload);
+    return handleResponse(await adminFetch(endpoints.users.create, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify(body) }, credentials));
   },
-  createUser: async (payload) => handleResponse(await fetch(endpoints.users.create, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify(payload) })),
-  updateUser: async (id, payload) => handleResponse(await fetch(endpoints.users.update(id), { method: "PUT", headers: { "Content-Type": "application/json" }, body: JSON.stringify(payload) })),
-  deleteUser: async (id, admin_email, admin_password) => {
-    const url = new URL(endpoints.users.delete(id));
-    if (admin_email) url.searchParams.set("admin_email", admin_email);
-    if (admin_password) url.searchParams.set("admin_password", admin_password);
-    return handleResponse(await fetch(url.toString(), { method: "DELETE" }));
+  updateUser: async (id, payload) => {
+    const [credentials, body] = withoutCredentials(payload);
+    return handleResponse(await adminFetch(endpoints.users.update(id), { method: "PUT", headers: { "Content-Type": "application/json" }, body: JSON.stringify(body) }, credentials));
   },
+  deleteUser: async (id, admin_email, admin_password) => handleResponse(await adminFetch(endpoints.users.delete(id), { method: "DELETE" }, { admin_email, admin_password })),
 };
 
 export default api;
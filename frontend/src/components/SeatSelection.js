@@ -1,4 +1,5 @@
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
+import { api } from '../api/api';
 
 const SeatSelection = ({ movie, onConfirm, onCancel, isOpen }) => {
   const [selectedSeats, setSelectedSeats] = useState([]);
@@ -6,24 +7,23 @@ const SeatSelection = ({ movie, onConfirm, onCancel, isOpen }) => {
   const [showAlert, setShowAlert] = useState(false);
   const [alertMessage, setAlertMessage] = useState('');
 
-  // Generate seat layout (10 rows x 15 seats = 150 seats)
-  const rows = 10;
-  const seatsPerRow = 15;
-  
-  // Create seat data
-  const generateSeats = () => {
+  // Seat layout and occupancy come from GET /movies/<id>/seats
+  // (bitset of taken seats, row-major, most significant bit first)
+  const buildSeats = (map, selected = []) => {
+    const bytes = atob(map.bitset);
     const seats = [];
-    for (let row = 1; row <= rows; row++) {
+    for (let row = 0; row < map.rows; row++) {
       const rowSeats = [];
-      for (let seat = 1; seat <= seatsPerRow; seat++) {
-        const seatId = `${row}-${seat}`;
-        const isOccupied = Math.random() < 0.3; // 30% chance of being occupied
+      for (let seat = 1; seat <= map.seats_per_row; seat++) {
+        const idx = row * map.seats_per_row + seat - 1;
+        const seatId = `${map.row_labels[row]}${seat}`;
+        const isOccupied = (bytes.charCodeAt(idx >> 3) & (0x80 >> (idx & 7))) !== 0;
         rowSeats.push({
           id: seatId,
-          row,
+          row: row + 1,
           seat,
-          occupied: isOccupied,
-          selected: false
+          occupied: isOccupied && !selected.includes(seatId),
+          selected: selected.includes(seatId)
         });
       }
       seats.push(rowSeats);
@@ -31,7 +31,29 @@ const SeatSelection = ({ movie, onConfirm, onCancel, isOpen }) => {
     return seats;
   };
 
-  const [seats, setSeats] = useState(generateSeats());
+  const [seats, setSeats] = useState([]);
+  const [rowLabels, setRowLabels] = useState('');
+  const etagRef = useRef(null);
+  const selectedRef = useRef(selectedSeats);
+  selectedRef.current = selectedSeats;
+
+  // Poll while the picker is open; unchanged maps come back as 304
+  useEffect(() => {
+    if (!isOpen) return undefined;
+    let cancelled = false;
+    const refresh = async () => {
+      try {
+        const map = await api.getSeatMap(movie.movie_id, etagRef.current);
+        if (!map || cancelled) return;
+        etagRef.current = map.etag;
+        setRowLabels(map.row_labels);
+        setSeats(buildSeats(map, selectedRef.current));
+      } catch (e) { /* keep the last map on transient errors */ }
+    };
+    refresh();
+    const timer = setInterval(refresh, 5000);
+    return () => { cancelled = true; clearInterval(timer); };
+  }, [isOpen, movie.movie_id]);
 
   const handleSeatClick = (rowIndex, seatIndex) => {
     const seat = seats[rowIndex][seatIndex];
@@ -64,8 +86,9 @@ const SeatSelection = ({ movie, onConfirm, onCancel, isOpen }) => {
       if (selectedSeats.length >= seatCount) {
         // Remove the first selected seat
         const firstSelected = selectedSeats[0];
-        const [firstRow, firstSeat] = firstSelected.split('-').map(Number);
-        newSeats[firstRow - 1][firstSeat - 1].selected = false;
+        const firstRow = rowLabels.indexOf(firstSelected[0]);
+        const firstSeat = Number(firstSelected.slice(1));
+        newSeats[firstRow][firstSeat - 1].selected = false;
         setSelectedSeats(prev => prev.slice(1));
       }
       
@@ -164,7 +187,7 @@ const SeatSelection = ({ movie, onConfirm, onCancel, isOpen }) => {
           <div className="seat-layout">
             {seats.map((row, rowIndex) => (
               <div key={rowIndex} className="seat-row">
-                <div className="row-number">{rowIndex + 1}</div>
+                <div className="row-number">{rowLabels[rowIndex] || rowIndex + 1}</div>
                 {row.map((seat, seatIndex) => (
                   <button
                     key={seatIndex}
@@ -13,6 +13,7 @@ export const endpoints = {
     create: `${BASE_URL}/movies`,
     update: (id) => `${BASE_URL}/movies/${id}`,
     delete: (id) => `${BASE_URL}/movies/${id}`,
+    seats: (id) => `${BASE_URL}/movies/${id}/seats`,
   },
   genres: {
     list: `${BASE_URL}/genres/`,
@@ -27,6 +28,8 @@ export const endpoints = {
   },
   bookings: { create: `${BASE_URL}/bookings`, listAll: `${BASE_URL}/bookings/all`, listByUser: (userId) => `${BASE_URL}/bookings/user/${userId}` },
   payments: { create: `${BASE_URL}/payments` },
+  batch: `${BASE_URL}/batch`,
+  home: `${BASE_URL}/home`,
   reviews: {
     listForMovie: (movieId) => `${BASE_URL}/reviews/${movieId}`,
     create: `${BASE_URL}/reviews`,
@@ -31,7 +31,9 @@ export default function Checkout() {
     try {
       const res = await api.createBooking({ customer_id: user.customer_id });
       if (res.success && res.order_id) {
-        navigate(`/payment?booking_id=${res.order_id}&amount=${total.toFixed(2)}`);
+        // The booking total is computed server-side from the checked-out items
+        const amount = Number(res.total_amount ?? total);
+        navigate(`/payment?booking_id=${res.order_id}&amount=${amount.toFixed(2)}`);
       } else {
         setMessage({ type: "error", text: res.message || "Failed to place booking" });
       }
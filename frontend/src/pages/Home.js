@@ -5,31 +5,33 @@ import { api } from "../api/api";
 export default function Home() {
   const [movies, setMovies] = useState([]);
   const [genres, setGenres] = useState([]);
+  const [cartCount, setCartCount] = useState(null);
   const [filter, setFilter] = useState("");
   const [search, setSearch] = useState("");
   const [message, setMessage] = useState(null);
   const user = JSON.parse(localStorage.getItem("user") || "null");
 
   useEffect(() => {
-    fetchMovies();
-    fetchGenres();
+    fetchHome();
   }, []);
 
-  const fetchMovies = async (genre_id) => {
+  const fetchHome = async () => {
     try {
-      const data = await api.getMovies({ genre_id });
-      setMovies(data);
+      const data = await api.getHome({ user_id: user && user.customer_id });
+      setMovies(data.movies);
+      setGenres(data.genres);
+      setCartCount(data.watchlist_count);
     } catch (err) {
       setMessage({ type: "error", text: "Failed to fetch movies." });
     }
   };
 
-  const fetchGenres = async () => {
+  const fetchMovies = async (genre_id) => {
     try {
-      const data = await api.getGenres();
-      setGenres(data);
+      const data = await api.getMovies({ genre_id });
+      setMovies(data);
     } catch (err) {
-      setMessage({ type: "error", text: "Failed to fetch genres." });
+      setMessage({ type: "error", text: "Failed to fetch movies." });
     }
   };
 
@@ -46,6 +48,7 @@ export default function Home() {
         type: "success", 
         text: `Added ${seats_selected} seat${seats_selected > 1 ? 's' : ''} to watchlist${selected_seats.length > 0 ? ` (${selected_seats.join(', ')})` : ''}` 
       } : { type: "error", text: res.message || "Error adding" });
+      if (res.success) setCartCount(res.watchlist_count);
     } catch (e) {
       setMessage({ type: "error", text: e.message || "Failed" });
     }
@@ -55,6 +58,7 @@ export default function Home() {
   return (
     <div className="container">
       <h2>Movies</h2>
+      {cartCount !== null && <p>{cartCount} item{cartCount === 1 ? "" : "s"} in your cart</p>}
       {message && (<div className={`alert ${message.type === "success" ? "alert-success" : "alert-error"}`}>{message.text}</div>)}
 
       <div className="form-group" style={{ display: 'grid', gridTemplateColumns: '1fr 240px', gap: 12 }}>
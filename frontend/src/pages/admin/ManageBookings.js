@@ -4,16 +4,14 @@ import { api } from "../../api/api";
 export default function ManageBookings() {
   const [bookings, setBookings] = useState([]);
   const [message, setMessage] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
 
-  async function load() {
+  async function load(cursor) {
     try {
-      // Reuse admin credentials from localStorage user if available
-      const user = JSON.parse(localStorage.getItem("user") || "null");
-      const admin_email = user?.email;
-      const admin_password = user?.password; // only if stored; otherwise prompt below
-
-      const data = await api.listAllBookings({ admin_email, admin_password });
-      setBookings(data);
+      // The session token from login authorizes the request (see api.js)
+      const page = await api.listAllBookings({ cursor });
+      setBookings(prev => (cursor ? [...prev, ...page.items] : page.items));
+      setNextCursor(page.nextCursor);
     } catch (e) {
       setMessage({ type: "error", text: e.message || "Failed to load bookings" });
     }
@@ -53,6 +51,9 @@ export default function ManageBookings() {
           ))}
         </tbody>
       </table>
+      {nextCursor && (
+        <button className="btn" onClick={() => load(nextCursor)}>Load more</button>
+      )}
 
       <div style={{ marginTop: 16 }}>
         <h3>Items</h3>
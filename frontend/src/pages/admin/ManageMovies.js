@@ -11,7 +11,12 @@ export default function ManageMovies() {
   const [editingMovie, setEditingMovie] = useState(null);
 
   async function load() {
-    try { const [m, g] = await Promise.all([api.getMovies(), api.getGenres()]); setMovies(m); setGenres(g); }
+    try {
+      const [m, g] = await api.batch([{ path: "/movies/" }, { path: "/genres/" }]);
+      const failed = [m, g].find((r) => r.status >= 400);
+      if (failed) throw new Error((failed.body && failed.body.message) || `HTTP ${failed.status}`);
+      setMovies(m.body); setGenres(g.body);
+    }
     catch (e) { setMessage({ type: "error", text: e.message }); }
   }
 
@@ -40,7 +45,8 @@ export default function ManageMovies() {
   }
 
   async function update(movie) {
-    if (!adminEmail || !adminPassword) {
+    const hasSession = Boolean(JSON.parse(localStorage.getItem("user") || "null")?.token);
+    if (!hasSession && (!adminEmail || !adminPassword)) {
       setMessage({ type: "error", text: "Please enter admin credentials first" });
       return;
     }